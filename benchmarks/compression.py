@@ -0,0 +1,65 @@
+"""CPU spent on compression against bytes saved, for json response of 5,000
+records (about 1MB), every available encoding at several levels.
+
+Run with: python -m benchmarks.compression
+"""
+import json
+import timeit
+
+from carp_api import compression
+
+
+NUMBER_OF_RECORDS = 5000
+
+LEVELS = {
+    'gzip': (1, 6, 9),
+    'deflate': (1, 6, 9),
+    'br': (1, 4, 8, 11),
+    'zstd': (1, 3, 9, 19),
+}
+
+REPEAT = 5
+
+
+def make_record(idx):
+    return {
+        'id': idx,
+        'name': 'Carp number {}'.format(idx),
+        'description': 'Lives in pond {} and likes bread'.format(idx % 40),
+        'price': round(idx * 1.25, 2),
+        'active': idx % 2 == 0,
+        'tags': ['fish', 'pond', 'tag{}'.format(idx % 10)],
+        'owner': {'id': idx % 50, 'email': 'owner{}@example.com'.format(idx)},
+    }
+
+
+def main():
+    body = json.dumps(
+        [make_record(idx) for idx in range(NUMBER_OF_RECORDS)]).encode('utf8')
+
+    print("Compressing {:,} bytes of json".format(len(body)))
+    print("{:8s} {:>5s} {:>10s} {:>12s} {:>8s} {:>10s}".format(
+        'encoding', 'level', 'ms', 'bytes', 'saved', 'MB/s'))
+
+    for name, levels in LEVELS.items():
+        if compression.make_codec(name) is None:
+            print("{:8s} (not installed, skipping)".format(name))
+
+            continue
+
+        for level in levels:
+            codec = compression.make_codec(name, level)
+
+            seconds = min(timeit.repeat(
+                lambda: codec.compress(body), number=1,  # NOQA
+                repeat=REPEAT))
+
+            size = len(codec.compress(body))
+
+            print("{:8s} {:5d} {:10.2f} {:12,d} {:7.1f}% {:10.1f}".format(
+                name, level, seconds * 1000, size,
+                100 - size * 100 / len(body), len(body) / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main()
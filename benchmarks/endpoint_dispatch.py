@@ -0,0 +1,110 @@
+"""Dispatch overhead of an endpoint with an empty action.
+
+Compares endpoint that handles request the way BaseEndpoint.__call__ used to
+(every stage looked up and evaluated on every request) against compiled
+pipeline, both as bare view function call and as whole flask request.
+
+Run with: python -m benchmarks.endpoint_dispatch
+"""
+import timeit
+
+import flask
+
+from carp_api import misc_helper
+from carp_api.api_request import ApiRequest
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import component, router
+from carp_api.server_factory import default
+from carp_api.settings import base
+
+
+REPEAT = 5000
+
+
+class Settings:
+    def __init__(self):
+        for key in dir(base):
+            if key.isupper():
+                setattr(self, key, getattr(base, key))
+
+        self.ROUTING_ADD_COMMON = False
+
+
+class Empty(BaseEndpoint):
+    url = 'empty'
+
+    def action(self):
+        return None
+
+
+class Uncompiled(Empty):
+    """BaseEndpoint.__call__ and post_action as they were before pipelines.
+    """
+    url = 'uncompiled'
+
+    def post_action(self, response):
+        if not isinstance(response, flask.wrappers.Response):
+            response = flask.make_response(flask.jsonify(response))
+
+        response.status_code = self.http_code if self.http_code else \
+            self.http_codes_map.get(self.request.method, 200)
+
+        response.headers.extend(misc_helper.cors_headers())
+
+        return response
+
+    def __call__(self, *args, **kwargs):
+        if self.request.method == 'OPTIONS':
+            result = flask.current_app.make_default_options_response()
+        else:
+            self.pre_action()
+
+            payload = self.get_payload()
+
+            if self.input_schema:
+                args, kwargs = self.parse_input(payload, args, kwargs)
+
+            result = self.action(*args, **kwargs)
+
+            if self.output_schema:
+                result = self.parse_output(result)
+
+        result = self.post_action(result)
+
+        return result
+
+
+def measure(func):
+    return min(timeit.repeat(func, number=REPEAT, repeat=5)) / REPEAT * 1e6
+
+
+def main():
+    router.Router.versions = component.VersionList()
+
+    router.enable('1.0', 'bench', endpoints=[Empty, Uncompiled])
+
+    app = flask.Flask(__name__)
+
+    app.request_class = ApiRequest
+
+    default.register_routes(Settings(), app)
+
+    client = app.test_client()
+
+    print("Dispatch of empty action, microseconds per request")
+
+    for endpoint in (Uncompiled, Empty):
+        instance = app.routing_table.get_instance(endpoint)
+
+        path = '/1.0/bench/{}/'.format(endpoint.url)
+
+        with app.test_request_context(path):
+            print("* {}".format(endpoint.__name__))
+            print("    view function:  {:8.3f}".format(measure(instance)))
+
+        print("    whole request:  {:8.3f}".format(
+            measure(lambda: client.get(path))))  # NOQA
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Cost of converting form-encoded payload into python structure with
+request_parser.form_to_python, for forms of 1,000 and 10,000 fields.
+
+Time per field should stay flat as the form grows, no matter if fields are
+distinct keys, one key repeated (name[]), explicit indices (name[12]) or
+lists of objects (user[12].name). Every form is parsed with keys split on
+every request and with keys cached (FORM_KEY_CACHE_SIZE), the latter is what
+clients sending the same fields over and over get.
+
+Run with: python -m benchmarks.form_parsing
+"""
+import timeit
+
+from werkzeug.datastructures import CombinedMultiDict, MultiDict
+
+from carp_api import request_parser
+
+
+SIZES = (1000, 10000)
+
+KEY_PARSERS = (
+    ('uncached', lambda: request_parser.parse_key),
+    ('cached', lambda: request_parser.KeyParser(max(SIZES))),
+)
+
+SHAPES = (
+    ('flat', lambda idx: 'field{}'.format(idx)),
+    ('appended', lambda idx: 'name[]'),
+    ('indexed', lambda idx: 'name[{}]'.format(idx)),
+    ('objects', lambda idx: 'user[{}].{}'.format(idx // 4, 'abcd'[idx % 4])),
+    ('nested', lambda idx: 'form.user{}.address.line'.format(idx)),
+)
+
+
+def make_payload(make_key, size):
+    return CombinedMultiDict([MultiDict(), MultiDict([
+        (make_key(idx), 'value {}'.format(idx)) for idx in range(size)
+    ])])
+
+
+def main():
+    print("Parsing forms, microseconds per field")
+
+    for label, make_key in SHAPES:
+        print("* {}".format(label))
+
+        for parser_label, make_key_parser in KEY_PARSERS:
+            # pylint: disable=protected-access
+            request_parser._key_parser = make_key_parser()
+
+            line = []
+
+            for size in SIZES:
+                payload = make_payload(make_key, size)
+
+                elapsed = min(timeit.repeat(
+                    lambda: request_parser.form_to_python(payload),  # NOQA
+                    number=5, repeat=3)) / 5
+
+                line.append("{:>6} fields: {:6.3f}".format(
+                    size, elapsed / size * 1e6))
+
+            print("    {:10s} {}".format(
+                parser_label + ':', '   '.join(line)))
+
+    request_parser.clear()
+
+
+if __name__ == '__main__':
+    main()
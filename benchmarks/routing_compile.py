@@ -0,0 +1,103 @@
+"""Start-up cost of building final routing.
+
+Route table has 50 versions and 2,000 endpoints (spread over 200
+namespaces), first version enables all of them and every following version
+overrides a handful, everything else propagates.
+
+Measures registration, Router.get_final_routing, flattening (as done by
+register_routes) and re-compilation after late Router.enable, both for the
+latest and for the very first version.
+
+Run with: python -m benchmarks.routing_compile
+"""
+import time
+
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import component, router
+
+
+NUMBER_OF_VERSIONS = 50
+
+NUMBER_OF_ENDPOINTS = 2000
+
+NUMBER_OF_NAMESPACES = 200
+
+OVERRIDES_PER_VERSION = 10
+
+
+def make_endpoint(name):
+    return type(name, (BaseEndpoint,), {'url': name.lower()})
+
+
+def enable_all(endpoints):
+    for idx, endpoint in enumerate(endpoints):
+        router.enable('1.0', 'ns{}'.format(idx % NUMBER_OF_NAMESPACES), [
+            endpoint
+        ])
+
+    for version in range(1, NUMBER_OF_VERSIONS):
+        for idx in range(OVERRIDES_PER_VERSION):
+            idx = (version * OVERRIDES_PER_VERSION + idx) % NUMBER_OF_ENDPOINTS
+
+            override = type(
+                endpoints[idx].__name__, (endpoints[idx],), {})
+
+            router.enable(
+                '1.{}'.format(version),
+                'ns{}'.format(idx % NUMBER_OF_NAMESPACES),
+                [override])
+
+
+def timed(func):
+    start = time.perf_counter()
+
+    result = func()
+
+    return time.perf_counter() - start, result
+
+
+def main():
+    router.Router.versions = component.VersionList()
+
+    endpoints = [
+        make_endpoint('Endpoint{}'.format(idx))
+        for idx in range(NUMBER_OF_ENDPOINTS)
+    ]
+
+    print("Final routing, {} versions x {} endpoints, seconds".format(
+        NUMBER_OF_VERSIONS, NUMBER_OF_ENDPOINTS))
+
+    elapsed, _ = timed(lambda: enable_all(endpoints))
+
+    print("    enable:                      {:8.4f}".format(elapsed))
+
+    elapsed, final_routing = timed(router.Router.get_final_routing)
+
+    print("    get_final_routing:           {:8.4f}".format(elapsed))
+
+    elapsed, flat_list = timed(final_routing.as_flat_list)
+
+    print("    as_flat_list:                {:8.4f}".format(elapsed))
+
+    print("    (routes: {})".format(
+        sum(len(endpoints) for _, _, endpoints in flat_list)))
+
+    late_endpoint = make_endpoint('LateEndpoint')
+
+    router.enable('1.{}'.format(NUMBER_OF_VERSIONS - 1), 'late', [
+        late_endpoint
+    ])
+
+    elapsed, _ = timed(router.Router.get_final_routing)
+
+    print("    late enable, last version:   {:8.4f}".format(elapsed))
+
+    router.enable('1.0', 'late', [late_endpoint])
+
+    elapsed, _ = timed(router.Router.get_final_routing)
+
+    print("    late enable, first version:  {:8.4f}".format(elapsed))
+
+
+if __name__ == '__main__':
+    main()
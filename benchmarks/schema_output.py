@@ -0,0 +1,125 @@
+"""Cost of converting response with output schema, 10,000 nested items and
+a single item.
+
+Compares conversion done inline (as BaseEndpoint.parse_output used to)
+against dumper of schema_helper.get_dumper, that is called by endpoint
+pipeline. Both construct new schema instance for every response, dumper only
+saves lookups around loads/dumps, numbers are expected to be on par.
+
+python_schema itself is not needed, schema below follows its interface and
+instantiates its fields on construction the same way, so numbers show
+overhead carp_api adds around loads/dumps, not speed of python_schema.
+
+Run with: python -m benchmarks.schema_output
+"""
+import timeit
+
+try:
+    import python_schema
+except ImportError:
+    python_schema = None
+
+from carp_api import exception, schema_helper
+
+
+NUMBER_OF_ITEMS = 10000
+
+NUMBER_OF_FIELDS = 40
+
+REPEAT = 20
+
+
+class Field:
+    def __init__(self, name):
+        self.name = name
+        self.validators = [str, len]
+
+    def dump(self, value):
+        return value
+
+
+class ItemSchema:
+    """Nested schema, item with plain fields and list of tags.
+    """
+    def __init__(self):
+        self.fields = [
+            Field('field{}'.format(idx)) for idx in range(NUMBER_OF_FIELDS)]
+        self.tags = Field('tags')
+        self.value = None
+
+    def loads(self, payload):
+        self.value = payload
+
+    def dump_item(self, item):
+        result = {
+            field.name: field.dump(item[field.name]) for field in self.fields
+        }
+
+        result['tags'] = [self.tags.dump(tag) for tag in item['tags']]
+
+        return result
+
+    def dumps(self):
+        return self.dump_item(self.value)
+
+
+class ItemListSchema(ItemSchema):
+    def dumps(self):
+        return [self.dump_item(item) for item in self.value]
+
+
+def make_item(idx):
+    item = {
+        'field{}'.format(field): idx for field in range(NUMBER_OF_FIELDS)
+    }
+
+    item['tags'] = ['tag{}'.format(idx), 'other']
+
+    return item
+
+
+def parse_output(output_schema, payload):
+    """BaseEndpoint.parse_output before schema_helper.
+    """
+    instance = output_schema()
+
+    try:
+        instance.loads(payload)
+    except python_schema.exception.PayloadError as err:
+        raise exception.ResponseContentError(err)
+
+    return instance.dumps()
+
+
+def measure(func, repeat):
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main():
+    if python_schema is None:
+        print("python_schema is not installed")
+
+        return
+
+    items = [make_item(idx) for idx in range(NUMBER_OF_ITEMS)]
+    item = items[0]
+
+    cases = [
+        ('{} items'.format(NUMBER_OF_ITEMS), ItemListSchema, items, REPEAT),
+        ('single item', ItemSchema, item, REPEAT * 1000),
+    ]
+
+    print("Output schema, microseconds per response")
+
+    for label, schema_class, payload, repeat in cases:
+        dump = schema_helper.make_dumper(schema_class)
+
+        print("* {}".format(label))
+        print("    inline parse_output:       {:12.2f}".format(measure(
+            lambda: parse_output(schema_class, payload), repeat)))  # NOQA
+        print("    schema_helper dumper:      {:12.2f}".format(measure(
+            lambda: dump(payload), repeat)))  # NOQA
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Cost of serializing response of an endpoint, list of 1,000 records and a
+small object.
+
+Compares flask.jsonify (with flask defaults of carp_api, sorted keys and
+ascii only output) against serializers selectable by JSON_SERIALIZER and
+against already serialized body returned by action (bytes).
+
+Run with: python -m benchmarks.serialization
+"""
+import datetime
+import importlib
+import timeit
+
+import flask
+
+from carp_api import serializer
+from carp_api.settings import flask_defaults
+
+
+NUMBER_OF_RECORDS = 1000
+
+REPEAT = 200
+
+
+def make_record(idx):
+    return {
+        'id': idx,
+        'name': 'Carp number {}'.format(idx),
+        'description': 'Zażółć gęślą jaźń ' * 3,
+        'price': idx * 1.25,
+        'active': idx % 2 == 0,
+        'tags': ['fish', 'pond', 'tag{}'.format(idx % 10)],
+        'owner': {'id': idx % 50, 'email': 'owner{}@example.com'.format(idx)},
+    }
+
+
+def measure(func, repeat):
+    return min(timeit.repeat(func, number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main():
+    app = flask.Flask(__name__)
+    app.config.from_object(flask_defaults)
+
+    records = [make_record(idx) for idx in range(NUMBER_OF_RECORDS)]
+    small = {'id': 1, 'created': datetime.datetime(2020, 1, 2), 'ok': True}
+
+    serializers = [('stdlib', serializer.load('stdlib'))]
+
+    try:
+        importlib.import_module('orjson')
+    except ImportError:
+        print("(orjson not installed, skipping)")
+    else:
+        serializers.append(('orjson', serializer.load('orjson')))
+
+    print("Building json response, microseconds per response")
+
+    with app.test_request_context():
+        for label, payload, repeat in (
+                ('{} records'.format(NUMBER_OF_RECORDS), records, REPEAT),
+                ('small object', small, REPEAT * 100)):
+            print("* {}".format(label))
+            print("    flask.jsonify:     {:10.2f}".format(measure(
+                lambda: flask.jsonify(payload), repeat)))  # NOQA
+
+            for name, dumps in serializers:
+                print("    {:18s} {:10.2f}".format(name + ':', measure(
+                    lambda: app.response_class(  # NOQA
+                        dumps(payload),  # NOQA
+                        mimetype=serializer.MIMETYPE), repeat)))
+
+            body = serializer.load('stdlib')(payload)
+
+            print("    bytes:             {:10.2f}".format(measure(
+                lambda: serializer.make_response(body), repeat)))  # NOQA
+
+
+if __name__ == '__main__':
+    main()
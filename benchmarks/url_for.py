@@ -0,0 +1,91 @@
+"""Cost of building links to endpoints, ie. self/next/related links of
+thousands of items in a single response.
+
+Compares flask.url_for and BaseEndpoint.get_final_url (with parameters
+substituted by str.replace, no quoting, lower bound of hand made links)
+against BaseEndpoint.url_for, that uses url templates compiled at
+registration. Route table has 30 versions and 200 endpoints.
+
+Run with: python -m benchmarks.url_for
+"""
+import timeit
+
+import flask
+
+from carp_api.api_request import ApiRequest
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import component, router
+from carp_api.server_factory import default
+from carp_api.settings import base
+
+
+NUMBER_OF_VERSIONS = 30
+
+NUMBER_OF_ENDPOINTS = 200
+
+REPEAT = 20000
+
+
+class Settings:
+    def __init__(self):
+        for key in dir(base):
+            if key.isupper():
+                setattr(self, key, getattr(base, key))
+
+        self.ROUTING_ADD_COMMON = False
+
+
+def make_endpoint(idx):
+    return type('Endpoint{}'.format(idx), (BaseEndpoint,), {
+        'url': 'item{}/uid/<int:uid>/<string:slug>'.format(idx),
+    })
+
+
+def measure(func):
+    return min(timeit.repeat(func, number=REPEAT, repeat=5)) / REPEAT * 1e6
+
+
+def main():
+    router.Router.versions = component.VersionList()
+
+    endpoints = [make_endpoint(idx) for idx in range(NUMBER_OF_ENDPOINTS)]
+
+    router.enable('1.0', 'item', endpoints=endpoints)
+
+    for idx in range(1, NUMBER_OF_VERSIONS):
+        router.enable('1.{}'.format(idx), 'other', endpoints=[])
+
+    app = flask.Flask(__name__)
+    app.request_class = ApiRequest
+
+    default.register_routes(Settings(), app)
+
+    endpoint = endpoints[NUMBER_OF_ENDPOINTS // 2]
+    instance = endpoint()
+
+    version = '1.{}'.format(NUMBER_OF_VERSIONS - 1)
+
+    print("Building url, {} versions x {} endpoints, microseconds per "
+          "url".format(NUMBER_OF_VERSIONS, NUMBER_OF_ENDPOINTS))
+
+    with app.test_request_context('/{}/item/'.format(version)):
+        def with_flask():
+            flask.url_for(endpoint.__name__, uid=10, slug='item')
+
+        def with_get_final_url():
+            instance.get_final_url(version, 'item').replace(
+                '<int:uid>', str(10)).replace('<string:slug>', 'item')
+
+        def with_url_for():
+            endpoint.url_for(version, uid=10, slug='item')
+
+        print("    flask.url_for:          {:8.3f}".format(
+            measure(with_flask)))
+        print("    get_final_url:          {:8.3f}".format(
+            measure(with_get_final_url)))
+        print("    BaseEndpoint.url_for:   {:8.3f}".format(
+            measure(with_url_for)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Matching throughput of werkzeug map against radix matcher, for growing
+route tables.
+
+Every version has 20 endpoints (half of them with an int converter), each
+version is registered separately as in default (non-dispatcher) mode, thus
+route table grows with number of versions.
+
+Run with: python -m benchmarks.url_matching
+"""
+import timeit
+
+from werkzeug.routing import Map, Rule
+
+from carp_api.routing import matcher
+
+
+NUMBER_OF_ENDPOINTS = 20
+
+NUMBER_OF_VERSIONS = (5, 50, 250)
+
+REPEAT = 2000
+
+
+def make_rules(versions):
+    rules = []
+
+    for version in range(versions):
+        for idx in range(NUMBER_OF_ENDPOINTS):
+            url = '/1.{}/ns{}/item{}/'.format(version, idx % 4, idx)
+
+            if idx % 2:
+                url += 'uid/<int:uid>/'
+
+            rules.append(Rule(url, endpoint='endpoint{}'.format(idx)))
+
+    return rules
+
+
+def measure(url_map, path):
+    adapter = url_map.bind('localhost')
+
+    def match():
+        try:
+            adapter.match(path, 'GET')
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+    seconds = min(timeit.repeat(match, number=REPEAT, repeat=5)) / REPEAT
+
+    return 1 / seconds
+
+
+def main():
+    print("Url matching, matches per second")
+
+    for versions in NUMBER_OF_VERSIONS:
+        rules = make_rules(versions)
+
+        werkzeug_map = Map([rule.empty() for rule in rules])
+        radix_map = matcher.RadixMap([rule.empty() for rule in rules])
+
+        last = versions - 1
+
+        paths = {
+            'first rule': '/1.0/ns0/item0/',
+            'last rule': '/1.{}/ns3/item19/uid/10/'.format(last),
+            'not found': '/1.{}/ns3/missing/'.format(last),
+        }
+
+        print("* {} rules".format(len(rules)))
+
+        for kind, path in paths.items():
+            print("    {:<12} werkzeug: {:>10.0f}  radix: {:>10.0f}".format(
+                kind, measure(werkzeug_map, path), measure(radix_map, path)))
+
+
+if __name__ == '__main__':
+    main()
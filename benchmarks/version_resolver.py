@@ -0,0 +1,96 @@
+"""Per-request cost of figuring out version of the api.
+
+Compares url2vapi (parsing whole url on every request, as ApiRequest used to
+do) against VersionResolver compiled from a route table with 30 versions.
+
+Run with: python -m benchmarks.version_resolver
+"""
+import timeit
+
+import flask
+
+from werkzeug.test import EnvironBuilder
+
+from carp_api.api_request import ApiRequest
+from carp_api.routing import component, resolver
+
+
+NUMBER_OF_VERSIONS = 30
+
+REPEAT = 20000
+
+
+def build_version_list():
+    version_list = component.VersionList()
+
+    for idx in range(NUMBER_OF_VERSIONS):
+        version_list.get_or_create_version('{}.{}'.format(idx // 10, idx % 10))
+
+    return version_list
+
+
+def measure(func):
+    return min(timeit.repeat(func, number=REPEAT, repeat=5)) / REPEAT * 1e6
+
+
+def main():
+    app = flask.Flask(__name__)
+    app.version_resolver = resolver.VersionResolver.from_version_list(
+        build_version_list())
+
+    cached_resolver = resolver.VersionResolver.from_version_list(
+        build_version_list(), cache_size=1024)
+
+    paths = {
+        'versioned': '/2.7/user/uid/10/',
+        'unversioned': '/ping/',
+    }
+
+    print("Version resolving, {} versions, microseconds per request".format(
+        NUMBER_OF_VERSIONS))
+
+    try:
+        import url2vapi
+    except ImportError:
+        url2vapi = None
+
+        print("(url2vapi not installed, skipping baseline)")
+
+    with app.app_context():
+        for kind, path in paths.items():
+            environ = EnvironBuilder(path=path).get_environ()
+
+            print("* {} ({})".format(kind, path))
+
+            if url2vapi:
+                def before():
+                    request = flask.Request(environ)
+                    url2vapi.split(request.url, pattern="<version:double>")
+
+                print("    url2vapi.split:        {:8.3f}".format(
+                    measure(before)))
+
+            def lazy_unused():
+                ApiRequest(environ)
+
+            def lazy_used():
+                return ApiRequest(environ).version
+
+            def lookup_only():
+                app.version_resolver.resolve(path)
+
+            def lookup_cached():
+                cached_resolver.resolve(path)
+
+            print("    ApiRequest (no read):  {:8.3f}".format(
+                measure(lazy_unused)))
+            print("    ApiRequest (version):  {:8.3f}".format(
+                measure(lazy_used)))
+            print("    resolver lookup:       {:8.3f}".format(
+                measure(lookup_only)))
+            print("    resolver lookup (LRU): {:8.3f}".format(
+                measure(lookup_cached)))
+
+
+if __name__ == '__main__':
+    main()
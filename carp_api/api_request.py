@@ -1,29 +1,64 @@
-import url2vapi
+from flask import Request, current_app
+from werkzeug.utils import cached_property
 
-from flask import Request
+from carp_api import payload_guard
+from carp_api.routing import resolver
 
 
 class ApiRequest(Request):
     '''Extended flask request, notable change: it is version aware.
-    '''
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-
-        self.api_request = url2vapi.split(
-            self.url, pattern="<version:double>")
 
+    Version is resolved lazily (on first access) by the app's version
+    resolver, so requests that never ask for it do not pay for parsing.
+    '''
     def __str__(self):
         return '<ApiRequest(version={}, url={})>'.format(
-            self.api_request.version, self.api_request.remainder)
+            self.version, self.remainder)
+
+    @cached_property
+    def stream(self):
+        """Body of the request, it can't be read over PAYLOAD_MAX_SIZE (not
+        even chunked one, sent without Content-Length).
+        """
+        return payload_guard.limit_stream(
+            super().stream, self.content_length)
+
+    def get_json(self, force=False, silent=False, cache=True):
+        """Parses json body, it's checked against limits of payloads first
+        (see carp_api.payload_guard), errors of limits are never silenced.
+        """
+        if force or self.is_json:
+            payload_guard.check_json(self.get_data(cache=True))
+
+        return super().get_json(force=force, silent=silent, cache=cache)
+
+    @cached_property
+    def resolved_path(self):
+        """Tuple of (version, remainder) as returned by app.version_resolver.
+        """
+        resolver = getattr(current_app, 'version_resolver', None)
+
+        if resolver is None:
+            return None, self.path
+
+        return resolver.resolve(self.path)
 
     @property
     def version(self):
-        return self.api_request.version['value'] \
-            if self.api_request.version else None
+        """Version that serves the request.
+        """
+        return self.resolved_path[0]
+
+    @property
+    def requested_version(self):
+        """Version requested by the client, differs from version only if
+        request is served by the nearest lower version (version fallback).
+        """
+        return self.environ.get(resolver.REQUESTED_VERSION_KEY, self.version)
 
     @property
     def remainder(self):
-        return self.api_request.remainder
+        return self.resolved_path[1]
 
     def request_is_versioned(self, path):
         '''Determines whether the request URI is versioned'''
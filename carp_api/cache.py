@@ -0,0 +1,177 @@
+"""In-process cache of responses of GET endpoints, declared on the endpoint:
+
+    class ListCountries(BaseEndpoint):
+        url = 'countries'
+
+        cache = cache.ResponseCache(ttl=300, max_entries=100)
+
+Serialized body, status and headers of successful (200) responses are kept
+in LRU of `max_entries`, for `ttl` seconds. Responses are keyed by path
+(that includes version), query arguments, values of `vary` headers (Origin
+is always among them, CORS headers differ per origin) and, if `per_user` is
+set, uid of request.user.
+
+Endpoints that change cached data invalidate it:
+
+    ListCountries.cache.invalidate()  # everything
+    GetCountry.cache.invalidate(GetCountry.url_for('1.0', code='pl'))
+
+Hits, misses and evictions of every cache are available with get_stats().
+
+NOTE: cache lives in memory of the process, every worker keeps its own and
+invalidation reaches only cache of the worker that called it.
+"""
+import collections
+import threading
+import time
+import weakref
+
+import flask
+
+
+_caches = weakref.WeakSet()
+
+
+class ResponseCache:
+    # pylint: disable=too-many-instance-attributes
+    def __init__(
+            self, ttl=60, max_entries=1024, vary=(), per_user=False,
+            methods=('GET', 'HEAD'), name=None):
+        # pylint: disable=too-many-arguments
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.vary = ('Origin',) + tuple(
+            header for header in vary if header.lower() != 'origin')
+        self.per_user = per_user
+        self.methods = set(method.upper() for method in methods)
+        self.name = name
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # key -> (expires at, body, status, headers)
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        _caches.add(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_key(self, request):
+        headers = request.headers
+
+        return (
+            request.path,
+            tuple(sorted(request.args.items(multi=True))),
+            tuple(headers.get(header) for header in self.vary),
+            getattr(getattr(request, 'user', None), 'uid', None)
+            if self.per_user else None,
+        )
+
+    def get(self, key):
+        """Returns cached response for the key or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+
+                    self.hits += 1
+                else:
+                    del self._entries[key]
+
+                    entry = None
+
+            if entry is None:
+                self.misses += 1
+
+                return None
+
+        _, body, status, headers = entry
+
+        return flask.current_app.response_class(
+            body, status=status, headers=headers)
+
+    def set(self, key, response):
+        """Keeps response, unless it's not cacheable (other than 200,
+        streamed or setting cookies).
+        """
+        if response.status_code != 200 or response.is_streamed or \
+                'Set-Cookie' in response.headers:
+            return
+
+        entry = (
+            time.monotonic() + self.ttl, response.get_data(),
+            response.status_code, list(response.headers.items()),
+        )
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+                self.evictions += 1
+
+    def invalidate(self, path=None):
+        """Drops cached responses of given path (any query arguments, vary
+        values and users), or all of them if path is not given.
+        """
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+
+                return
+
+            path = path.partition('?')[0]
+
+            for key in [key for key in self._entries if key[0] == path]:
+                del self._entries[key]
+
+    def get_stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+        }
+
+    def wrap(self, pipeline, get_variant=None):
+        """Returns pipeline of endpoint that serves cached responses,
+        get_variant (if given) adds its result for the request to the key,
+        ie. encoding of compressed responses.
+        """
+        get_key = self.get_key
+        get = self.get
+        store = self.set
+
+        def cached_pipeline(*args, **kwargs):
+            request = flask.request
+
+            key = get_key(request) if get_variant is None else \
+                get_key(request) + (get_variant(request),)
+
+            response = get(key)
+
+            if response is None:
+                response = pipeline(*args, **kwargs)
+
+                store(key, response)
+
+            return response
+
+        return cached_pipeline
+
+
+def get_stats():
+    """Returns stats of all response caches by their names.
+    """
+    return {
+        cache.name or str(id(cache)): cache.get_stats()
+        for cache in list(_caches)
+    }
@@ -1,8 +1,13 @@
 import importlib
 import os
+import subprocess
 import sys
 
-from flask.cli import main as flask_main
+import click
+
+from flask import current_app
+from flask.cli import (
+    FlaskGroup, routes_command, run_command, shell_command, with_appcontext)
 
 
 def check_variables():
@@ -79,6 +84,158 @@ def print_run_data():
     print("*" * 80)
 
 
+@click.group(
+    'routes', invoke_without_command=True,
+    short_help='Show the routes for the app.')
+@click.option(
+    '--sort', '-s',
+    type=click.Choice(('endpoint', 'methods', 'rule', 'match')),
+    default='endpoint',
+    help=(
+        'Method to sort routes by. "match" is the order that Flask will match '
+        'routes when dispatching a request.'
+    ),
+)
+@click.option(
+    '--all-methods', is_flag=True, help='Show HEAD and OPTIONS methods.')
+@click.option(
+    '--memory', is_flag=True,
+    help='Show memory used by compiled routing table instead of routes.')
+@click.pass_context
+def routes(ctx, sort, all_methods, memory):
+    """Show all registered routes with endpoints and methods."""
+    if ctx.invoked_subcommand:
+        return
+
+    if memory:
+        ctx.invoke(routes_memory)
+
+        return
+
+    ctx.invoke(materialize_routes)
+    ctx.invoke(routes_command, sort=sort, all_methods=all_methods)
+
+
+@with_appcontext
+def materialize_routes():
+    """Registers versions that would be otherwise registered on first
+    request.
+    """
+    materializer = getattr(current_app, 'version_materializer', None)
+
+    if materializer is not None:
+        materializer.materialize_all()
+
+
+@with_appcontext
+def routes_memory():
+    routing_table = getattr(current_app, 'routing_table', None)
+
+    if routing_table is None:
+        click.echo("App has no routing table (custom register_routes?)")
+
+        return
+
+    usage = routing_table.memory_usage()
+
+    rules = [
+        rule for rule in current_app.url_map.iter_rules()
+        if rule.endpoint != 'static'
+    ]
+
+    rules_size = sum(
+        sys.getsizeof(rule) + sys.getsizeof(rule.__dict__) for rule in rules)
+
+    versions = max(usage['versions'], 1)
+    routes_count = max(usage['routes'], 1)
+
+    click.echo("Routing table")
+    click.echo("  versions: {versions}, routes: {routes}, endpoint "
+               "instances: {endpoint_instances}".format(**usage))
+    click.echo("  structure: {structure} B, strings: {strings} B, "
+               "endpoints: {endpoints} B, total: {total} B".format(**usage))
+    click.echo("  per version: {:.0f} B, per endpoint: {:.0f} B".format(
+        usage['total'] / versions, usage['total'] / routes_count))
+    click.echo("Url map (werkzeug rules, shallow)")
+    click.echo("  rules: {}, total: {} B".format(len(rules), rules_size))
+    click.echo("  per version: {:.0f} B, per endpoint: {:.0f} B".format(
+        rules_size / versions, rules_size / routes_count))
+
+
+@routes.command('compile')
+@click.option(
+    '--output', '-o', default=None,
+    help='Path of the artifact, defaults to ROUTING_ARTIFACT setting.')
+def routes_compile(output):
+    """Compile final routing into artifact loaded by workers on boot."""
+    from simple_settings import settings
+
+    from carp_api.routing import artifact
+    from carp_api.server_factory import default
+
+    output = output or settings.ROUTING_ARTIFACT
+
+    if not output:
+        raise click.UsageError(
+            "Pass --output or set ROUTING_ARTIFACT in settings")
+
+    routing_table = default.build_routing_table(settings)
+
+    data = artifact.dump(output, settings, routing_table)
+
+    click.echo("Routing artifact written to {} ({} routes, {} source "
+               "files)".format(
+                   output, len(data['routes']), len(data['sources'])))
+
+
+BOOT_TIME_PROBE = """
+import time
+from carp_api.server_factory import default, server_factory
+start = time.perf_counter()
+server_factory.create_app(register_routes=lambda settings, app: (
+    default.register_routes(settings, app, use_artifact={use_artifact})))
+print(time.perf_counter() - start)
+"""
+
+
+@routes.command('boot-time')
+@click.option(
+    '--repeat', '-r', default=5, show_default=True,
+    help='Number of fresh interpreters to boot for each variant.')
+def routes_boot_time(repeat):
+    """Compare boot time with and without routing artifact."""
+    from simple_settings import settings
+
+    if not settings.ROUTING_ARTIFACT:
+        raise click.UsageError("ROUTING_ARTIFACT is not set in settings")
+
+    for use_artifact in (False, True):
+        timings = []
+
+        for _ in range(repeat):
+            output = subprocess.check_output([
+                sys.executable, '-c',
+                BOOT_TIME_PROBE.format(use_artifact=use_artifact),
+            ])
+
+            timings.append(float(output.decode().strip().splitlines()[-1]))
+
+        click.echo("{}: min {:.4f}s, avg {:.4f}s".format(
+            'artifact' if use_artifact else 'build',
+            min(timings), sum(timings) / len(timings)))
+
+
+cli = FlaskGroup(
+    add_default_commands=False,
+    help="""Carp-api utility script, wrapper around flask command line.
+"""
+)
+
+cli.add_command(run_command)
+cli.add_command(shell_command)
+cli.add_command(routes)
+
+
 def main(as_module=False):
     print("Checking environmental variables")
 
@@ -100,7 +257,9 @@ def main(as_module=False):
 
     print("")
 
-    flask_main(as_module)
+    cli.main(
+        args=sys.argv[1:],
+        prog_name="python -m carp_api" if as_module else None)
 
 
 if __name__ == '__main__':
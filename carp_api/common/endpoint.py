@@ -1,8 +1,9 @@
 import pathlib
 
 from flask import request, current_app, make_response
+from simple_settings import settings
 
-from carp_api import endpoint, signal
+from carp_api import endpoint, exception, signal
 
 from carp_api.common import logic
 
@@ -79,3 +80,35 @@ class FavIcon(endpoint.BaseEndpoint):
         resp.headers['content-type'] = 'image/vnd.microsoft.icon'
 
         return resp
+
+
+class Batch(endpoint.BaseEndpoint):
+    """Runs many requests at once, saves round trips of clients.
+
+    Body is a json list of requests, ie. [{"method": "GET", "path":
+    "/1.0/user/"}, {"method": "POST", "path": "/1.0/tag/", "body": {"name":
+    "carp"}}], response is a list of {"status": ..., "body": ...} in the same
+    order. Requests go through the whole app, with headers of the batch
+    request, up to BATCH_MAX_WORKERS of them at the same time.
+    """
+    url = 'batch'
+    name = 'batch'
+
+    methods = ['POST']
+
+    http_code = 200
+
+    def action(self):  # pylint: disable=arguments-differ
+        if request.environ.get(logic.BATCH_ENVIRON_KEY):
+            raise exception.InvalidPayloadError(
+                "Batch can't contain another batch")
+
+        items = logic.parse_batch(
+            request.get_json(silent=True), settings.BATCH_MAX_SIZE)
+
+        # pylint: disable=protected-access
+        app = current_app._get_current_object()
+        # pylint: enable=protected-access
+
+        return logic.run_batch(
+            app, items, request, settings.BATCH_MAX_WORKERS)
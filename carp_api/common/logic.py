@@ -1,6 +1,24 @@
 import collections
+import json
+import threading
+
+from concurrent import futures
 
 from flask import current_app
+from werkzeug.test import EnvironBuilder
+
+from carp_api import exception
+
+
+# headers of batch request that are not passed to its sub-requests
+BATCH_SKIPPED_HEADERS = frozenset((
+    'content-type', 'content-length', 'transfer-encoding', 'accept-encoding',
+))
+
+BATCH_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE'))
+
+# key of environ that marks sub-requests of a batch
+BATCH_ENVIRON_KEY = 'carp_api.batch'
 
 
 def get_pong(version=None):
@@ -12,20 +30,178 @@ def get_url_map(version=None):
 
     prefix = '/{}'.format(version) if version else ''
 
+    # versions that were not requested yet are not registered
+    materializer = getattr(current_app, 'version_materializer', None)
+
+    if materializer is not None:
+        if version:
+            materializer.materialize(version)
+        else:
+            materializer.materialize_all()
+
     for rule in current_app.url_map.iter_rules():
         if rule.endpoint == 'static':
             continue
 
-        if not rule.rule.startswith(prefix):
-            continue
+        view_func = current_app.view_functions[rule.endpoint]
+
+        # dispatcher serves single rule for many versions
+        routes = view_func.iter_routes() \
+            if hasattr(view_func, 'iter_routes') else [(rule.rule, view_func)]
 
-        endpoint = current_app.view_functions[rule.endpoint]
+        for url, endpoint in routes:
+            if not url.startswith(prefix):
+                continue
 
-        methods = endpoint.methods \
-            if endpoint.methods else ["GET", "HEAD", "OPTIONS"]
+            methods = endpoint.methods \
+                if endpoint.methods else ["GET", "HEAD", "OPTIONS"]
 
-        key = "({}) {}".format(",".join(methods), rule.rule)
+            key = "({}) {}".format(",".join(methods), url)
 
-        func_list[key] = endpoint.short_documentation
+            func_list[key] = endpoint.short_documentation
 
     return func_list
+
+
+def parse_batch(payload, max_size):
+    """Checks that payload of batch is a list of at most max_size requests.
+    """
+    if not isinstance(payload, list):
+        raise exception.InvalidPayloadError(
+            "Batch expects json list of requests")
+
+    if len(payload) > max_size:
+        raise exception.InvalidPayloadError(
+            "Batch is limited to {} requests, got {}".format(
+                max_size, len(payload)))
+
+    return payload
+
+
+def get_batch_error(item):
+    """Returns reason why item of batch can't be run, None if it can.
+    """
+    if not isinstance(item, dict):
+        return "Request has to be an object with method, path and body"
+
+    path = item.get('path')
+
+    if not isinstance(path, str) or not path.startswith('/'):
+        return "Path of request has to start with /"
+
+    if str(item.get('method', 'GET')).upper() not in BATCH_METHODS:
+        return "Method {} is not allowed in batch".format(item.get('method'))
+
+    return None
+
+
+def call_wsgi(wsgi_app, environ):
+    """Calls WSGI app, returns status code, headers and whole body.
+    """
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        # pylint: disable=unused-argument
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+
+    result = wsgi_app(environ, start_response)
+
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+
+    return response['status'], response['headers'], body
+
+
+def run_sub_request(app, item, headers, batch_path):
+    """Runs single request of the batch through the whole app (middlewares,
+    routing, endpoint pipeline and error handlers).
+    """
+    error = get_batch_error(item)
+
+    if error is not None:
+        return {'status': 400, 'body': error}
+
+    builder = EnvironBuilder(
+        path=item['path'], method=str(item.get('method', 'GET')).upper(),
+        headers=headers, json=item.get('body'),
+        environ_base={BATCH_ENVIRON_KEY: True})
+
+    try:
+        environ = builder.get_environ()
+    finally:
+        builder.close()
+
+    # path is compared once decoded (ie. /%62atch/), Batch endpoint refuses
+    # to run within sub-request anyway
+    if environ['PATH_INFO'].rstrip('/') == batch_path.rstrip('/'):
+        return {'status': 400, 'body': "Batch can't contain another batch"}
+
+    status, response_headers, body = call_wsgi(app.wsgi_app, environ)
+
+    content_type = dict(
+        (name.lower(), value) for name, value in response_headers
+    ).get('content-type', '')
+
+    if body and 'json' in content_type:
+        body = json.loads(body)
+    else:
+        body = body.decode('utf8', 'replace')
+
+    return {'status': status, 'body': body}
+
+
+_batch_executor = None
+_batch_executor_lock = threading.Lock()
+
+# threads of the pool are marked, they never wait on the pool themselves
+_batch_thread = threading.local()
+
+
+def mark_batch_thread():
+    _batch_thread.is_worker = True
+
+
+def get_batch_executor(max_workers):
+    """Returns pool of threads that run batches in parallel, shared by all
+    batch requests, so their number is bounded.
+    """
+    global _batch_executor  # pylint: disable=global-statement
+
+    if _batch_executor is None:
+        with _batch_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = futures.ThreadPoolExecutor(
+                    max_workers=max_workers,
+                    thread_name_prefix='carp_api_batch',
+                    initializer=mark_batch_thread)
+
+    return _batch_executor
+
+
+def run_batch(app, items, request, max_workers=0):
+    """Runs requests of the batch, in parallel if max_workers is above one,
+    returns list of their statuses and bodies (in order of requests).
+
+    Headers of the batch request (ie. Authorization) are passed to every
+    request.
+    """
+    headers = [
+        (name, value) for name, value in request.headers.items()
+        if name.lower() not in BATCH_SKIPPED_HEADERS
+    ]
+
+    batch_path = request.path
+
+    def run(item):
+        return run_sub_request(app, item, headers, batch_path)
+
+    # waiting on the pool from its own thread could take all of its workers
+    if max_workers <= 1 or len(items) < 2 or \
+            getattr(_batch_thread, 'is_worker', False):
+        return [run(item) for item in items]
+
+    return list(get_batch_executor(max_workers).map(run, items))
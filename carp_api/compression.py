@@ -0,0 +1,222 @@
+"""Compression of responses, encoding is negotiated from Accept-Encoding.
+
+gzip and deflate come from standard library, br and zstd are used when
+`brotli` and `zstandard` packages are installed. Responses smaller than
+COMPRESSION_MIN_SIZE are sent as they are, streamed responses are compressed
+chunk by chunk (each chunk is flushed, client can decode them as they come).
+
+Endpoint opts out with `compress = False`. Response cache keeps compressed
+bodies per negotiated encoding, so cache hits are not compressed again.
+"""
+import functools
+import zlib
+
+import flask
+
+from simple_settings import settings
+from werkzeug.http import parse_accept_header
+
+
+# levels used when COMPRESSION_LEVELS does not say otherwise
+DEFAULT_LEVELS = {
+    'gzip': 6,
+    'deflate': 6,
+    'br': 4,
+    'zstd': 3,
+}
+
+# statuses that never carry a body
+NO_BODY_STATUSES = (204, 304)
+
+
+class ZlibCodec:
+    """gzip (wbits 31) and deflate (zlib format, wbits 15)."""
+    def __init__(self, name, wbits, level):
+        self.name = name
+        self.wbits = wbits
+        self.level = level
+
+    def compress(self, data):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, self.wbits)
+
+        return compressor.compress(data) + compressor.flush()
+
+    def compress_stream(self, chunks):
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, self.wbits)
+
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(
+                    zlib.Z_SYNC_FLUSH)
+
+        yield compressor.flush()
+
+
+class BrotliCodec:
+    name = 'br'
+
+    def __init__(self, level):
+        import brotli
+
+        self.brotli = brotli
+        self.level = level
+
+    def compress(self, data):
+        return self.brotli.compress(data, quality=self.level)
+
+    def compress_stream(self, chunks):
+        compressor = self.brotli.Compressor(quality=self.level)
+
+        for chunk in chunks:
+            if chunk:
+                yield compressor.process(chunk) + compressor.flush()
+
+        yield compressor.finish()
+
+
+class ZstdCodec:
+    name = 'zstd'
+
+    def __init__(self, level):
+        import zstandard
+
+        self.zstandard = zstandard
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def compress_stream(self, chunks):
+        compressor = self.compressor.compressobj()
+
+        for chunk in chunks:
+            if chunk:
+                yield compressor.compress(chunk) + compressor.flush(
+                    self.zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+        yield compressor.flush()
+
+
+def make_codec(name, level=None):
+    """Returns codec of given encoding or None if it's not available.
+    """
+    if name not in DEFAULT_LEVELS:
+        raise ValueError("Unknown compression {}".format(name))
+
+    level = DEFAULT_LEVELS[name] if level is None else level
+
+    try:
+        if name == 'gzip':
+            return ZlibCodec(name, 16 + zlib.MAX_WBITS, level)
+
+        if name == 'deflate':
+            return ZlibCodec(name, zlib.MAX_WBITS, level)
+
+        if name == 'br':
+            return BrotliCodec(level)
+
+        return ZstdCodec(level)
+    except ImportError:
+        return None
+
+
+class Compressor:
+    """Compresses responses with encodings (in order of preference of the
+    server) that are available.
+    """
+    def __init__(self, encodings, levels=None, min_size=0):
+        levels = levels or {}
+
+        self.codecs = {}
+
+        for name in encodings:
+            codec = make_codec(name, levels.get(name))
+
+            if codec is not None:
+                self.codecs[name] = codec
+
+        self.encodings = tuple(self.codecs)
+        self.min_size = min_size
+
+        self.negotiate = functools.lru_cache(maxsize=256)(self._negotiate)
+
+    def _negotiate(self, accept_encoding):
+        if not accept_encoding or not self.encodings:
+            return None
+
+        return parse_accept_header(accept_encoding).best_match(
+            self.encodings)
+
+    def get_encoding(self, request):
+        """Encoding that will be used for response to the request, None for
+        no compression.
+        """
+        return self.negotiate(request.headers.get('Accept-Encoding'))
+
+    def compress_response(self, response, encoding):
+        response.vary.add('Accept-Encoding')
+
+        if encoding is None or response.direct_passthrough or \
+                response.status_code in NO_BODY_STATUSES or \
+                response.status_code < 200 or \
+                'Content-Encoding' in response.headers:
+            return response
+
+        codec = self.codecs[encoding]
+
+        if response.is_streamed:
+            response.response = codec.compress_stream(response.response)
+        else:
+            data = response.get_data()
+
+            if len(data) < self.min_size:
+                return response
+
+            response.set_data(codec.compress(data))
+
+        response.headers['Content-Encoding'] = encoding
+
+        # etag was computed from uncompressed body, compressed one is just
+        # another representation of it
+        etag, is_weak = response.get_etag()
+
+        if etag is not None and not is_weak:
+            response.set_etag(etag, weak=True)
+
+        return response
+
+    def wrap(self, pipeline):
+        """Returns pipeline that compresses responses.
+        """
+        get_encoding = self.get_encoding
+        compress_response = self.compress_response
+
+        def compressed_pipeline(*args, **kwargs):
+            return compress_response(
+                pipeline(*args, **kwargs), get_encoding(flask.request))
+
+        return compressed_pipeline
+
+
+_compressor = None
+
+
+def get_compressor():
+    """Returns compressor configured by settings, created on first use.
+    """
+    global _compressor  # pylint: disable=global-statement
+
+    if _compressor is None:
+        _compressor = Compressor(
+            settings.COMPRESSION_ENCODINGS, settings.COMPRESSION_LEVELS,
+            settings.COMPRESSION_MIN_SIZE)
+
+    return _compressor
+
+
+def clear():
+    """Forgets compressor, ie. after compression settings were changed.
+    """
+    global _compressor  # pylint: disable=global-statement
+
+    _compressor = None
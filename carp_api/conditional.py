@@ -0,0 +1,111 @@
+"""Conditional GET, validators (ETag, Last-Modified) of responses and 304 Not
+Modified for clients that already have the current version.
+
+Endpoint opts in either way:
+
+ * `etag = True` - strong ETag is computed from serialized body, client that
+   sends matching If-None-Match gets 304 instead of the body (action still
+   runs, only transfer is saved)
+ * `get_etag` and/or `get_last_modified` hooks - they get url parameters of
+   the request (the same as action) and run before action, if validators
+   they return match the request, neither action nor serialization run
+
+If-None-Match takes precedence over If-Modified-Since (RFC 7232), comparison
+itself is done by werkzeug.
+"""
+import datetime
+
+import flask
+
+from werkzeug.http import is_resource_modified
+
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+def normalise_datetime(value):
+    """Last-Modified is compared with naive UTC dates parsed by werkzeug.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def is_conditional(environ):
+    return any(header in environ for header in CONDITIONAL_HEADERS)
+
+
+def make_not_modified(etag, last_modified):
+    response = flask.current_app.response_class(status=304)
+
+    if etag is not None:
+        response.set_etag(etag)
+
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    return response
+
+
+def wrap_etag(pipeline):
+    """Returns pipeline that adds ETag computed from body to successful
+    responses, it goes under response cache so ETag is cached as well.
+    """
+    def etag_pipeline(*args, **kwargs):
+        response = pipeline(*args, **kwargs)
+
+        if response.status_code == 200 and not response.is_streamed and \
+                'ETag' not in response.headers:
+            response.add_etag()
+
+        return response
+
+    return etag_pipeline
+
+
+def wrap(endpoint, pipeline):
+    """Returns pipeline of endpoint that adds validators given by hooks to
+    responses and answers conditional requests with 304.
+    """
+    get_etag = endpoint.get_etag if endpoint.is_overridden('get_etag') \
+        else None
+
+    get_last_modified = endpoint.get_last_modified if \
+        endpoint.is_overridden('get_last_modified') else None
+
+    add_cors = endpoint.add_cors
+
+    def conditional_pipeline(*args, **kwargs):
+        environ = flask.request.environ
+
+        etag = get_etag(*args, **kwargs) if get_etag is not None else None
+
+        last_modified = normalise_datetime(
+            get_last_modified(*args, **kwargs)) \
+            if get_last_modified is not None else None
+
+        if (etag is not None or last_modified is not None) and \
+                is_conditional(environ) and not is_resource_modified(
+                    environ, etag=etag, last_modified=last_modified):
+            return add_cors(make_not_modified(etag, last_modified))
+
+        response = pipeline(*args, **kwargs)
+
+        if response.status_code != 200:
+            return response
+
+        if etag is not None:
+            # compressed body is not byte for byte the one hook describes
+            response.set_etag(
+                etag, weak='Content-Encoding' in response.headers)
+
+        if last_modified is not None:
+            response.last_modified = last_modified
+
+        if is_conditional(environ):
+            response.make_conditional(environ)
+
+        return response
+
+    return conditional_pipeline
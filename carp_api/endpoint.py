@@ -1,7 +1,12 @@
+import asyncio
+import inspect
+
 import flask
-import python_schema
 
-from carp_api import exception, url, request_parser, misc_helper
+from carp_api import (
+    compression, conditional, event_loop, exception, url, payload_guard,
+    request_parser, request_stream, misc_helper, response_stream,
+    schema_helper, serializer)
 from carp_api.routing import helper
 
 
@@ -9,12 +14,30 @@ class BaseEndpoint:
     # if set to None, will default to GET, HEAD and OPTIONS
     methods = ['GET', 'OPTIONS']
 
-    # if set, given object will be constructed on entry
+    # if set, given object will be constructed on entry, for endpoints with
+    # stream_input it's applied to every record
     input_schema = None
 
-    # if set, given object will be returned
+    # if True, action gets iterator of records read from the body one by one
+    # (see carp_api.request_stream) instead of the whole payload
+    stream_input = False
+
+    # if set, given object will be returned, when action returns generator
+    # (see carp_api.response_stream) it's applied to every item
     output_schema = None
 
+    # if set to carp_api.cache.ResponseCache, successful responses of GET
+    # requests are cached
+    cache = None
+
+    # if False, responses are never compressed (see COMPRESSION_ENCODINGS)
+    compress = True
+
+    # if True, GET responses get strong ETag computed from the body and
+    # matching If-None-Match is answered with 304, see also get_etag and
+    # get_last_modified
+    etag = False
+
     # under which url this endpoint should be available ie user or user/details
     url = None
 
@@ -107,6 +130,19 @@ class BaseEndpoint:
         return url_instance.as_full_url(
             trailing_slash=self.trailing_slash, host=host)
 
+    @classmethod
+    def url_for(cls, version=None, **params):
+        """Returns url of the endpoint in given version, built from template
+        compiled at registration (see routing.reverse).
+        """
+        # app context stack is way cheaper than current_app proxy and links
+        # tend to be built in bulk
+        # pylint: disable=protected-access
+        url_builder = flask._app_ctx_stack.top.app.url_builder
+        # pylint: enable=protected-access
+
+        return url_builder.build(cls, version, **params)
+
     @property
     def request(self):
         return flask.request
@@ -119,29 +155,28 @@ class BaseEndpoint:
         """Convert payload into schema and then make it first argument on args
         list.
         """
-        instance = self.input_schema()  # pylint: disable=not-callable
+        if self.stream_input:
+            return [payload] + args, kwargs
 
-        try:
-            instance.loads(payload)
-        except python_schema.exception.PayloadError as err:
-            raise exception.PayloadError(err)
+        instance = schema_helper.get_loader(self.input_schema)(payload)
 
         return [instance] + args, kwargs
 
     def parse_output(self, payload):
-        instance = self.output_schema()  # pylint: disable=not-callable
-
-        try:
-            instance.loads(payload)
-
-        except python_schema.exception.PayloadError as err:
-            raise exception.ResponseContentError(err)
-
-        return instance.dumps()  # in future add ctx={'user': request.user}
+        # in future add ctx={'user': request.user}
+        return schema_helper.get_dumper(self.output_schema)(payload)
 
     def get_payload(self):
+        if self.stream_input:
+            return request_stream.make_stream(
+                self.request, schema_helper.get_loader(self.input_schema)
+                if self.input_schema else None)
+
         content_type = self.request.headers.get('Content-Type', '')
 
+        payload_guard.check_size(self.request.content_length)
+
+        # json is checked against the rest of limits by ApiRequest.get_json
         if 'application/json' in content_type:
             return self.request.get_json()
 
@@ -157,8 +192,10 @@ class BaseEndpoint:
         """Override if you want to manipulate result before it goes back to
         the user
         """
-        if not isinstance(response, flask.wrappers.Response):
-            response = flask.make_response(flask.jsonify(response))
+        if response_stream.is_stream(response):
+            response = response_stream.make_response(response, self.request)
+        elif not isinstance(response, flask.wrappers.Response):
+            response = serializer.make_response(response)
 
         response.status_code = self.http_code if self.http_code else \
             self.http_codes_map.get(self.request.method, 200)
@@ -167,6 +204,21 @@ class BaseEndpoint:
 
         return response
 
+    def get_etag(self, *args, **kwargs):
+        """Override to supply ETag of the resource cheaply (ie. version
+        column), gets url parameters as action does and runs before it, when
+        client has the same ETag action is not run at all.
+        """
+        # pylint: disable=unused-argument
+        return None
+
+    def get_last_modified(self, *args, **kwargs):
+        """Override to supply datetime of last modification of the resource,
+        works as get_etag.
+        """
+        # pylint: disable=unused-argument
+        return None
+
     def add_cors(self, response):
         """Method adds cors headers, override if you want to prevent it for
         your endpoint.
@@ -175,24 +227,240 @@ class BaseEndpoint:
 
         return response
 
-    def __call__(self, *args, **kwargs):
-        if self.request.method == 'OPTIONS':
-            result = flask.current_app.make_default_options_response()
+    def is_overridden(self, name):
+        """Tells if hook (method) of given name was overridden, either by
+        subclass or on the instance.
+        """
+        return name in self.__dict__ or \
+            getattr(type(self), name) is not getattr(BaseEndpoint, name)
+
+    def compile_pipeline(self, method):
+        """Compiles callable that handles request of given method, stages that
+        are not in use (hooks that were not overridden, missing schemas) are
+        left out and status code is resolved upfront.
+
+        Pipeline runs the same hooks, in the same order, as they were run
+        before pipelines were introduced, with one exception: when there is
+        no input_schema (and get_payload is not overridden) payload is not
+        parsed at all, as there is nothing that would consume it.
+
+        Any of action, pre_action and post_action can be defined with
+        `async def`, pipeline of such endpoint runs on event loop of the
+        worker thread (see carp_api.event_loop).
+        """
+        method = method.upper()
+
+        if method == 'OPTIONS':
+            def run_action(*args, **kwargs):
+                # pylint: disable=unused-argument
+                return flask.current_app.make_default_options_response()
+        else:
+            run_action = self._compile_action()
+
+        post_action = self.post_action if self.is_overridden('post_action') \
+            else self._compile_post_action(method)
+
+        if asyncio.iscoroutinefunction(run_action) or \
+                asyncio.iscoroutinefunction(post_action):
+            return self._compile_async_pipeline(run_action, post_action)
+
+        def pipeline(*args, **kwargs):
+            return post_action(run_action(*args, **kwargs))
+
+        return pipeline
+
+    @staticmethod
+    def _compile_async_pipeline(run_action, post_action):
+        run = event_loop.run
+        isawaitable = inspect.isawaitable
+
+        async def handle(*args, **kwargs):
+            result = run_action(*args, **kwargs)
+
+            if isawaitable(result):
+                result = await result
+
+            response = post_action(result)
+
+            if isawaitable(response):
+                response = await response
+
+            return response
+
+        def pipeline(*args, **kwargs):
+            return run(handle(*args, **kwargs))
+
+        return pipeline
+
+    def _compile_action(self):
+        pre_action = self.pre_action if self.is_overridden('pre_action') else \
+            None
+
+        # payload is always read, so malformed or oversized body is rejected
+        # even if nothing consumes it
+        get_payload = self.get_payload
+
+        parse_input = self.parse_input if self.input_schema or \
+            self.stream_input else None
+        parse_output = self.parse_output if self.output_schema else None
+
+        # loader and dumper are built upfront, dumper is called directly
+        # unless parse_output was overridden
+        if self.input_schema and not self.is_overridden('parse_input'):
+            schema_helper.get_loader(self.input_schema)
+
+        if parse_output is not None and \
+                not self.is_overridden('parse_output'):
+            parse_output = schema_helper.get_dumper(self.output_schema)
+
+        action = self.action
+
+        is_stream = response_stream.is_stream
+        map_items = response_stream.map_items
+
+        if asyncio.iscoroutinefunction(action) or \
+                asyncio.iscoroutinefunction(pre_action):
+            return self._compile_async_action(
+                pre_action, get_payload, parse_input, action, parse_output)
+
+        def run_action(*args, **kwargs):
+            if pre_action is not None:
+                pre_action()
+
+            payload = get_payload()
+
+            if parse_input is not None:
+                args, kwargs = parse_input(payload, list(args), kwargs)
+
+            result = action(*args, **kwargs)
+
+            if parse_output is not None:
+                result = map_items(parse_output, result) \
+                    if is_stream(result) else parse_output(result)
+
+            return result
+
+        return run_action
+
+    @staticmethod
+    def _compile_async_action(
+            pre_action, get_payload, parse_input, action, parse_output):
+        """Coroutine equivalent of compiled action, for endpoints with async
+        action or pre_action.
+        """
+        isawaitable = inspect.isawaitable
+        is_stream = response_stream.is_stream
+        map_items = response_stream.map_items
+
+        async def run_action(*args, **kwargs):
+            if pre_action is not None:
+                result = pre_action()
+
+                if isawaitable(result):
+                    await result
+
+            payload = get_payload()
+
+            if parse_input is not None:
+                args, kwargs = parse_input(payload, list(args), kwargs)
+
+            result = action(*args, **kwargs)
+
+            if isawaitable(result):
+                result = await result
+
+            if parse_output is not None:
+                result = map_items(parse_output, result) \
+                    if is_stream(result) else parse_output(result)
+
+            return result
+
+        return run_action
+
+    def _compile_post_action(self, method):
+        """Compiled equivalent of post_action.
+        """
+        status_code = self.http_code if self.http_code else \
+            self.http_codes_map.get(method, 200)
+
+        add_cors = self.add_cors if self.is_overridden('add_cors') else None
+
+        response_class = flask.wrappers.Response
+        make_json = serializer.make_response
+        cors_headers = misc_helper.cors_headers
+
+        is_stream = response_stream.is_stream
+        make_stream = response_stream.make_response
+
+        def post_action(response):
+            if not isinstance(response, response_class):
+                response = make_stream(response) if is_stream(response) \
+                    else make_json(response)
+
+            response.status_code = status_code
+
+            if add_cors is None:
+                response.headers.extend(cors_headers())
+            else:
+                response = add_cors(response)
+
+            return response
+
+        return post_action
+
+    def get_pipeline(self, method):
+        """Returns compiled pipeline for given method, compiling it on first
+        use.
+        """
+        pipelines = self.__dict__.setdefault('_pipelines', {})
+
+        try:
+            return pipelines[method]
+        except KeyError:
+            pass
+
+        pipeline = self.compile_pipeline(method)
+
+        is_conditional = method in ('GET', 'HEAD') and (
+            self.etag or self.is_overridden('get_etag') or
+            self.is_overridden('get_last_modified'))
+
+        if is_conditional and self.etag:
+            pipeline = conditional.wrap_etag(pipeline)
+
+        compressor = compression.get_compressor() if self.compress else None
+
+        if compressor is not None and compressor.encodings:
+            pipeline = compressor.wrap(pipeline)
         else:
-            self.pre_action()
+            compressor = None
 
-            payload = self.get_payload()
+        if self.cache is not None and method in self.cache.methods:
+            if self.cache.name is None:
+                self.cache.name = self.get_final_name()
 
-            if self.input_schema:
-                args, kwargs = self.parse_input(payload, args, kwargs)
+            # compressed bodies are cached per encoding
+            pipeline = self.cache.wrap(
+                pipeline, compressor.get_encoding if compressor else None)
 
-            # pylint: disable=assignment-from-no-return
-            result = self.action(*args, **kwargs)
-            # pylint: enable=assignment-from-no-return
+        if is_conditional:
+            pipeline = conditional.wrap(self, pipeline)
 
-            if self.output_schema:
-                result = self.parse_output(result)
+        pipelines[method] = pipeline
 
-        result = self.post_action(result)
+        return pipeline
 
-        return result
+    def compile_pipelines(self, methods=None):
+        """Compiles pipelines of given (default: all served) methods upfront,
+        done on registration.
+        """
+        if methods is None:
+            methods = set(self.methods or ('GET',)) | {'HEAD', 'OPTIONS'}
+
+        for method in methods:
+            self.get_pipeline(method.upper())
+
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self.get_pipeline(self.request.method)(*args, **kwargs)
@@ -0,0 +1,51 @@
+"""Event loops for endpoints with async hooks (action, pre_action,
+post_action defined with `async def`).
+
+Every worker thread gets its own loop, created on first use and kept for
+following requests. Coroutine of the request runs on the loop of the thread
+that handles the request, thus flask.request (and anything else bound to the
+thread) is available in async hooks, while the request itself may await many
+downstream calls at once, ie. with asyncio.gather.
+"""
+import asyncio
+import threading
+
+
+_local = threading.local()
+
+
+def get_event_loop():
+    """Returns event loop of current thread, creating it when needed.
+    """
+    loop = getattr(_local, 'loop', None)
+
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+
+        _local.loop = loop
+
+    return loop
+
+
+def run(coroutine):
+    """Runs coroutine to completion on event loop of current thread, returns
+    its result.
+    """
+    return get_event_loop().run_until_complete(coroutine)
+
+
+def close():
+    """Closes event loop of current thread (if there is one), next run creates
+    a new one.
+    """
+    loop = getattr(_local, 'loop', None)
+
+    if loop is None or loop.is_closed():
+        return
+
+    try:
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+        _local.loop = None
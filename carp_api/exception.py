@@ -28,6 +28,12 @@ class EndpointNotImplementedError(CarpApiException):
     """
 
 
+class UrlBuildError(CarpApiException):
+    """When url of endpoint can not be built, ie. endpoint is not present in
+    given version or value of url parameter is missing.
+    """
+
+
 class NotFoundError(CarpApiException):
     """Used exclusively when requested asset is not found.
     """
@@ -67,6 +73,11 @@ class ResponseError(BaseDataError):
     pass
 
 
+class ResponseContentError(ResponseError):
+    """When result of action does not fit output schema of endpoint.
+    """
+
+
 class BaseValidationError(CarpApiException):
     pass
 
@@ -1,3 +1,5 @@
+import functools
+
 from flask import current_app, request
 from simple_settings import settings
 
@@ -28,37 +30,46 @@ def make_error_code(attribute, schema):
 
 
 def cors_headers():
-    headers = {}
     if 'Origin' not in request.headers:
         current_app.logger.info('CORS. No Origin header')
+
+        return {}
+
+    origin = request.headers['Origin']
+    current_app.logger.info('CORS. Origin header: %s', origin)
+
+    valid_domains = settings.CORS_ALLOWED_HOSTS
+    current_app.logger.info('Valid domains %s', valid_domains)
+
+    # there is a handful of origins, checking each of them every time is a
+    # waste, result is remembered per origin and allowed hosts
+    headers = _get_cors_headers(origin, tuple(valid_domains))
+
+    if headers:
+        current_app.logger.info('CORS. Valid origin: %s', origin)
     else:
-        origin = request.headers['Origin']
-        current_app.logger.info('CORS. Origin header: %s', origin)
+        current_app.logger.info('CORS. Invalid origin: %s', origin)
 
-        valid_domains = settings.CORS_ALLOWED_HOSTS
-        current_app.logger.info('Valid domains %s', valid_domains)
+    return dict(headers)
 
-        for valid_domain in valid_domains:
-            current_app.logger.info(
-                'CORS. Origin %s in valid domains %s?',
-                origin, valid_domains
-            )
-            if valid_domain in origin:
-                headers['Access-Control-Allow-Origin'] = origin
-                headers['Access-Control-Allow-Credentials'] = \
-                    'true'
-                headers['Access-Control-Allow-Headers'] = (
+
+@functools.lru_cache(maxsize=256)
+def _get_cors_headers(origin, valid_domains):
+    for valid_domain in valid_domains:
+        if valid_domain in origin:
+            return (
+                ('Access-Control-Allow-Origin', origin),
+                ('Access-Control-Allow-Credentials', 'true'),
+                ('Access-Control-Allow-Headers', (
                     'Accept,'
                     'Accept-Language,'
                     'Authorization,'
                     'Content-Language,'
                     'Content-Type'
-                )
-                current_app.logger.info('CORS. Valid origin: %s', origin)
-                break
-        else:
-            current_app.logger.info('CORS. Invalid origin: %s', origin)
-    return headers
+                )),
+            )
+
+    return ()
 
 
 def build_tree(list_of_strings):
@@ -0,0 +1,149 @@
+"""Limits of payloads (PAYLOAD_MAX_* settings) that are checked before
+payload is parsed, limits of forms are checked by request_parser while keys
+of the form are parsed.
+"""
+import array
+import itertools
+import re
+
+from simple_settings import settings
+
+from carp_api import exception
+
+
+def check_size(size):
+    """Rejects payload of given size (in bytes, ie. Content-Length) if it's
+    over PAYLOAD_MAX_SIZE, before it's read.
+    """
+    max_size = settings.PAYLOAD_MAX_SIZE
+
+    if size is not None and max_size is not None and size > max_size:
+        raise exception.InvalidPayloadError(
+            'Payload has {} bytes, limit is {}'.format(size, max_size))
+
+
+class PayloadStream:
+    """Body that raises InvalidPayloadError once more than max_size bytes
+    are read from it, for bodies without Content-Length (chunked ones).
+    """
+    def __init__(self, stream, max_size):
+        self.stream = stream
+        self.max_size = max_size
+
+        self.size = 0
+
+    def _get_limit(self, size):
+        # one byte over the limit tells body that is too big from one that
+        # fits exactly
+        remaining = self.max_size - self.size + 1
+
+        return remaining if size is None or size < 0 else \
+            min(size, remaining)
+
+    def _check(self, data):
+        self.size += len(data)
+
+        if self.size > self.max_size:
+            raise exception.InvalidPayloadError(
+                'Payload has over {} bytes'.format(self.max_size))
+
+        return data
+
+    def read(self, size=-1):
+        if size is not None and size >= 0:
+            return self._check(self.stream.read(self._get_limit(size)))
+
+        # whole body, server may hand it over in parts
+        chunks = []
+
+        while True:
+            chunk = self._check(self.stream.read(self._get_limit(size)))
+
+            if not chunk:
+                return b''.join(chunks)
+
+            chunks.append(chunk)
+
+    def readline(self, size=-1):
+        return self._check(self.stream.readline(self._get_limit(size)))
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+
+def limit_stream(stream, content_length):
+    """Returns body of the request that can't be read over PAYLOAD_MAX_SIZE,
+    body with Content-Length over the limit is rejected right away.
+    """
+    max_size = settings.PAYLOAD_MAX_SIZE
+
+    if max_size is None:
+        return stream
+
+    check_size(content_length)
+
+    # body with Content-Length is already limited to it
+    return stream if content_length is not None else \
+        PayloadStream(stream, max_size)
+
+
+# strings of json document (with escaped characters), lone quote is a string
+# that is never closed
+JSON_STRING_PATTERN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|"')
+
+# all bytes but brackets and colons, they are removed to get structure of
+# the document
+JSON_NOT_STRUCTURE = bytes(set(range(256)) - set(b'[]{}:'))
+
+# opening bracket goes one level deeper (1), closing one goes back (-1 is 255
+# as signed byte)
+JSON_DEPTH_STEPS = bytes.maketrans(b'[{]}', b'\x01\x01\xff\xff')
+
+
+def check_json(data):
+    """Checks raw json document against limits of payloads (size, nesting,
+    number of keys and length of strings) before it's parsed.
+
+    Document is only scanned (with regular expressions and byte operations),
+    nothing is built out of it, so documents nested deep enough to exhaust
+    recursion of json parser are rejected right away.
+    """
+    check_size(len(data))
+
+    max_length = settings.PAYLOAD_MAX_STRING_LENGTH
+
+    # single pass over strings, it stops at the first one that is not closed,
+    # otherwise every quote after it would start scanning till the end again
+    for match in JSON_STRING_PATTERN.finditer(data):
+        # length in bytes of encoded string (with quotes), it's at least as
+        # big as the length of decoded one
+        length = match.end() - match.start()
+
+        if length == 1:
+            raise exception.InvalidPayloadError(
+                'Payload has string that is not closed')
+
+        if max_length is not None and length - 2 > max_length:
+            raise exception.InvalidPayloadError(
+                'Payload has string longer than {} characters'.format(
+                    max_length))
+
+    # every string is closed, removing them is linear as well
+    structure = JSON_STRING_PATTERN.sub(b'', data).translate(
+        None, JSON_NOT_STRUCTURE)
+
+    max_keys = settings.PAYLOAD_MAX_KEYS
+
+    if max_keys is not None and structure.count(b':') > max_keys:
+        raise exception.InvalidPayloadError(
+            'Payload has more than {} keys'.format(max_keys))
+
+    max_depth = settings.PAYLOAD_MAX_DEPTH
+
+    if max_depth is not None:
+        steps = array.array('b', structure.translate(
+            JSON_DEPTH_STEPS, b':'))
+
+        if max(itertools.accumulate(steps), default=0) > max_depth:
+            raise exception.InvalidPayloadError(
+                'Payload is nested deeper than {} levels'.format(max_depth))
@@ -1,5 +1,8 @@
+import functools
 import re
 
+from simple_settings import settings
+
 from carp_api import exception
 
 
@@ -40,13 +43,20 @@ def form_to_python(payload):
                 ['name': 'john', 'age': 23}
 
             but will cause exception in any other case
-    """
-    flat_tree = _flatten_payload(payload)
 
+    Payload is parsed in a single pass, every key is split into path (ie.
+    user[0].name => ('user', 0, 'name')) and its values are put straight into
+    the tree.
+    """
     baobab = {}
 
-    for structure, value in flat_tree:
-        _build_tree(baobab, structure, value)
+    get_path = get_key_parser()
+    check_values = _get_values_check()
+
+    for key, values in _iter_form(payload):
+        check_values(values, key)
+
+        _set_value(baobab, get_path(key), values)
 
     # while building lists, we use custom class Array, we need to convert them
     # back to standard python primitve
@@ -55,151 +65,296 @@ def form_to_python(payload):
     return baobab
 
 
-def _array_to_list(some_value):
-    if isinstance(some_value, Array):
-        return [
-            _array_to_list(sub_elm) for sub_elm in some_value.to_list()
-        ]
+# name[] appends to a list, name[12] puts value at given index
+KEY_PATTERN = re.compile(r'(\w+)\[(\d*)\]\Z')
 
-    if isinstance(some_value, dict):
-        for key, value in some_value.items():
-            some_value[key] = _array_to_list(value)
+# step of a path that appends to a list (name[])
+APPEND = None
 
-    return some_value
 
+MIXED_APPEND_ERROR = (
+    'It is impossible to mix append with objects, '
+    'please use explicit index. '
+    'Instead of user[].name do user[1].name')
 
-def _build_tree(construct, structure, value):
-    # ie. we have:
-    # ('user', 0, 'address', 2) => 'e16'
-    # ('user', 0, 'address', 1) => 'w1'
+EMPTY_ATTRIBUTE_ERROR = (
+    'Dot . is used to distinguish between object '
+    'and simple key, and has to be followed by '
+    'non-empty string. For example user.name means '
+    'object user with attribute name')
 
-    # ('name',) => 'zbig'
+# longer keys are parsed every time, they are not kept in the cache
+KEY_CACHE_MAX_KEY_LENGTH = 256
 
-    # ('user', 'name') => 'zbig'
-    # ('user', 'age') => '10'
 
-    if len(structure) == 1:
-        if structure[0] == -1:
-            if isinstance(value, list):
-                for sub_val in value:
-                    construct.append(sub_val)
-            else:
-                construct.append(value)
-        else:
-            construct[structure[0]] = value
+def parse_key(key):
+    """Splits key of the form into path, ie.:
 
-    else:
-        if structure[0] not in construct:
-            next_construct = Array() if isinstance(structure[1], int) else {}
-        else:
-            next_construct = construct[structure[0]]
+        user[0].name => ('user', 0, 'name')
+        user.tags[] => ('user', 'tags', APPEND)
+    """
+    path, error = _split_key(key)
 
-        construct[structure[0]] = _build_tree(
-            next_construct, structure[1:], value)
+    if error is not None:
+        raise exception.InvalidPayloadError(error)
 
-    return construct
+    return path
 
 
-class Array:
-    def __init__(self):
-        self.container = {}
+def _split_key(key):
+    # returns path or error, so invalid keys can be cached as well
+    max_length = settings.PAYLOAD_MAX_STRING_LENGTH
 
-    def __setitem__(self, key, value):
-        if not isinstance(key, int):
-            raise ValueError("Only number can be used as an index of Array")
+    if max_length is not None and len(key) > max_length:
+        return None, 'Key {}... is longer than {} characters'.format(
+            key[:32], max_length)
 
-        self.container[key] = value
+    if '.' in key and '[]' in key and not key.endswith('[]'):
+        return None, MIXED_APPEND_ERROR
 
-    def __getitem__(self, key):
-        return self.container[key]
+    max_index = settings.PAYLOAD_MAX_INDEX
+    max_depth = settings.PAYLOAD_MAX_DEPTH
 
-    def __contains__(self, key):
-        return key in self.container
+    path = []
 
-    def __len__(self):
-        return len(list(self.container.keys()))
+    for bit in key.split('.'):
+        if not bit:
+            return None, EMPTY_ATTRIBUTE_ERROR
 
-    def get_last_key(self):
-        keys = list(self.container.keys())
-        keys.sort()
+        match = KEY_PATTERN.match(bit)
 
-        return keys[-1] if keys else None
+        if match is None:
+            path.append(bit)
+        else:
+            name, idx = match.groups()
 
-    def to_list(self):
-        keys = list(self.container.keys())
-        keys.sort()
+            # length is checked first, huge numbers are not even converted
+            if idx and max_index is not None and (
+                    len(idx) > len(str(max_index)) or int(idx) > max_index):
+                return None, 'Index of {} is over {}'.format(key, max_index)
 
-        result = [self.container[key] for key in keys]
+            path.append(name)
+            path.append(int(idx) if idx else APPEND)
 
-        return result
+    if max_depth is not None and len(path) > max_depth:
+        return None, 'Key {} is nested deeper than {} levels'.format(
+            key, max_depth)
 
-    def append(self, value):
-        last_key = self.get_last_key()
+    return tuple(path), None
+
+
+def _iter_form(payload):
+    # yields keys and values of the form, up to PAYLOAD_MAX_KEYS of them
+    max_keys = settings.PAYLOAD_MAX_KEYS
+
+    items = payload.lists()
 
-        key = 0 if last_key is None else last_key + 1
+    if max_keys is None:
+        return items
 
-        self[key] = value
+    def iter_limited():
+        for count, item in enumerate(items, 1):
+            if count > max_keys:
+                raise exception.InvalidPayloadError(
+                    'Form has more than {} keys'.format(max_keys))
 
+            yield item
 
-def _flatten_payload(payload):
-    flat_tree = []
+    return iter_limited()
 
-    for key, value in payload.lists():
-        line = []
 
-        if '.' in key and '[]' in key and not key.endswith('[]'):
+def _get_values_check():
+    max_length = settings.PAYLOAD_MAX_STRING_LENGTH
+
+    def check_values(values, key):
+        if max(map(len, values)) > max_length:
             raise exception.InvalidPayloadError(
-                'It is impossible to mix append with objects, '
-                'please use explicit index. '
-                'Instead of user[].name do user[1].name')
-
-        if '.' in key:
-            bits = key.split('.')
-
-            for bit in bits:
-                if bit[-1] == '':
-                    raise exception.InvalidPayloadError(
-                        'Dot . is used to distinguish between object '
-                        'and simple key, and has to be followed by '
-                        'non-empty string. For example user.name means '
-                        'object user with attribute name')
-
-                line += _add_key(bit)
+                'Value of {} is longer than {} characters'.format(
+                    key, max_length))
+
+    return check_values if max_length is not None else \
+        lambda values, key: None
+
+
+class KeyParser:
+    """parse_key with results (paths and errors alike) kept in LRU cache
+    shared by all requests, clients tend to send the same keys every time.
+
+    Cache is bounded by number of entries and by length of cached keys, so
+    random keys can't grow it.
+    """
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+
+        self._cached_split = functools.lru_cache(maxsize=max_entries)(
+            _split_key)
+
+    def __call__(self, key):
+        if len(key) > KEY_CACHE_MAX_KEY_LENGTH:
+            path, error = _split_key(key)
+        else:
+            path, error = self._cached_split(key)
+
+        if error is not None:
+            raise exception.InvalidPayloadError(error)
+
+        return path
+
+    def get_stats(self):
+        info = self._cached_split.cache_info()
+
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'entries': info.currsize,
+            'max_entries': self.max_entries,
+        }
+
+    def cache_clear(self):
+        self._cached_split.cache_clear()
+
+
+_key_parser = None
+
+
+def get_key_parser():
+    """Returns function that turns key of the form into path, cached one if
+    FORM_KEY_CACHE_SIZE is set.
+    """
+    global _key_parser  # pylint: disable=global-statement
+
+    if _key_parser is None:
+        if settings.FORM_KEY_CACHE_SIZE:
+            _key_parser = KeyParser(settings.FORM_KEY_CACHE_SIZE)
         else:
-            line += _add_key(key)
+            _key_parser = parse_key
 
-        if line[-1] == 1:
-            for current_val in value:
-                flat_tree.append(
-                    (tuple(line), current_val))
+    return _key_parser
+
+
+def get_stats():
+    """Hits and misses of cache of form keys, None if it's disabled.
+    """
+    key_parser = get_key_parser()
+
+    return key_parser.get_stats() if isinstance(
+        key_parser, KeyParser) else None
+
+
+def clear():
+    """Forgets cache of form keys, ie. after FORM_KEY_CACHE_SIZE was changed.
+    """
+    global _key_parser  # pylint: disable=global-statement
+
+    _key_parser = None
+
+
+def _raise_mixed():
+    raise exception.InvalidPayloadError(
+        'Unable to parse payload, looks like object is a mix of an array '
+        'and attributes. Ie. user.name=Dan&user[0].name=Stef')
+
+
+def _check_step(construct, step):
+    # arrays are indexed with numbers, objects with names
+    if isinstance(construct, Array) != (
+            step is APPEND or isinstance(step, int)):
+        _raise_mixed()
+
+
+def _set_value(construct, path, values):
+    for step, next_step in zip(path, path[1:]):
+        _check_step(construct, step)
+
+        container_class = Array if next_step is APPEND or \
+            isinstance(next_step, int) else dict
+
+        if step is APPEND:
+            next_construct = container_class()
+            construct.append(next_construct)
         else:
-            flat_tree.append(
-                (tuple(line), value[0] if len(value) == 1 else value))
+            next_construct = construct.get(step)
 
-    # at this point all lists should be converted into flat list, if we sort
-    # them end effect will be safe to build a tree from
+            if next_construct is None:
+                next_construct = construct[step] = container_class()
+            elif not isinstance(next_construct, container_class):
+                _raise_mixed()
 
-    try:
-        flat_tree.sort()
-    except TypeError:
-        raise exception.InvalidPayloadError(
-            'Unable to parse payload, looks like object is a mix of an array '
-            'and attributes. Ie. user.name=Dan&user[0].name=Stef')
+        construct = next_construct
 
-    return flat_tree
+    step = path[-1]
 
+    _check_step(construct, step)
+
+    if step is APPEND:
+        construct.extend(values)
+    elif isinstance(construct.get(step), (dict, Array)):
+        _raise_mixed()
+    else:
+        construct[step] = values[0] if len(values) == 1 else list(values)
 
-def _add_key(key):
-    line = []
-    pattern = r'(\w+)\[(\d)*\]'
 
-    match = re.match(pattern, key)
+def _array_to_list(some_value):
+    if isinstance(some_value, Array):
+        return [
+            _array_to_list(sub_elm) for sub_elm in some_value.to_list()
+        ]
+
+    if isinstance(some_value, dict):
+        for key, value in some_value.items():
+            some_value[key] = _array_to_list(value)
 
-    key, idx = match.groups() if match else (key, 'NoMatch')
+    return some_value
 
-    line.append(key)
 
-    if idx != 'NoMatch':
-        line.append(-1 if idx is None else int(idx))
+class Array:
+    """List built from the form, values with explicit index (name[3]) are
+    kept in order of their indices, appended ones (name[]) follow them.
+    """
+    def __init__(self):
+        self.container = {}
+        self.appended = []
+        self.last_key = None
+
+    def __setitem__(self, key, value):
+        if not isinstance(key, int) or key < 0:
+            raise ValueError(
+                "Only non-negative number can be used as an index of Array")
+
+        self.container[key] = value
+
+        if self.last_key is None or key > self.last_key:
+            self.last_key = key
+
+    def __getitem__(self, key):
+        return self.container[key]
+
+    def __contains__(self, key):
+        return key in self.container
+
+    def __len__(self):
+        return len(self.container) + len(self.appended)
+
+    def get(self, key, default=None):
+        return self.container.get(key, default)
+
+    def get_last_key(self):
+        return self.last_key
+
+    def to_list(self):
+        keys = self.container.keys()
+
+        # indices are usually 0..n-1, no need to sort them then
+        if self.last_key is not None and \
+                self.last_key + 1 != len(self.container):
+            keys = sorted(keys)
+        else:
+            keys = range(len(self.container))
+
+        return [self.container[key] for key in keys] + self.appended
+
+    def append(self, value):
+        self.appended.append(value)
 
-    return line
+    def extend(self, values):
+        self.appended.extend(values)
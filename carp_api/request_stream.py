@@ -0,0 +1,256 @@
+"""Streaming of request bodies with many records, ie. bulk imports:
+
+    class ImportUsers(BaseEndpoint):
+        url = 'import'
+
+        methods = ['POST']
+
+        stream_input = True
+
+        input_schema = UserSchema  # schema of a single record
+
+        def action(self, records):
+            for user in records:
+                save_user(user)
+
+            return {'errors': records.errors}
+
+Records are read from the body and decoded (and passed through input_schema)
+one at a time, while action iterates over them, so memory does not grow with
+size of the body. Body is NDJSON (one record per line) when it's sent as
+`application/x-ndjson`, JSON array otherwise.
+
+Records that can't be decoded (NDJSON only, array can't be resumed after
+broken record) or loaded by input_schema are skipped and kept in `errors`
+of the stream, up to REQUEST_STREAM_MAX_ERRORS of them, next one stops the
+stream with InvalidPayloadError. Limits of payloads (PAYLOAD_MAX_*) apply
+to every record instead of the whole body.
+"""
+import codecs
+import json
+
+from simple_settings import settings
+from werkzeug.wsgi import get_input_stream
+
+from carp_api import exception, payload_guard
+
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# body is read in chunks of that many bytes
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = ' \t\n\r'
+
+
+def iter_chunks(stream, chunk_size=CHUNK_SIZE):
+    while True:
+        chunk = stream.read(chunk_size)
+
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def check_record_size(size):
+    max_size = settings.PAYLOAD_MAX_SIZE
+
+    if max_size is not None and size > max_size:
+        raise exception.InvalidPayloadError(
+            'Record has over {} bytes'.format(max_size))
+
+
+def decode_ndjson(chunks):
+    """Yields (record, error) for every line, error is a message for line
+    that can't be decoded.
+    """
+    buffer = b''
+
+    for chunk in chunks:
+        lines = (buffer + chunk).split(b'\n')
+
+        buffer = lines.pop()
+
+        # buffer holds incomplete line, it can't outgrow a record
+        check_record_size(len(buffer))
+
+        for line in lines:
+            if line.strip():
+                yield decode_line(line)
+
+    if buffer.strip():
+        yield decode_line(buffer)
+
+
+def decode_line(line):
+    try:
+        payload_guard.check_json(line)
+
+        return json.loads(line), None
+    except exception.InvalidPayloadError as err:
+        return None, str(err)
+    except ValueError as err:
+        return None, 'Invalid json: {}'.format(err)
+
+
+class JsonArrayDecoder:
+    """Decodes top-level JSON array record by record, text of the body is
+    kept only from the start of record that is not decoded yet.
+    """
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+
+        self.buffer = ''
+        self.position = 0
+        self.finished = False
+
+    def read(self, size=0):
+        # appends to the buffer at least size bytes (or one chunk), doubling
+        # the read for long records keeps retrying their decoding linear
+        read = 0
+
+        while not self.finished and (read == 0 or read < size):
+            chunk = next(self.chunks, None)
+
+            if chunk is None:
+                self.finished = True
+                self.buffer += self.text_decoder.decode(b'', final=True)
+            else:
+                read += len(chunk)
+                self.buffer = self.buffer[self.position:] + \
+                    self.text_decoder.decode(chunk)
+                self.position = 0
+
+        return read > 0
+
+    def skip_whitespace(self):
+        # returns next significant character (None at the end of body)
+        while True:
+            while self.position < len(self.buffer) and \
+                    self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+
+            if not self.read():
+                return None
+
+    def expect(self, characters):
+        character = self.skip_whitespace()
+
+        if character is None or character not in characters:
+            raise exception.InvalidPayloadError(
+                'Payload has to be a json array of records, expected {} '
+                'got {}'.format(' or '.join(characters), character or 'end'))
+
+        self.position += 1
+
+        return character
+
+    def decode_record(self):
+        self.skip_whitespace()
+
+        while True:
+            pending = len(self.buffer) - self.position
+
+            try:
+                record, end = self.decoder.raw_decode(
+                    self.buffer, self.position)
+            except RecursionError:
+                raise exception.InvalidPayloadError(
+                    'Record is nested too deep')
+            except ValueError:
+                end = None
+
+            # record is decoded if something follows it, number at the end
+            # of the buffer may still continue in the next chunk
+            if end is not None and (
+                    end < len(self.buffer) or self.finished):
+                text = self.buffer[self.position:end]
+                self.position = end
+
+                payload_guard.check_json(text.encode('utf8'))
+
+                return record
+
+            # whole buffer is (the beginning of) a single record
+            check_record_size(pending)
+
+            if not self.read(pending) and end is None:
+                raise exception.InvalidPayloadError(
+                    'Payload has invalid or incomplete json record')
+
+    def __iter__(self):
+        self.expect('[')
+
+        if self.skip_whitespace() == ']':
+            self.position += 1
+        else:
+            while True:
+                yield self.decode_record(), None
+
+                if self.expect(',]') == ']':
+                    break
+
+        if self.skip_whitespace() is not None:
+            raise exception.InvalidPayloadError(
+                'Payload has data after json array of records')
+
+
+class RecordStream:
+    """Iterator of records decoded from the body (loaded by input schema if
+    given), records that failed are skipped and kept in `errors` as tuples of
+    their index and message.
+    """
+    def __init__(self, records, load=None, max_errors=0):
+        self.records = enumerate(records)
+        self.load = load
+        self.max_errors = max_errors
+
+        self.errors = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            index, (record, error) = next(self.records)
+
+            if error is None and self.load is not None:
+                try:
+                    record = self.load(record)
+                except exception.BasePayloadError as err:
+                    error = str(err)
+
+            if error is None:
+                return record
+
+            self.errors.append((index, error))
+
+            if len(self.errors) > self.max_errors:
+                raise exception.InvalidPayloadError(
+                    'Payload has over {} invalid records, last one: {}'.format(
+                        self.max_errors, error))
+
+
+def make_stream(request, load=None, max_errors=None):
+    """Returns RecordStream reading body of the request, format is picked by
+    Content-Type.
+    """
+    max_errors = settings.REQUEST_STREAM_MAX_ERRORS if max_errors is None \
+        else max_errors
+
+    # body is not limited by PAYLOAD_MAX_SIZE (as request.stream is), limits
+    # apply to every record instead
+    chunks = iter_chunks(get_input_stream(request.environ))
+
+    if request.mimetype == NDJSON_MIMETYPE:
+        records = decode_ndjson(chunks)
+    else:
+        records = iter(JsonArrayDecoder(chunks))
+
+    return RecordStream(records, load, max_errors)
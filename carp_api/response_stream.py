@@ -0,0 +1,117 @@
+"""Streaming of results that are generators (or any other iterators) instead
+of lists, ie. exports of many rows:
+
+    class ExportUsers(BaseEndpoint):
+        url = 'export'
+
+        output_schema = UserSchema  # schema of a single item
+
+        def action(self):
+            for user in query_users():
+                yield user
+
+Items are encoded (and passed through output_schema) one at a time and sent
+in chunks, so memory used by the response does not grow with number of
+items. Format is picked from Accept header, JSON array on default, NDJSON
+(one item per line) when client asks for `application/x-ndjson`.
+
+NOTE: status code is sent before the first item is produced, error raised by
+generator can't change it any more, it only cuts the response short.
+"""
+import collections.abc
+
+import flask
+
+from carp_api import serializer
+
+
+JSON_MIMETYPE = 'application/json'
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+# encoded items are buffered until chunk reaches that many bytes
+CHUNK_SIZE = 16 * 1024
+
+
+def is_stream(result):
+    """Tells if result of action is to be streamed, iterators are, lists,
+    dicts, strings and responses are not.
+    """
+    return isinstance(result, collections.abc.Iterator)
+
+
+def map_items(func, items):
+    """Applies func (ie. dumper of output schema) lazily to every item.
+    """
+    for item in items:
+        yield func(item)
+
+
+def encode_json_array(items, dumps, chunk_size=CHUNK_SIZE):
+    buffer = [b'[']
+    size = 1
+    separator = b''
+
+    for item in items:
+        encoded = dumps(item)
+
+        buffer.append(separator)
+        buffer.append(encoded)
+
+        separator = b','
+        size += len(encoded) + 1
+
+        if size >= chunk_size:
+            yield b''.join(buffer)
+
+            buffer = []
+            size = 0
+
+    buffer.append(b']\n')
+
+    yield b''.join(buffer)
+
+
+def encode_ndjson(items, dumps, chunk_size=CHUNK_SIZE):
+    buffer = []
+    size = 0
+
+    for item in items:
+        encoded = dumps(item)
+
+        buffer.append(encoded)
+        buffer.append(b'\n')
+
+        size += len(encoded) + 1
+
+        if size >= chunk_size:
+            yield b''.join(buffer)
+
+            buffer = []
+            size = 0
+
+    if buffer:
+        yield b''.join(buffer)
+
+
+def get_mimetype(request):
+    """Picks format of stream from Accept header of the request.
+    """
+    return request.accept_mimetypes.best_match(
+        (JSON_MIMETYPE, NDJSON_MIMETYPE), default=JSON_MIMETYPE)
+
+
+def make_response(items, request=None):
+    """Builds streamed response out of iterator of items, request context is
+    kept for the time of streaming.
+    """
+    request = request if request is not None else flask.request
+
+    mimetype = get_mimetype(request)
+
+    encode = encode_ndjson if mimetype == NDJSON_MIMETYPE else \
+        encode_json_array
+
+    body = encode(items, serializer.get_dumps())
+
+    return flask.Response(flask.stream_with_context(body), mimetype=mimetype)
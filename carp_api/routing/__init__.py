@@ -1,3 +1,12 @@
 from . import helper  # NOQA
 from . import component  # NOQA
+from . import resolver  # NOQA
+from . import lazy  # NOQA
+from . import compiler  # NOQA
+from . import table  # NOQA
+from . import reverse  # NOQA
+from . import artifact  # NOQA
 from . import router  # NOQA
+from . import dispatcher  # NOQA
+from . import matcher  # NOQA
+from . import materializer  # NOQA
@@ -0,0 +1,194 @@
+"""Routing artifact is final routing serialised to a file, so that workers can
+skip propagation, url conflict detection and url building on boot.
+
+Artifact keeps, for each route, version, namespace, endpoint name, dotted
+path of endpoint class, final url, methods and (for lazy endpoints) metadata
+declared at registration. Alongside there is a fingerprint (routing settings,
+carp_api version and size/modification time of source files that routing came
+from), if any of it has changed artifact is considered stale and routing has
+to be built from scratch.
+"""
+import json
+import os
+import pathlib
+import sys
+
+from carp_api import exception
+
+from . import helper, lazy
+
+
+FORMAT = 2
+
+# settings that influence what ends up in the final routing
+SETTINGS_KEYS = (
+    'CARP_API_ROUTING',
+    'ROUTING_ADD_COMMON',
+    'ROUTING_ADD_SHUTDOWN_ROUTE',
+    'ROUTING_ADD_BATCH_ROUTE',
+)
+
+
+def get_carp_api_version():
+    file_path = pathlib.PosixPath(__file__).parent.parent / 'VERSION'
+
+    with open(file_path) as fpl:
+        return fpl.readlines()[0].strip()
+
+
+def get_dotted_path(endpoint):
+    if isinstance(endpoint, lazy.LazyEndpoint):
+        return endpoint.path
+
+    cls = endpoint if isinstance(endpoint, type) else type(endpoint)
+
+    if '<locals>' in cls.__qualname__:
+        raise exception.RoutingConfigurationError(
+            "Endpoint {} is defined inside of a function and can't be "
+            "imported from routing artifact".format(cls.__qualname__))
+
+    return '{}:{}'.format(cls.__module__, cls.__qualname__)
+
+
+def _get_module_file(module_name):
+    module = sys.modules.get(module_name)
+
+    file_path = getattr(module, '__file__', None)
+
+    return os.path.abspath(file_path) if file_path else None
+
+
+def get_source_files(settings, routing_table):
+    """Source files that routing depends on: modules defining endpoints,
+    routing module with every module of its package that got imported and
+    settings module.
+    """
+    module_names = set(
+        type(endpoint).__module__ for _, _, _, _, endpoint in routing_table
+        # lazy endpoints are not imported at build time
+        if not isinstance(endpoint, lazy.LazyEndpoint)
+    )
+
+    if settings.CARP_API_ROUTING:
+        package = settings.CARP_API_ROUTING.split('.')[0]
+
+        module_names.update(
+            name for name in list(sys.modules)
+            if name == package or name.startswith(package + '.')
+        )
+
+    if os.environ.get('SIMPLE_SETTINGS'):
+        module_names.add(os.environ['SIMPLE_SETTINGS'])
+
+    files = set(_get_module_file(name) for name in module_names)
+
+    files.discard(None)
+
+    return sorted(files)
+
+
+def get_fingerprint(settings, source_files):
+    sources = {}
+
+    for file_path in source_files:
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+
+        sources[file_path] = [stat.st_mtime_ns, stat.st_size]
+
+    return {
+        'format': FORMAT,
+        'carp_api': get_carp_api_version(),
+        'settings': {key: getattr(settings, key) for key in SETTINGS_KEYS},
+        'sources': sources,
+    }
+
+
+def dump(file_path, settings, routing_table):
+    """Writes routing table into artifact file.
+    """
+    routes = []
+
+    for version, namespace, name, url, endpoint in routing_table:
+        routes.append([
+            version, namespace, name, get_dotted_path(endpoint), url,
+            list(endpoint.methods or ()),
+            endpoint.get_metadata()
+            if isinstance(endpoint, lazy.LazyEndpoint) else None,
+        ])
+
+    data = get_fingerprint(
+        settings, get_source_files(settings, routing_table))
+
+    data['routes'] = routes
+
+    tmp_path = '{}.tmp'.format(file_path)
+
+    with open(tmp_path, 'w') as fpl:
+        json.dump(data, fpl, indent=1)
+
+    # workers may be reading artifact at the same time
+    os.replace(tmp_path, file_path)
+
+    return data
+
+
+def read(file_path, settings):
+    """Returns content of the artifact or None if it's missing or stale.
+    """
+    try:
+        with open(file_path) as fpl:
+            data = json.load(fpl)
+    except (OSError, ValueError):
+        return None
+
+    if data.get('format') != FORMAT:
+        return None
+
+    expected = get_fingerprint(settings, list(data.get('sources', ())))
+
+    if expected is None:
+        return None
+
+    for key in ('carp_api', 'settings', 'sources'):
+        if data.get(key) != expected[key]:
+            return None
+
+    return data
+
+
+def load(file_path, settings, routing_table, add=None):
+    """Loads routes from the artifact into (empty) routing table, returns
+    False if artifact is missing or stale.
+
+    Optionally routes can be passed to `add` (with the same signature as
+    RoutingTable.add) instead.
+    """
+    add = add if add else routing_table.add
+
+    data = read(file_path, settings)
+
+    if data is None:
+        return False
+
+    # one lazy endpoint per declaration, so it's loaded once
+    lazy_endpoints = {}
+
+    for version, namespace, name, dotted_path, url, _, metadata in \
+            data['routes']:
+        if metadata is None:
+            endpoint = helper.import_dotted_path(dotted_path)
+        else:
+            key = (dotted_path, json.dumps(metadata, sort_keys=True))
+
+            if key not in lazy_endpoints:
+                lazy_endpoints[key] = lazy.LazyEndpoint(
+                    dotted_path, **metadata)
+
+            endpoint = lazy_endpoints[key]
+
+        add(version, namespace, name, endpoint, url=url)
+
+    return True
@@ -0,0 +1,77 @@
+from carp_api.routing import component
+
+
+class RoutingCompiler:
+    """Compiles final routing out of versions enabled on router.
+
+    Final version depends only on its own enabled namespaces and final
+    version that precedes it, thus compiler remembers compiled versions and
+    when router changes, only versions from the earliest changed one onwards
+    are recomputed.
+
+    Namespaces that did not change between versions (nothing new enabled and
+    every endpoint propagates) are shared instead of copied, so compiling
+    version costs roughly number of its namespaces plus number of endpoints
+    enabled in it, not number of all endpoints available in it.
+    """
+    def __init__(self, versions):
+        self.versions = versions
+
+        self._compiled = []
+        self._final_routing = None
+
+    def invalidate(self, version=None):
+        """Marks given version (and all following it) as requiring
+        compilation, if version is None whole routing is recompiled.
+        """
+        idx = self.versions.index(version) if version is not None else 0
+
+        del self._compiled[idx:]
+
+        self._final_routing = None
+
+    def compile(self):
+        """Returns final routing (component.VersionList), treat it as
+        read-only as parts of it are shared between versions and calls.
+        """
+        if self._final_routing is not None:
+            return self._final_routing
+
+        for idx in range(len(self._compiled), len(self.versions)):
+            previous_version = self._compiled[idx - 1] if idx else \
+                component.Version()
+
+            self._compiled.append(
+                self.compile_version(previous_version, self.versions[idx]))
+
+        self._final_routing = component.VersionList(self._compiled)
+
+        return self._final_routing
+
+    @staticmethod
+    def compile_version(previous_version, version):
+        """Builds final version out of final previous version and enabled
+        version.
+        """
+        current_version = component.Version(version)
+
+        # namespaces existing only in old version, they are propagated
+        for name in previous_version - version:
+            current_version.add(
+                name, previous_version.get(name).propagated())
+
+        # namespaces existing in new version (old one may have them too),
+        # new endpoints take precedence over propagated ones
+        for enabled in version:
+            endpoints = dict(enabled.endpoints)
+
+            if previous_version.has(enabled.name):
+                propagated = previous_version.get(enabled.name).propagated()
+
+                for name, endpoint in propagated.endpoints.items():
+                    endpoints.setdefault(name, endpoint)
+
+            current_version.add(
+                enabled.name, component.Namespace(enabled.name, endpoints))
+
+        return current_version
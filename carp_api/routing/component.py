@@ -1,12 +1,15 @@
+import bisect
+
 from carp_api import exception
 
 from . import helper
 
 
 class Namespace:
-    def __init__(self, name):
+    def __init__(self, name, endpoints=None):
         self.name = name
-        self._endpoints = {}
+        # dictionary of endpoints by their names, trusted to be valid
+        self._endpoints = endpoints if endpoints is not None else {}
 
     def add(self, endpoints):
         for endpoint in endpoints:
@@ -39,6 +42,27 @@ class Namespace:
     def as_list(self):
         return list(self.endpoints.values())
 
+    def propagated(self):
+        """Returns namespace with endpoints that move to next version, if
+        all of them do, namespace itself is returned.
+
+        NOTE: result is cached, use only on namespaces that are not going to
+        change anymore (ie. ones that are part of final routing).
+        """
+        if getattr(self, '_propagated', None) is None:
+            endpoints = [
+                endpoint for endpoint in self._endpoints.values()
+                if endpoint.propagate is True
+            ]
+
+            if len(endpoints) == len(self._endpoints):
+                self._propagated = self
+            else:
+                self._propagated = Namespace(self.name)
+                self._propagated.add(endpoints)
+
+        return self._propagated
+
 
 class Version:
     def __init__(self, version=None):
@@ -47,7 +71,6 @@ class Version:
         self.value = version.value if isinstance(version, Version) else \
             helper.normalise_version(version)
         self._container = {}
-        self._index = 0
 
     def __assert_same_type(self, other):
         if not isinstance(other, Version):
@@ -72,17 +95,17 @@ class Version:
     def __ne__(self, other):
         self.__assert_same_type(other)
 
-        return self.value == other.value
+        return self.value != other.value
 
     def __gt__(self, other):
         self.__assert_same_type(other)
 
-        return self.value == other.value
+        return self.value > other.value
 
     def __ge__(self, other):
         self.__assert_same_type(other)
 
-        return self.value == other.value
+        return self.value >= other.value
 
     def __str__(self):
         return f"<Version value={self.value}>"
@@ -94,17 +117,7 @@ class Version:
         return len(self._container)
 
     def __iter__(self):
-        self._index = 0
-
-        return self
-
-    def __next__(self):
-        self._index += 1
-
-        if self._index > len(self):
-            raise StopIteration
-
-        return list(self._container.values())[self._index - 1]
+        return iter(self._container.values())
 
     def as_str(self):
         return '.'.join([
@@ -114,13 +127,17 @@ class Version:
     def has(self, name):
         return name in self._container
 
-    def add(self, name):
+    def add(self, name, namespace=None):
+        """Adds namespace of given name, if namespace instance is provided
+        it's used as it is (allowing versions to share namespaces).
+        """
         if self.has(name):
             raise exception.RoutingConfigurationError(
                 "Namespace already present on version"
             )
 
-        self._container[name] = Namespace(name)
+        self._container[name] = namespace if namespace is not None else \
+            Namespace(name)
 
     def get(self, name):
         if not self.has(name):
@@ -152,56 +169,85 @@ class Version:
 
 
 class VersionList:
-    def __init__(self):
+    """Sorted list of versions.
+
+    Versions are kept in order at all times, alongside of them there is list
+    of their values (used for bisecting) and index of value to version, thus
+    lookups do not need to scan the whole list.
+    """
+    def __init__(self, versions=None):
         self._versions = []
-        self._index = 0
+        self._keys = []
+        self._lookup = {}
+
+        for version in versions or ():
+            self.append(version)
 
     def get_or_create_version(self, version):
-        version = Version(version)
+        value = self._get_value(version)
 
-        if version not in self:
-            self.append(version)
+        if value not in self._lookup:
+            self.append(Version(value))
 
-        return self.get(version)
+        return self._lookup[value]
 
     def append(self, version):
-        self._versions.append(Version(version))
-        self._versions.sort()
+        """Adds version to the list (in order), if given version is already
+        instance of Version, it's added as it is (otherwise fresh Version is
+        created).
+        """
+        version = version if isinstance(version, Version) else \
+            Version(version)
+
+        if version.value in self._lookup:
+            raise exception.RoutingConfigurationError(
+                f"{version} is already in list")
+
+        idx = bisect.bisect(self._keys, version.value)
+
+        self._keys.insert(idx, version.value)
+        self._versions.insert(idx, version)
+        self._lookup[version.value] = version
 
     def get(self, searched_version):
-        searched_version = Version(searched_version)
+        value = self._get_value(searched_version)
 
-        idx = self.index(searched_version)
+        if value not in self._lookup:
+            raise ValueError(f'{Version(value)} is not in list')
 
-        return self[idx]
+        return self._lookup[value]
 
     def index(self, searched_version):
-        searched_version = Version(searched_version)
+        value = self._get_value(searched_version)
 
-        for idx, version in enumerate(self):
-            if searched_version == version:
-                return idx
+        if value not in self._lookup:
+            raise ValueError(f'{Version(value)} is not in list')
 
-        raise ValueError(f'{searched_version} is not in list')
+        return bisect.bisect_left(self._keys, value)
 
-    def __iter__(self):
-        self._index = 0
+    def floor(self, searched_version):
+        """Returns the highest version that is lower or equal to searched one
+        or None if there is no such version.
+        """
+        value = self._get_value(searched_version)
 
-        return self
+        idx = bisect.bisect_right(self._keys, value)
 
-    def __next__(self):
-        self._index += 1
+        return self._versions[idx - 1] if idx else None
 
-        if self._index > len(self._versions):
-            raise StopIteration
+    @staticmethod
+    def _get_value(version):
+        return version.value if isinstance(version, Version) else \
+            helper.normalise_version(version)
 
-        return self._versions[self._index - 1]
+    def __iter__(self):
+        return iter(self._versions)
 
     def __len__(self):
         return len(self._versions)
 
     def __contains__(self, other):
-        return other in self._versions
+        return self._get_value(other) in self._lookup
 
     def __getitem__(self, idx):
         return self._versions[idx]
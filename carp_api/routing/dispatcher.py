@@ -0,0 +1,218 @@
+"""Dispatcher registers every distinct endpoint url just once, no matter in
+how many versions given endpoint is present.
+
+Default registration adds werkzeug rule per (version, namespace, endpoint),
+thus every propagated endpoint is duplicated into every later version. In
+dispatcher mode url is registered once with version converter that accepts
+only versions where given url exists, and concrete endpoint is picked by
+bisecting sorted list of versions at which implementation changes.
+
+Endpoints stay buildable by their own names (flask.url_for('GetUser',
+uid=3)) through build only rules that are not matched, version argument is
+not part of request.view_args.
+"""
+import bisect
+import re
+
+import flask
+
+from werkzeug.routing import BaseConverter
+
+from . import helper, materializer
+
+
+CONVERTER_NAME = 'api_version'
+
+VERSION_ARGUMENT = 'carp_api_version'
+
+# WSGI environ key under which version matched by dispatcher is kept
+VERSION_ENVIRON_KEY = 'carp_api.dispatcher_version'
+
+
+class VersionConverter(BaseConverter):
+    """Converter that matches only versions it was given as arguments, ie.
+    <api_version('1.0','1.1'):carp_api_version>
+    """
+    def __init__(self, url_map, *versions):
+        super().__init__(url_map)
+
+        self.regex = '|'.join(
+            re.escape(version)
+            for version in sorted(versions, key=len, reverse=True)
+        )
+
+
+class VersionDispatcher:
+    """View function that serves one url (without version prefix) for all
+    versions that have it.
+    """
+    # normalised versions are shared between dispatchers, there is as many of
+    # them as there are versions
+    _normalised_versions = {}
+
+    def __init__(self, url, methods):
+        self.url = url
+        self.methods = methods
+
+        self.versions = []
+
+        # breakpoints - versions at which implementation changes
+        self._keys = []
+        self._endpoints = []
+
+    @classmethod
+    def normalise(cls, version):
+        try:
+            return cls._normalised_versions[version]
+        except KeyError:
+            normalised = helper.normalise_version(version)
+
+            cls._normalised_versions[version] = normalised
+
+            return normalised
+
+    def add(self, version, endpoint):
+        """Adds endpoint for given version, versions need to be added in
+        ascending order.
+        """
+        key = self.normalise(version)
+
+        if self._keys and key <= self._keys[-1]:
+            raise ValueError("Versions have to be added in ascending order")
+
+        self.versions.append(version)
+
+        # routing table shares one instance per endpoint between versions
+        if self._endpoints and self._endpoints[-1] is endpoint:
+            return
+
+        self._keys.append(key)
+        self._endpoints.append(endpoint)
+
+    def resolve(self, version):
+        idx = bisect.bisect_right(self._keys, self.normalise(version)) - 1
+
+        return self._endpoints[idx]
+
+    @property
+    def rule(self):
+        versions = ','.join(repr(version) for version in self.versions)
+
+        return '/<{}({}):{}>{}'.format(
+            CONVERTER_NAME, versions, VERSION_ARGUMENT, self.url)
+
+    @property
+    def name(self):
+        names = sorted(set(
+            helper.get_endpoint_name(endpoint) for endpoint in self._endpoints
+        ))
+
+        return '{}:{}:{}'.format(
+            ','.join(names), ','.join(sorted(self.methods)), self.url)
+
+    @property
+    def short_documentation(self):
+        return self._endpoints[-1].short_documentation
+
+    def iter_routes(self):
+        """Yields pair of (url, endpoint) for every version served.
+        """
+        for version in self.versions:
+            yield '/' + version + self.url, self.resolve(version)
+
+    def __call__(self, *args, **kwargs):
+        version = kwargs.pop(VERSION_ARGUMENT, None) or \
+            flask.request.environ[VERSION_ENVIRON_KEY]
+
+        return self.resolve(version)(*args, **kwargs)
+
+
+def split_url(version, url):
+    """Returns url without version prefix or None if url does not start with
+    version (ie. unversioned or endpoint with custom url).
+    """
+    if not version:
+        return None
+
+    prefix = '/' + version
+
+    if url == prefix or url.startswith(prefix + '/'):
+        return url[len(prefix):]
+
+    return None
+
+
+def pop_version(endpoint, values):
+    """Url value preprocessor, moves version out of view arguments.
+    """
+    # pylint: disable=unused-argument
+    if values and VERSION_ARGUMENT in values:
+        flask.request.environ[VERSION_ENVIRON_KEY] = values.pop(
+            VERSION_ARGUMENT)
+
+
+def add_build_rules(app, routes):
+    """Adds rules for list of (url, endpoint name, view function) that are
+    used only to build urls. They go only to rules by endpoint, matching
+    never sees them.
+    """
+    # pylint: disable=protected-access
+    url_map = app.url_map
+
+    for url, name, view_func in routes:
+        rule = materializer.make_rule(app, url, name, view_func)
+        rule.build_only = True
+        rule.bind(url_map)
+
+        url_map._rules_by_endpoint.setdefault(name, []).append(rule)
+
+    url_map._remap = True
+    # pylint: enable=protected-access
+
+
+def register(app, routes):
+    """Registers routes given as list of tuples (version, namespace, name,
+    url, endpoint instance) using single rule per distinct url.
+    """
+    app.url_map.converters[CONVERTER_NAME] = VersionConverter
+    app.url_value_preprocessor(pop_version)
+
+    dispatchers = {}
+
+    # urls are built from rules in order of routing table, as in default mode
+    build_routes = [
+        (url, name, instance) for version, _, name, url, instance in routes
+        if split_url(version, url) is not None
+    ]
+
+    # flask keeps one view function per endpoint name, the one registered
+    # last, it serves every version of the name in default mode
+    views = {name: instance for _, _, name, _, instance in routes}
+
+    routes = sorted(
+        routes, key=lambda route: VersionDispatcher.normalise(route[0]))
+
+    for version, _, name, url, instance in routes:
+        rest = split_url(version, url)
+
+        if rest is None:
+            app.add_url_rule(url, name, instance)
+
+            continue
+
+        methods = tuple(sorted(
+            method.upper() for method in instance.methods or ()))
+
+        key = (rest, methods)
+
+        if key not in dispatchers:
+            dispatchers[key] = VersionDispatcher(rest, instance.methods)
+
+        dispatchers[key].add(version, views[name])
+
+    for dispatcher in dispatchers.values():
+        app.add_url_rule(dispatcher.rule, dispatcher.name, dispatcher)
+
+    add_build_rules(app, build_routes)
+
+    return dispatchers
@@ -1,3 +1,5 @@
+import importlib
+
 from carp_api import exception
 
 
@@ -57,3 +59,25 @@ def get_endpoint_name(obj):
     )
 
     return getattr(obj, 'name', default_name)
+
+
+def import_dotted_path(dotted_path):
+    """Imports object given as 'package.module:QualName' (or
+    'package.module.Name').
+    """
+    if ':' in dotted_path:
+        module_name, _, qualname = dotted_path.partition(':')
+    else:
+        module_name, _, qualname = dotted_path.rpartition('.')
+
+    if not module_name or not qualname:
+        raise exception.RoutingConfigurationError(
+            "Expected dotted path 'package.module:Name', got {}".format(
+                dotted_path))
+
+    obj = importlib.import_module(module_name)
+
+    for attr in qualname.split('.'):
+        obj = getattr(obj, attr)
+
+    return obj
@@ -0,0 +1,170 @@
+"""Lazy endpoints are registered by dotted path, class behind it is imported
+(and instantiated) only when the first request hits one of its routes.
+
+Routing needs to know url, name and methods of the endpoint before it's
+imported, thus these are declared at registration and checked against the
+class once it's loaded:
+
+    router.enable('1.0', 'user', endpoints=[
+        'my_api.endpoints:ListUsers',
+        lazy.LazyEndpoint(
+            'my_api.endpoints:GetUser', url='uid/<string:uid>',
+            methods=['GET']),
+    ])
+
+Bare string stands for endpoint served at the root of its namespace (url
+''), with default methods, propagation and trailing slash (the same as
+attributes of BaseEndpoint).
+"""
+import threading
+
+from carp_api import exception, url
+
+from . import helper
+
+
+DEFAULT_METHODS = ('GET', 'OPTIONS')
+
+
+class LazyEndpoint:
+    """Stands in for endpoint class until it's needed. Behaves as endpoint
+    instance as far as routing is concerned.
+    """
+    def __init__(
+            self, path, url='', name=None, methods=DEFAULT_METHODS,
+            propagate=True, trailing_slash=True):
+        # pylint: disable=redefined-outer-name,too-many-arguments
+        self.path = path
+        self.url = url
+        self.name = name if name else \
+            path.replace(':', '.').rpartition('.')[2]
+        self.methods = list(methods) if methods is not None else None
+        self.propagate = propagate
+        self.trailing_slash = trailing_slash
+
+        self._endpoint = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self):
+        return self._endpoint is not None
+
+    def load(self):
+        """Imports and instantiates endpoint (once, even if called from many
+        threads at the same time).
+        """
+        if self._endpoint is not None:
+            return self._endpoint
+
+        with self._lock:
+            if self._endpoint is None:
+                endpoint_class = helper.import_dotted_path(self.path)
+
+                self.check(endpoint_class)
+
+                endpoint = endpoint_class()
+
+                if hasattr(endpoint, 'compile_pipelines'):
+                    endpoint.compile_pipelines()
+
+                self._endpoint = endpoint
+
+        return self._endpoint
+
+    def check(self, endpoint_class):
+        """Checks that metadata declared at registration matches the class,
+        otherwise routing (and conflict detection) was done with wrong values.
+        """
+        declared = self.get_metadata()
+
+        actual = {
+            'url': getattr(endpoint_class, 'url', None),
+            'name': helper.get_endpoint_name(endpoint_class),
+            'methods': getattr(endpoint_class, 'methods', None),
+            'propagate': getattr(endpoint_class, 'propagate', True),
+            'trailing_slash': getattr(endpoint_class, 'trailing_slash', True),
+        }
+
+        actual['methods'] = list(actual['methods']) \
+            if actual['methods'] is not None else None
+
+        mismatched = sorted(
+            key for key, value in declared.items() if actual[key] != value)
+
+        if mismatched:
+            raise exception.RoutingConfigurationError(
+                "Lazy endpoint {} was registered with {} that differ from "
+                "the class: {}".format(self.path, ', '.join(
+                    '{}={!r}'.format(key, declared[key])
+                    for key in mismatched
+                ), ', '.join(
+                    '{}={!r}'.format(key, actual[key]) for key in mismatched
+                ))
+            )
+
+    def get_metadata(self):
+        return {
+            'url': self.url,
+            'name': self.name,
+            'methods': self.methods,
+            'propagate': self.propagate,
+            'trailing_slash': self.trailing_slash,
+        }
+
+    def get_final_name(self):
+        return self.name
+
+    def get_final_url(self, version, namespace, host=None):
+        """Builds final url out of declared metadata, see
+        BaseEndpoint.get_final_url.
+        """
+        url_instance = url.Url()
+
+        if version:
+            url_instance.add(version)
+
+        if namespace:
+            url_instance.add(namespace)
+
+        url_instance.add(self.url)
+
+        return url_instance.as_full_url(
+            trailing_slash=self.trailing_slash, host=host)
+
+    @property
+    def short_documentation(self):
+        if self._endpoint is None:
+            return "[Lazy endpoint {}, not loaded yet]".format(self.path)
+
+        return self._endpoint.short_documentation
+
+    def __str__(self):
+        return '<LazyEndpoint path="{}">'.format(self.path)
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+def make_lazy(endpoint):
+    """Turns dotted path into LazyEndpoint, anything else is returned as
+    is.
+    """
+    if isinstance(endpoint, str):
+        return LazyEndpoint(endpoint)
+
+    return endpoint
+
+
+def warm(endpoints):
+    """Loads all lazy endpoints among given ones (ie. before forking workers
+    of prefork server), returns number of endpoints loaded.
+    """
+    loaded = 0
+
+    for endpoint in endpoints:
+        if isinstance(endpoint, LazyEndpoint) and not endpoint.is_loaded:
+            endpoint.load()
+
+            loaded += 1
+
+    return loaded
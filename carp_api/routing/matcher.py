@@ -0,0 +1,290 @@
+"""Radix tree matcher, picks rules that could match given path by walking tree
+of path segments instead of trying regex of every rule in the map.
+
+Tree keeps static segments as dictionary lookups and converter segments
+(typed nodes) as regexes of their converters, matched against single
+segment. Walk gives (usually very short) list of candidate rules, which are
+then matched by werkzeug itself in the order of the map, so endpoint
+selection, 404/405, redirects and conversion of values stay exactly the same.
+
+Rules that tree can't express (converter that matches slashes or custom
+converter, segment mixing text and converter etc.) are candidates for every
+path, paths that tree can't handle (empty segments, host matching) are
+matched by werkzeug against the whole map.
+"""
+import re
+import threading
+
+from werkzeug.routing import (
+    AnyConverter, FloatConverter, IntegerConverter, Map, MapAdapter,
+    UnicodeConverter, UUIDConverter)
+
+from .dispatcher import VersionConverter
+
+
+# converters which regex never matches a slash
+SEGMENT_CONVERTERS = (
+    AnyConverter, FloatConverter, IntegerConverter, UnicodeConverter,
+    UUIDConverter, VersionConverter,
+)
+
+CONVERTER_SEGMENT_RE = re.compile(
+    r'<(?:[a-zA-Z_][a-zA-Z0-9_]*(?:\((?:[^)]*)\))?:)?([a-zA-Z_][a-zA-Z0-9_]*)>'
+)
+
+
+class Node:
+    __slots__ = ('static', 'typed', 'rules')
+
+    def __init__(self):
+        # segment -> Node
+        self.static = {}
+
+        # list of (compiled regex of converter, Node)
+        self.typed = []
+
+        # (position in map, rule) of rules that end at this node
+        self.rules = []
+
+    def get_static(self, segment):
+        if segment not in self.static:
+            self.static[segment] = Node()
+
+        return self.static[segment]
+
+    def get_typed(self, regex):
+        for typed_regex, node in self.typed:
+            if typed_regex.pattern == regex:
+                return node
+
+        node = Node()
+
+        self.typed.append((re.compile(regex), node))
+
+        return node
+
+
+def get_segments(rule):
+    """Returns list of (static segment or None, converter regex or None) for
+    rule or None if rule can't be expressed by the tree.
+    """
+    if rule.map.host_matching or rule.subdomain:
+        return None
+
+    if CONVERTER_SEGMENT_RE.sub('', rule.rule).count('/') != \
+            rule.rule.count('/'):
+        # converter arguments with slashes
+        return None
+
+    segments = []
+
+    for segment in rule.rule.lstrip('/').split('/'):
+        if '<' not in segment:
+            segments.append((segment, None))
+
+            continue
+
+        match = CONVERTER_SEGMENT_RE.fullmatch(segment)
+
+        if match is None:
+            return None
+
+        # pylint: disable=protected-access
+        converter = rule._converters[match.group(1)]
+        # pylint: enable=protected-access
+
+        if not isinstance(converter, SEGMENT_CONVERTERS):
+            return None
+
+        segments.append((None, converter.regex))
+
+    return segments
+
+
+class RadixTree:
+    """Tree of rules of the map, built from list of rules sorted as they are
+    matched.
+    """
+    def __init__(self, rules):
+        self.rules = rules
+
+        self.root = Node()
+
+        # rules that tree can't express, candidates for every path
+        self.unsupported = []
+
+        for position, rule in enumerate(rules):
+            if rule.build_only:
+                continue
+
+            segments = get_segments(rule)
+
+            if segments is None:
+                self.unsupported.append((position, rule))
+
+                continue
+
+            node = self.root
+
+            for static, regex in segments:
+                node = node.get_static(static) if regex is None else \
+                    node.get_typed(regex)
+
+            node.rules.append((position, rule))
+
+    def get_candidates(self, path_info):
+        """Returns rules that may match given path (in order of the map) or
+        None if path has to be matched against the whole map.
+        """
+        segments = path_info.lstrip('/').split('/')
+
+        # werkzeug merges slashes (and redirects), leave it to werkzeug
+        if '' in segments[:-1]:
+            return None
+
+        candidates = list(self.unsupported)
+
+        # path with trailing slash may match rule without it (if strict
+        # slashes are off), path without it may be redirected to rule with it,
+        # both ways rules of the last non-empty segment are candidates
+        if len(segments) > 1 and not segments[-1]:
+            segments.pop()
+
+        nodes = [self.root]
+
+        for segment in segments:
+            next_nodes = []
+
+            for node in nodes:
+                if segment in node.static:
+                    next_nodes.append(node.static[segment])
+
+                for regex, typed_node in node.typed:
+                    if regex.fullmatch(segment):
+                        next_nodes.append(typed_node)
+
+            nodes = next_nodes
+
+        for node in nodes:
+            candidates.extend(node.rules)
+
+            if '' in node.static:
+                candidates.extend(node.static[''].rules)
+
+        candidates.sort(key=lambda candidate: candidate[0])
+
+        return [rule for _, rule in candidates]
+
+
+class CandidateMap:
+    """Map as seen by MapAdapter.match, the same as map of the app, just with
+    list of rules limited to candidates.
+    """
+    def __init__(self, url_map, rules):
+        self._map = url_map
+        self._rules = rules
+
+    def update(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._map, name)
+
+
+class RadixMapAdapter(MapAdapter):
+    def match(
+            self, path_info=None, method=None, return_rule=False,
+            query_args=None, websocket=None):
+        # pylint: disable=too-many-arguments
+        url_map = self.map
+
+        tree = url_map.get_tree()
+
+        candidates = tree.get_candidates(
+            self.path_info if path_info is None else path_info)
+
+        if candidates is None:
+            return super().match(
+                path_info, method, return_rule, query_args, websocket)
+
+        # adapter is bound to a single request, it's safe to swap its map
+        self.map = CandidateMap(url_map, candidates)
+
+        try:
+            return super().match(
+                path_info, method, return_rule, query_args, websocket)
+        finally:
+            self.map = url_map
+
+
+class RadixMap(Map):
+    """Werkzeug map that matches urls with help of radix tree, tree is built
+    on first match and rebuilt whenever rules change.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._tree = None
+        self._tree_lock = threading.Lock()
+
+    def add(self, rulefactory):
+        super().add(rulefactory)
+
+        self._tree = None
+
+    def get_tree(self):
+        self.update()
+
+        tree = self._tree
+
+        # list of rules could have been swapped (see materializer.add_rules)
+        if tree is None or tree.rules is not self._rules:
+            with self._tree_lock:
+                tree = self._tree
+
+                if tree is None or tree.rules is not self._rules:
+                    tree = RadixTree(self._rules)
+
+                    self._tree = tree
+
+        return tree
+
+    def bind(self, *args, **kwargs):
+        # pylint: disable=signature-differs
+        adapter = super().bind(*args, **kwargs)
+
+        return RadixMapAdapter(
+            self, adapter.server_name, adapter.script_name, adapter.subdomain,
+            adapter.url_scheme, adapter.path_info, adapter.default_method,
+            adapter.query_args)
+
+
+def install(app):
+    """Replaces url map of the app with RadixMap, has to be called before
+    routes are registered.
+    """
+    url_map = app.url_map
+
+    radix_map = RadixMap(
+        default_subdomain=url_map.default_subdomain,
+        charset=url_map.charset,
+        strict_slashes=url_map.strict_slashes,
+        merge_slashes=url_map.merge_slashes,
+        redirect_defaults=url_map.redirect_defaults,
+        converters=url_map.converters,
+        sort_parameters=url_map.sort_parameters,
+        sort_key=url_map.sort_key,
+        encoding_errors=url_map.encoding_errors,
+        host_matching=url_map.host_matching,
+    )
+
+    for rule in url_map.iter_rules():
+        new_rule = rule.empty()
+        new_rule.provide_automatic_options = getattr(
+            rule, 'provide_automatic_options', False)
+
+        radix_map.add(new_rule)
+
+    app.url_map = radix_map
+
+    return radix_map
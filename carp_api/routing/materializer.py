@@ -0,0 +1,255 @@
+"""Materializer keeps routes of old (rarely used) versions aside and adds them
+to the routing table and werkzeug map only when the first request for given
+version comes in.
+
+Latest versions are built eagerly, as usual. Routes of remaining versions are
+kept as pending and materialized (url built, conflicts checked, rules added)
+by WSGI middleware that looks at version prefix of incoming path, before
+flask even attempts to match it.
+
+NOTE: conflicting urls in pending versions are reported when given version is
+materialized (none of its routes is added then and version is dropped),
+`carp_api routes` materializes everything and can be used to check routing
+upfront.
+"""
+import threading
+
+from carp_api import exception
+
+from . import helper
+
+
+def get_lazy_versions(versions, eager_versions=None):
+    """Returns versions that are not among latest `eager_versions` ones,
+    unversioned routes are always eager.
+    """
+    if eager_versions is None:
+        return set()
+
+    versions = sorted(
+        (version for version in versions if version),
+        key=helper.normalise_version)
+
+    if eager_versions <= 0:
+        return set(versions)
+
+    return set(versions[:-eager_versions])
+
+
+def make_rule(app, url, endpoint, view_func):
+    """Builds werkzeug rule for view function the same way as
+    flask.Flask.add_url_rule does.
+    """
+    methods = set(
+        method.upper()
+        for method in getattr(view_func, 'methods', None) or ('GET',))
+
+    required_methods = set(getattr(view_func, 'required_methods', ()))
+
+    provide_automatic_options = getattr(
+        view_func, 'provide_automatic_options', None)
+
+    if provide_automatic_options is None:
+        provide_automatic_options = 'OPTIONS' not in methods
+
+        if provide_automatic_options:
+            required_methods.add('OPTIONS')
+
+    rule = app.url_rule_class(
+        url, methods=methods | required_methods, endpoint=endpoint)
+
+    rule.provide_automatic_options = provide_automatic_options
+
+    return rule
+
+
+def add_rules(app, routes):
+    """Adds rules for list of (url, endpoint name, view function) to already
+    running app.
+
+    Map.update sorts list of rules in place, thread that is matching url at
+    the same time could see it empty, thus new list is built aside and swapped
+    in with a single assignment.
+    """
+    # pylint: disable=protected-access
+    url_map = app.url_map
+
+    url_map.update()
+
+    rules = list(url_map._rules)
+    by_endpoint = {}
+
+    for url, endpoint, view_func in routes:
+        rule = make_rule(app, url, endpoint, view_func)
+        rule.bind(url_map)
+
+        rules.append(rule)
+        by_endpoint.setdefault(endpoint, []).append(rule)
+
+        app.view_functions.setdefault(endpoint, view_func)
+
+    rules.sort(key=lambda rule: rule.match_compare_key())
+
+    for endpoint, new_rules in by_endpoint.items():
+        url_map._rules_by_endpoint[endpoint] = sorted(
+            url_map._rules_by_endpoint.get(endpoint, []) + new_rules,
+            key=lambda rule: rule.build_compare_key())
+
+    url_map._rules = rules
+    # pylint: enable=protected-access
+
+
+class VersionMaterializer:
+    """Collects routes of lazy versions and materializes them on demand, acts
+    as WSGI middleware once attached to the app with init_app.
+
+    Routes are passed to `add` (ie. while routing table is built) and held
+    until `settle` is called, then latest `eager_versions` go into routing
+    table and remaining ones stay pending.
+    """
+    def __init__(self, routing_table, eager_versions=None):
+        self.routing_table = routing_table
+        self.eager_versions = eager_versions
+
+        self.app = None
+        self.wsgi_app = None
+
+        # version -> list of (namespace, name, endpoint, url)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+        # name -> endpoint of the latest version that has it, flask keeps
+        # one view function per name, registered last (see view_for)
+        self._views = {}
+
+    def add(self, version, namespace, name, endpoint, url=None):
+        """Adds route to the routing table, or (if only some versions are
+        eager) keeps it until settle is called. Routes come in ascending
+        order of versions.
+        """
+        self._views[name] = endpoint
+
+        if self.eager_versions is None or not version:
+            self.routing_table.add(
+                version, namespace, name, endpoint, url=url)
+
+            return
+
+        self._pending.setdefault(version, []).append(
+            (namespace, name, endpoint, url))
+
+    def settle(self):
+        """Adds routes of eager versions to the routing table, returns list of
+        versions that stay pending.
+        """
+        lazy_versions = get_lazy_versions(self._pending, self.eager_versions)
+
+        for version in self.pending_versions:
+            if version not in lazy_versions:
+                for namespace, name, endpoint, url in \
+                        self._pending.pop(version):
+                    self.routing_table.add(
+                        version, namespace, name, endpoint, url=url)
+
+        return self.pending_versions
+
+    @property
+    def pending_versions(self):
+        with self._lock:
+            versions = list(self._pending)
+
+        return sorted(versions, key=helper.normalise_version)
+
+    def init_app(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+
+        app.wsgi_app = self
+        app.version_materializer = self
+
+    def view_for(self, name):
+        """View function of endpoint name, the same one as if all versions
+        were registered upfront (implementation of the latest version that
+        has the name, it serves older versions too).
+        """
+        return self.routing_table.get_instance(self._views[name])
+
+    def get_urls(self, version, routes):
+        """Returns final urls of routes of given version, raises
+        ConflictingUrlsError if any of them is taken (by routing table or
+        another route of the version).
+        """
+        urls = []
+        names = {}
+
+        for namespace, _, endpoint, url in routes:
+            instance = self.routing_table.get_instance(endpoint)
+
+            if url is None:
+                url = instance.get_final_url(version, namespace)
+
+                if url in names or self.routing_table.has_url(url):
+                    raise exception.ConflictingUrlsError(
+                        "Url {url} was already registered by {name}".format(
+                            url=url, name=names.get(url, 'another version')))
+
+            names[url] = instance.get_final_name()
+            urls.append(url)
+
+        return urls
+
+    def materialize(self, version):
+        """Materializes given version, returns False if there was nothing to
+        do (version is eager, unknown or materialized already).
+
+        Whole version is checked before any of its routes is added, version
+        that fails is dropped (its urls are not found) and error is raised.
+        """
+        if version not in self._pending:
+            return False
+
+        with self._lock:
+            routes = self._pending.get(version)
+
+            if routes is None:
+                return False
+
+            try:
+                urls = self.get_urls(version, routes)
+            except Exception:
+                del self._pending[version]
+
+                raise
+
+            rules = []
+
+            for (namespace, name, endpoint, _), url in zip(routes, urls):
+                url = self.routing_table.add(
+                    version, namespace, name, endpoint, url=url)
+
+                instance = self.routing_table.get_instance(endpoint)
+
+                self.app.view_functions.setdefault(name, self.view_for(name))
+
+                # methods of rule come from endpoint of the route
+                rules.append((url, name, instance))
+
+            add_rules(self.app, rules)
+
+            del self._pending[version]
+
+        return True
+
+    def materialize_all(self):
+        for version in self.pending_versions:
+            self.materialize(version)
+
+    def __call__(self, environ, start_response):
+        if self._pending:
+            version, _ = self.app.version_resolver.resolve(
+                environ.get('PATH_INFO', ''))
+
+            if version in self._pending:
+                self.materialize(version)
+
+        return self.wsgi_app(environ, start_response)
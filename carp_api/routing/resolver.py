@@ -0,0 +1,191 @@
+import functools
+
+from werkzeug.exceptions import HTTPException, NotFound
+
+from carp_api import exception
+
+from . import component, helper
+
+
+# WSGI environ key under which version requested by client is kept when
+# request is served by the nearest lower version
+REQUESTED_VERSION_KEY = 'carp_api.requested_version'
+
+# how many distinct requested versions fallback remembers
+FALLBACK_CACHE_SIZE = 1024
+
+
+class VersionResolver:
+    """Resolves version of the api from the path of incoming request.
+
+    Resolver is compiled once (on app start-up) from the final routing. All
+    versions end up in a prefix table keyed on the first segment of the path,
+    thus figuring out version of a request is a single dictionary lookup
+    instead of matching pattern against the whole url.
+
+    Optionally results can be kept in bounded LRU cache keyed by path.
+
+    If fallback is enabled, version that is not registered can be mapped to
+    the nearest lower registered one (see get_fallback), as long as it has
+    the same number of components as registered versions.
+    """
+    def __init__(self, versions=None, cache_size=None, fallback=False):
+        self._prefixes = {}
+
+        self.cache_size = cache_size
+        self.fallback = fallback
+
+        # registered versions, normalised, for bisecting
+        self._version_list = component.VersionList()
+        self._values = {}
+
+        # numbers of components of registered versions, ie. 2 for '1.0'
+        self._shapes = set()
+
+        self._cached_resolve = functools.lru_cache(maxsize=cache_size)(
+            self._resolve) if cache_size else None
+
+        # requested version comes from the client, cache has to be bounded
+        self._cached_fallback = functools.lru_cache(
+            maxsize=FALLBACK_CACHE_SIZE)(self._get_fallback)
+
+        for version in versions or ():
+            self.add(version)
+
+    @classmethod
+    def from_version_list(cls, version_list, cache_size=None):
+        """Builds resolver out of component.VersionList (ie. one returned by
+        Router.get_final_routing).
+        """
+        return cls(
+            [version.as_str() for version in version_list],
+            cache_size=cache_size
+        )
+
+    def add(self, version):
+        # unversioned endpoints have no prefix, there is nothing to add
+        if not version:
+            return
+
+        self._prefixes[version] = version
+        self._shapes.add(version.count('.') + 1)
+
+        value = helper.normalise_version(version)
+
+        if value not in self._values:
+            self._version_list.append(value)
+            self._values[value] = version
+
+        if self._cached_resolve:
+            self._cached_resolve.cache_clear()
+
+        self._cached_fallback.cache_clear()
+
+    def has(self, version):
+        return version in self._prefixes
+
+    @property
+    def versions(self):
+        return list(self._prefixes.values())
+
+    def resolve(self, path):
+        """Returns tuple of (version, remainder), where version is None if
+        path is not versioned (remainder is then the whole path).
+        """
+        if self._cached_resolve:
+            return self._cached_resolve(path)
+
+        return self._resolve(path)
+
+    def _resolve(self, path):
+        segment, _, remainder = path.lstrip('/').partition('/')
+
+        version = self._prefixes.get(segment)
+
+        if version is None:
+            return None, path
+
+        return version, '/' + remainder
+
+    def get_fallback(self, segment):
+        """Returns registered version that serves requests for given (not
+        registered) version, that is the nearest lower one. None if fallback
+        is disabled, segment is not a version (or has other number of
+        components than registered versions) or no version is low enough.
+        """
+        if not self.fallback or segment in self._prefixes:
+            return None
+
+        return self._cached_fallback(segment)
+
+    def _get_fallback(self, segment):
+        if not segment or segment.count('.') + 1 not in self._shapes:
+            return None
+
+        try:
+            value = helper.normalise_version(segment)
+        except exception.RoutingConfigurationError:
+            return None
+
+        version = self._version_list.floor(value)
+
+        return self._values[version.value] if version is not None else None
+
+    def rewrite(self, path):
+        """Returns tuple of (requested version, path with requested version
+        replaced by the one that serves it), None if path needs no fallback.
+        """
+        segment, separator, remainder = path.lstrip('/').partition('/')
+
+        version = self.get_fallback(segment)
+
+        if version is None:
+            return None
+
+        return segment, '/' + version + separator + remainder
+
+
+class VersionFallback:
+    """WSGI middleware that makes requests for versions that are not
+    registered to be served by the nearest lower registered version.
+
+    Path is rewritten before flask matches it, so there is no need to
+    register (and propagate routes to) empty versions. Version requested by
+    the client is available as request.requested_version.
+
+    Path that matches a rule of the app as it is (ie. unversioned /2024/)
+    is never rewritten.
+    """
+    def __init__(self, version_resolver):
+        self.version_resolver = version_resolver
+
+        self.app = None
+        self.wsgi_app = None
+
+    def init_app(self, app):
+        self.app = app
+        self.wsgi_app = app.wsgi_app
+
+        app.wsgi_app = self
+
+    def matches_rule(self, environ):
+        adapter = self.app.url_map.bind_to_environ(
+            environ, server_name=self.app.config['SERVER_NAME'])
+
+        try:
+            adapter.match()
+        except NotFound:
+            return False
+        except HTTPException:
+            # redirect or method that is not allowed, path is known
+            return True
+
+        return True
+
+    def __call__(self, environ, start_response):
+        rewritten = self.version_resolver.rewrite(environ.get('PATH_INFO', ''))
+
+        if rewritten is not None and not self.matches_rule(environ):
+            environ[REQUESTED_VERSION_KEY], environ['PATH_INFO'] = rewritten
+
+        return self.wsgi_app(environ, start_response)
@@ -0,0 +1,170 @@
+"""Reverse routing, builds urls of endpoints for given version.
+
+Every final url is compiled once into template, list of literal parts with
+gaps for parameters, so building url is filling the gaps and a single join,
+there is no rule matching (as in flask.url_for) nor url assembling (as in
+BaseEndpoint.get_final_url) involved.
+"""
+import itertools
+import re
+import threading
+
+from urllib.parse import quote, urlencode
+
+from carp_api import exception
+
+from . import lazy
+
+
+# same as werkzeug rule syntax: <variable>, <converter:variable> or
+# <converter(arguments):variable>
+PARAMETER_RE = re.compile(
+    r'<(?:[a-zA-Z_][a-zA-Z0-9_]*(?:\((?:[^)]*)\))?:)?([a-zA-Z_][a-zA-Z0-9_]*)>'
+)
+
+# characters werkzeug converters leave unquoted
+SAFE_CHARACTERS = '/:'
+
+
+class UrlTemplate:
+    """Url split into literal and parameter segments, ie.
+    '/1.0/user/uid/<int:uid>/' is kept as ['/1.0/user/uid/', None, '/'] with
+    parameter uid filling position 1.
+    """
+    __slots__ = ('url', 'parts', 'parameters')
+
+    def __init__(self, url):
+        self.url = url
+        self.parts = []
+
+        # list of (position in parts, name of parameter)
+        self.parameters = []
+
+        position = 0
+
+        for match in PARAMETER_RE.finditer(url):
+            self.parts.append(url[position:match.start()])
+
+            self.parameters.append((len(self.parts), match.group(1)))
+            self.parts.append(None)
+
+            position = match.end()
+
+        self.parts.append(url[position:])
+
+    def build(self, params):
+        if not self.parameters:
+            if params:
+                return self.url + '?' + urlencode(params)
+
+            return self.url
+
+        parts = self.parts[:]
+
+        try:
+            for position, name in self.parameters:
+                parts[position] = quote_value(params[name])
+        except KeyError as err:
+            raise exception.UrlBuildError(
+                "Missing value of {} to build {}".format(err, self.url))
+
+        if len(params) > len(self.parameters):
+            names = set(name for _, name in self.parameters)
+
+            return ''.join(parts) + '?' + urlencode({
+                key: value for key, value in params.items()
+                if key not in names
+            })
+
+        return ''.join(parts)
+
+
+def quote_value(value):
+    """Quotes value of url parameter, the same way werkzeug converters do,
+    numbers and plain ascii words are used as they are.
+    """
+    if type(value) is int:  # NOQA
+        return str(value)
+
+    value = str(value)
+
+    if value.isascii() and value.isalnum():
+        return value
+
+    return quote(value, safe=SAFE_CHARACTERS)
+
+
+def get_key(endpoint):
+    """Key under which templates of endpoint are kept, endpoint class, lazy
+    endpoints (not imported yet) by dotted path.
+    """
+    if isinstance(endpoint, lazy.LazyEndpoint):
+        return endpoint.path
+
+    return endpoint if isinstance(endpoint, type) else type(endpoint)
+
+
+class UrlBuilder:
+    """Templates of all urls in routing table by (endpoint, version).
+
+    Routing table is append only (see materializer), builder compiles rows it
+    has not seen yet whenever lookup misses. Versions that are still pending
+    in version_materializer are materialized first.
+    """
+    def __init__(self, routing_table, version_materializer=None):
+        self.routing_table = routing_table
+        self.version_materializer = version_materializer
+
+        # (endpoint key, version) -> UrlTemplate
+        self._templates = {}
+        self._synced = 0
+        self._lock = threading.Lock()
+
+    def sync(self):
+        """Compiles templates of routes added to routing table since last
+        sync.
+        """
+        if len(self.routing_table) == self._synced:
+            return
+
+        with self._lock:
+            rows = list(itertools.islice(
+                self.routing_table, self._synced, None))
+
+            for version, _, _, url, endpoint in rows:
+                # endpoint enabled in many namespaces, first url wins
+                self._templates.setdefault(
+                    (get_key(endpoint), version or ''), UrlTemplate(url))
+
+            self._synced += len(rows)
+
+    def get_template(self, endpoint, version=None):
+        key = (endpoint, version or '')
+
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+
+        if self.version_materializer is not None and version:
+            self.version_materializer.materialize(version)
+
+        self.sync()
+
+        if key not in self._templates and isinstance(endpoint, type):
+            # endpoint could have been enabled by dotted path
+            key = ('{}:{}'.format(
+                endpoint.__module__, endpoint.__qualname__), version or '')
+
+        try:
+            return self._templates[key]
+        except KeyError:
+            raise exception.UrlBuildError(
+                "Endpoint {} is not available in version {}".format(
+                    getattr(endpoint, '__name__', endpoint), version))
+
+    def build(self, endpoint, version=None, **params):
+        """Returns url of endpoint (class) in given version, params fill url
+        parameters, ones that are not part of url go into query string.
+        """
+        return self.get_template(endpoint, version).build(params)
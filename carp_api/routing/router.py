@@ -1,22 +1,41 @@
-from carp_api.routing import component
+from carp_api.routing import component, compiler, lazy
 
 
 class Router:
     versions = component.VersionList()
 
+    _compiler = None
+
     @classmethod
     def enable(cls, version=None, namespace=None, endpoints=None):
+        """Enables endpoints for given version and namespace, endpoint may be
+        given as a class, instance or dotted path (imported on first request,
+        see lazy.LazyEndpoint).
+        """
         if namespace is None:
             namespace = ''
 
         version = cls.versions.get_or_create_version(version)
 
+        cls.get_compiler().invalidate(version)
+
         if not version.has(namespace):
             version.add(namespace)
 
         namespace = version.get(namespace)
 
-        namespace.add(endpoints)
+        namespace.add([lazy.make_lazy(endpoint) for endpoint in endpoints])
+
+    @classmethod
+    def get_compiler(cls):
+        """Returns compiler of the final routing, compiler is bound to
+        versions, if they were replaced, new compiler is created.
+        """
+        if cls._compiler is None or cls._compiler.versions is not \
+                cls.versions:
+            cls._compiler = compiler.RoutingCompiler(cls.versions)
+
+        return cls._compiler
 
     @classmethod
     def get_final_routing(cls):
@@ -30,57 +49,11 @@ class Router:
         behaviour of endpoint that we can turn off per endpoint basis. If
         version is set to None it means that endpoint is not versioned at all
         and won't use any version prefix on url.
-        """
-        final_routing = component.VersionList()
-
-        for version in cls.versions:
-            previous_version = (
-                final_routing[-1] if final_routing else component.Version()
-            )
-
-            current_version = final_routing.get_or_create_version(version)
-
-            # namespaces existing both in old and new version
-            common_namespaces = previous_version & version
-
-            # namespaces existing only in old version
-            propagating_namespaces = previous_version - version
 
-            # namespaces existing only in new version
-            new_namespaces = version - previous_version
-
-            for name in common_namespaces:
-                current_version.add(name)
-
-                old_endpoints = previous_version.get(name).endpoints
-                new_endpoints = version.get(name).endpoints
-
-                current_version.get(name).add(list(new_endpoints.values()))
-
-                old_endpoints = [
-                    endpoint for name, endpoint in old_endpoints.items()
-                    if name not in new_endpoints and endpoint.propagate is True
-                ]
-
-                current_version.get(name).add(old_endpoints)
-
-            for name in propagating_namespaces:
-                current_version.add(name)
-
-                current_version.get(name).add([
-                    endpoint for endpoint in previous_version.get(
-                        name).endpoints.values()
-                    if endpoint.propagate is True
-                ])
-
-            for name in new_namespaces:
-                current_version.add(name)
-
-                current_version.get(name).add(
-                    version.get(name).endpoints.values()
-                )
-
-        return final_routing
+        Routing is compiled incrementally, enabling endpoints after final
+        routing was obtained recompiles only affected versions.
+        """
+        return cls.get_compiler().compile()
 
 
 def enable(version=None, namespace=None, endpoints=None):
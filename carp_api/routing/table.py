@@ -0,0 +1,181 @@
+import array
+import sys
+
+from carp_api import exception
+
+from . import helper
+
+
+class RoutingTable:
+    """Compact, compiled form of the final routing.
+
+    Final routing (component.VersionList) keeps namespaces per version, while
+    app only needs flat list of routes. Table keeps that list in parallel,
+    array backed columns, every url and name is interned and there is just
+    one endpoint instance per endpoint class, no matter in how many versions
+    it's present.
+    """
+    __slots__ = (
+        'versions', 'version_values', 'namespaces', '_version_ids',
+        '_namespace_ids', '_names', '_urls', '_endpoints', '_instances',
+        '_final_urls', '_lookup',
+    )
+
+    def __init__(self):
+        # interned version strings, position is id of version
+        self.versions = []
+
+        # normalised version tuples, flattened (3 integers per version)
+        self.version_values = array.array('i')
+
+        self.namespaces = []
+
+        self._version_ids = array.array('H')
+        self._namespace_ids = array.array('H')
+        self._names = []
+        self._urls = []
+        self._endpoints = []
+
+        # endpoint class -> instance, to share instance between versions
+        self._instances = {}
+
+        # url -> name of endpoint that registered it
+        self._final_urls = {}
+
+        # (container id, value) -> position in container
+        self._lookup = {}
+
+    @classmethod
+    def build(cls, final_routing):
+        """Builds table out of final routing (as returned by
+        Router.get_final_routing).
+        """
+        table = cls()
+
+        for version, namespace, endpoints in final_routing.as_flat_list():
+            for name, endpoint in endpoints.items():
+                table.add(version, namespace, name, endpoint)
+
+        return table
+
+    def get_instance(self, endpoint):
+        if not isinstance(endpoint, type):
+            return endpoint
+
+        if endpoint not in self._instances:
+            instance = endpoint()
+
+            # request handling is compiled upfront, see
+            # BaseEndpoint.compile_pipelines
+            if hasattr(instance, 'compile_pipelines'):
+                instance.compile_pipelines()
+
+            self._instances[endpoint] = instance
+
+        return self._instances[endpoint]
+
+    def _get_id(self, container, value):
+        key = (id(container), value)
+
+        if key not in self._lookup:
+            container.append(sys.intern(value))
+
+            self._lookup[key] = len(container) - 1
+
+        return self._lookup[key]
+
+    def _get_version_id(self, version):
+        idx = self._get_id(self.versions, version)
+
+        if len(self.version_values) < (idx + 1) * 3:
+            self.version_values.extend(helper.normalise_version(version))
+
+        return idx
+
+    def add(self, version, namespace, name, endpoint, url=None):
+        """Adds route, because each endpoint can force custom url lets check
+        if given endpoint was not already registered by something else.
+        Otherwise first one is getting through the post and it leads to
+        ambiguity.
+
+        If url is given (ie. comes from routing artifact) it's trusted and
+        neither built nor checked. Returns final url.
+        """
+        instance = self.get_instance(endpoint)
+
+        if url is None:
+            url = instance.get_final_url(version, namespace)
+
+            if url in self._final_urls:
+                raise exception.ConflictingUrlsError(
+                    "Url was already registered by {name}".format(
+                        name=self._final_urls[url]
+                    )
+                )
+
+        url = sys.intern(url)
+
+        self._final_urls[url] = sys.intern(instance.get_final_name())
+
+        self._version_ids.append(self._get_version_id(version))
+        self._namespace_ids.append(self._get_id(self.namespaces, namespace))
+        self._names.append(sys.intern(name))
+        self._endpoints.append(instance)
+
+        # url goes last, iteration (possibly in another thread) is driven by
+        # urls, so row is visible only once complete
+        self._urls.append(url)
+
+        return url
+
+    def has_url(self, url):
+        return url in self._final_urls
+
+    def __len__(self):
+        return len(self._urls)
+
+    def __iter__(self):
+        """Yields tuples of (version, namespace, name, url, endpoint
+        instance).
+        """
+        for idx, url in enumerate(self._urls):
+            yield (
+                self.versions[self._version_ids[idx]],
+                self.namespaces[self._namespace_ids[idx]],
+                self._names[idx],
+                url,
+                self._endpoints[idx],
+            )
+
+    def memory_usage(self):
+        """Returns approximated number of bytes used by the table, split into
+        structure (columns and lookups), strings and endpoint instances.
+        """
+        structure = sum(sys.getsizeof(column) for column in (
+            self.versions, self.version_values, self.namespaces,
+            self._version_ids, self._namespace_ids, self._names, self._urls,
+            self._endpoints, self._instances, self._final_urls, self._lookup,
+        ))
+
+        strings = sum(sys.getsizeof(value) for value in set(
+            self.versions + self.namespaces + self._names + self._urls +
+            list(self._final_urls.values())
+        ))
+
+        instances = {id(instance): instance for instance in self._endpoints}
+
+        endpoints = sum(
+            sys.getsizeof(instance) + sys.getsizeof(
+                getattr(instance, '__dict__', {}))
+            for instance in instances.values()
+        )
+
+        return {
+            'structure': structure,
+            'strings': strings,
+            'endpoints': endpoints,
+            'total': structure + strings + endpoints,
+            'versions': len(self.versions),
+            'routes': len(self),
+            'endpoint_instances': len(instances),
+        }
@@ -0,0 +1,92 @@
+"""Conversion of payloads with python_schema schemas.
+
+Loader and dumper of each schema class are built once (when pipeline of
+endpoint that uses it is compiled), they construct new schema instance for
+every payload and translate errors of python_schema into carp_api ones.
+"""
+import threading
+
+import python_schema
+
+from carp_api import exception
+
+
+def make_loader(schema_class, error_class=exception.PayloadError):
+    """Returns function that loads payload into new instance of schema and
+    returns it, errors of payload are raised as `error_class`.
+    """
+    payload_error = python_schema.exception.PayloadError
+
+    def load(payload):
+        instance = schema_class()
+
+        try:
+            instance.loads(payload)
+        except payload_error as err:
+            raise error_class(err)
+
+        return instance
+
+    return load
+
+
+def make_dumper(schema_class, error_class=exception.ResponseContentError):
+    """Returns function that loads payload into new instance of schema and
+    returns its dumped value, errors of payload are raised as `error_class`.
+    """
+    payload_error = python_schema.exception.PayloadError
+
+    def dump(payload):
+        instance = schema_class()
+
+        try:
+            instance.loads(payload)
+        except payload_error as err:
+            raise error_class(err)
+
+        return instance.dumps()
+
+    return dump
+
+
+_loaders = {}
+_dumpers = {}
+_lock = threading.Lock()
+
+
+def get_loader(schema_class):
+    """Returns loader of schema class, built on first use.
+    """
+    try:
+        return _loaders[schema_class]
+    except KeyError:
+        pass
+
+    with _lock:
+        if schema_class not in _loaders:
+            _loaders[schema_class] = make_loader(schema_class)
+
+        return _loaders[schema_class]
+
+
+def get_dumper(schema_class):
+    """Returns dumper of schema class, built on first use.
+    """
+    try:
+        return _dumpers[schema_class]
+    except KeyError:
+        pass
+
+    with _lock:
+        if schema_class not in _dumpers:
+            _dumpers[schema_class] = make_dumper(schema_class)
+
+        return _dumpers[schema_class]
+
+
+def clear():
+    """Forgets loaders and dumpers.
+    """
+    with _lock:
+        _loaders.clear()
+        _dumpers.clear()
@@ -0,0 +1,126 @@
+"""JSON serializers of responses, picked by JSON_SERIALIZER setting:
+
+ * 'auto' - orjson if it's installed, stdlib otherwise
+ * 'orjson' - orjson (C extension), fails if it's not installed
+ * 'stdlib' - json module of standard library
+ * 'flask' - flask.json (honours JSON_SORT_KEYS, JSON_AS_ASCII and encoder of
+   the app), way it was done before serializers were introduced
+ * dotted path to function that takes object and returns bytes
+
+orjson and stdlib serializers write compact utf-8 without sorting keys.
+Values that JSON does not know (dates, uuids etc.) are handed over to json
+encoder of the app, so they come out the same as with flask.jsonify.
+
+Action may also return already serialized body (bytes or memoryview), it's
+sent as it is.
+"""
+import json
+
+import flask
+
+from simple_settings import settings
+
+from carp_api.routing import helper
+
+
+MIMETYPE = 'application/json'
+
+RAW_TYPES = (bytes, bytearray, memoryview)
+
+
+def encode_default(obj):
+    """Encodes values that serializer does not know, with json encoder of
+    current app.
+    """
+    return flask.current_app.json_encoder().default(obj)
+
+
+_stdlib_encoder = json.JSONEncoder(
+    ensure_ascii=False, separators=(',', ':'), default=encode_default)
+
+
+def stdlib_dumps(obj):
+    return _stdlib_encoder.encode(obj).encode('utf8')
+
+
+def flask_dumps(obj):
+    return flask.json.dumps(obj).encode('utf8')
+
+
+def make_orjson_dumps():
+    import orjson
+
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    orjson_dumps = orjson.dumps
+    encode_error = orjson.JSONEncodeError
+
+    def dumps(obj):
+        try:
+            return orjson_dumps(obj, default=encode_default, option=option)
+        except encode_error:
+            # ie. integers bigger than 64 bits, stdlib copes with those
+            return stdlib_dumps(obj)
+
+    return dumps
+
+
+def load(name):
+    """Returns serializer (function that turns object into bytes) of given
+    name, see module docstring.
+    """
+    if name == 'auto':
+        try:
+            return make_orjson_dumps()
+        except ImportError:
+            return stdlib_dumps
+
+    if name == 'orjson':
+        return make_orjson_dumps()
+
+    if name == 'stdlib':
+        return stdlib_dumps
+
+    if name == 'flask':
+        return flask_dumps
+
+    return helper.import_dotted_path(name)
+
+
+_dumps = None
+
+
+def get_dumps():
+    """Returns serializer picked by JSON_SERIALIZER, loaded on first use.
+    """
+    global _dumps  # pylint: disable=global-statement
+
+    if _dumps is None:
+        _dumps = load(settings.JSON_SERIALIZER)
+
+    return _dumps
+
+
+def clear():
+    """Forgets loaded serializer, ie. after JSON_SERIALIZER was changed.
+    """
+    global _dumps  # pylint: disable=global-statement
+
+    _dumps = None
+
+
+def dumps(obj):
+    return get_dumps()(obj)
+
+
+def make_response(obj, status=None):
+    """Builds response out of object (serialized) or bytes (sent as they
+    are).
+    """
+    if isinstance(obj, RAW_TYPES):
+        body = obj if isinstance(obj, bytes) else bytes(obj)
+    else:
+        body = get_dumps()(obj)
+
+    return flask.current_app.response_class(
+        body, status=status, mimetype=MIMETYPE)
@@ -0,0 +1,323 @@
+"""ASGI entry point, serves app built by server_factory.create_app on ASGI
+servers (ie. uvicorn or hypercorn):
+
+    uvicorn --factory carp_api.server_factory.asgi:create_asgi_app
+
+Connections (including idle keep-alive ones) are held by the event loop of the
+server, request is handed over to a pool of worker threads only once its body
+was received, thus threads are busy only with requests that are being
+handled. Bodies over PAYLOAD_MAX_SIZE (or announced as such by Content-Length)
+are not buffered, the app reads them from the connection as it goes, so they
+are rejected by the limits of the app or streamed to endpoints with
+stream_input. Routing, endpoint pipeline, error handlers and CORS are the ones
+of the flask app, response body is streamed back chunk by chunk.
+
+Lifespan events are supported, shutdown sends signal.app_shutdown.
+"""
+import asyncio
+import sys
+
+from concurrent import futures
+
+from simple_settings import settings
+
+from carp_api import signal
+
+from . import server_factory
+
+
+class ReceiveStream:
+    """wsgi.input of the request, body that was received by the event loop
+    is read first, the rest is received from the connection while it's read
+    (by the thread that runs the app).
+    """
+    def __init__(self, body, receive=None, loop=None):
+        self.buffer = body
+        self.receive = receive
+        self.loop = loop
+
+    def receive_body(self):
+        if self.receive is None:
+            return b''
+
+        message = asyncio.run_coroutine_threadsafe(
+            self.receive(), self.loop).result()
+
+        if message['type'] == 'http.disconnect' or \
+                not message.get('more_body', False):
+            self.receive = None
+
+        return message.get('body', b'')
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            while self.receive is not None:
+                self.buffer += self.receive_body()
+        else:
+            while len(self.buffer) < size and self.receive is not None:
+                self.buffer += self.receive_body()
+
+            if len(self.buffer) > size:
+                data, self.buffer = self.buffer[:size], self.buffer[size:]
+
+                return data
+
+        data, self.buffer = self.buffer, b''
+
+        return data
+
+    def readline(self, size=-1):
+        while b'\n' not in self.buffer and self.receive is not None and (
+                size is None or size < 0 or len(self.buffer) < size):
+            self.buffer += self.receive_body()
+
+        end = self.buffer.find(b'\n') + 1 or len(self.buffer)
+
+        if size is not None and size >= 0:
+            end = min(end, size)
+
+        data, self.buffer = self.buffer[:end], self.buffer[end:]
+
+        return data
+
+    def __iter__(self):
+        while True:
+            line = self.readline()
+
+            if not line:
+                return
+
+            yield line
+
+
+def get_content_length(scope):
+    for name, value in scope.get('headers', ()):
+        if name.lower() == b'content-length':
+            try:
+                return int(value)
+            except ValueError:
+                return None
+
+    return None
+
+
+def build_environ(scope, body_stream, content_length=None):
+    """Builds WSGI environ out of ASGI http scope and stream of request body,
+    content_length is the one of the body if it was received whole.
+    """
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf8').decode(
+            'latin1'),
+        'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': 'HTTP/{}'.format(scope.get('http_version', '1.1')),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'CONTENT_LENGTH': '' if content_length is None else str(
+            content_length),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': body_stream,
+        # body without Content-Length is read until its end
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin1').upper().replace('-', '_')
+        value = value.decode('latin1')
+
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+
+            continue
+
+        if name == 'CONTENT_LENGTH':
+            if content_length is None:
+                environ['CONTENT_LENGTH'] = value
+
+            continue
+
+        key = 'HTTP_' + name
+
+        if key in environ:
+            # cookies are the only header with its own separator
+            value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + \
+                value
+
+        environ[key] = value
+
+    return environ
+
+
+class AsgiApp:
+    """ASGI application wrapping WSGI one, WSGI app runs on executor threads.
+    """
+    def __init__(self, app, max_workers=None):
+        self.app = app
+
+        self.executor = futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='carp_api_asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            await self.handle_http(scope, receive, send)
+        elif scope['type'] == 'lifespan':
+            await self.handle_lifespan(receive, send)
+        elif scope['type'] == 'websocket':
+            await send({'type': 'websocket.close'})
+        else:
+            raise ValueError("Unsupported scope type {}".format(
+                scope['type']))
+
+    async def handle_lifespan(self, receive, send):
+        while True:
+            message = await receive()
+
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+
+            elif message['type'] == 'lifespan.shutdown':
+                try:
+                    self.shutdown()
+                except Exception as err:  # pylint: disable=broad-except
+                    await send({
+                        'type': 'lifespan.shutdown.failed',
+                        'message': str(err),
+                    })
+                else:
+                    await send({'type': 'lifespan.shutdown.complete'})
+
+                return
+
+    def shutdown(self):
+        with self.app.app_context():
+            signal.app_shutdown.send(self.app)
+
+        self.executor.shutdown(wait=False)
+
+    async def handle_http(self, scope, receive, send):
+        loop = asyncio.get_running_loop()
+
+        max_size = settings.PAYLOAD_MAX_SIZE
+        content_length = get_content_length(scope)
+
+        # event loop buffers bodies up to max_size, bigger ones are read by
+        # the app from the connection
+        buffered = max_size is None or content_length is None or \
+            content_length <= max_size
+
+        chunks = []
+        size = 0
+
+        while buffered:
+            message = await receive()
+
+            if message['type'] == 'http.disconnect':
+                return
+
+            chunks.append(message.get('body', b''))
+            size += len(chunks[-1])
+
+            if not message.get('more_body', False):
+                break
+
+            if max_size is not None and size > max_size:
+                buffered = False
+
+        body = b''.join(chunks)
+
+        if buffered:
+            environ = build_environ(scope, ReceiveStream(body), len(body))
+        else:
+            environ = build_environ(
+                scope, ReceiveStream(body, receive, loop))
+
+        await loop.run_in_executor(
+            self.executor, self.run_wsgi, environ, loop, send)
+
+    def run_wsgi(self, environ, loop, send):
+        """Runs WSGI app (on executor thread), each message is sent by the
+        event loop, thread waits for it to be sent before it produces next
+        chunk of the response.
+        """
+        response = {}
+
+        def send_message(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def send_start():
+            if response.pop('started', True):
+                return
+
+            send_message({
+                'type': 'http.response.start',
+                'status': response['status'],
+                'headers': response['headers'],
+            })
+
+        def write(data):
+            send_start()
+
+            send_message({
+                'type': 'http.response.body',
+                'body': data,
+                'more_body': True,
+            })
+
+        def start_response(status, headers, exc_info=None):
+            # headers were sent already, error can't be reported any more
+            if exc_info is not None and 'status' in response and \
+                    'started' not in response:
+                raise exc_info[1].with_traceback(exc_info[2])
+
+            response['started'] = False
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+            return write
+
+        result = self.app(environ, start_response)
+
+        try:
+            # last chunk is held back, so it goes with the final message
+            last = b''
+
+            for chunk in result:
+                if chunk:
+                    if last:
+                        write(last)
+
+                    last = chunk
+
+            send_start()
+
+            send_message({
+                'type': 'http.response.body',
+                'body': last,
+                'more_body': False,
+            })
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+
+def create_asgi_app(**kwargs):
+    """Builds the app with server_factory.create_app (takes the same
+    arguments) and wraps it into ASGI application.
+    """
+    app = server_factory.create_app(**kwargs)
+
+    return AsgiApp(app, max_workers=settings.ASGI_WORKER_THREADS)
@@ -3,7 +3,7 @@ import logging
 
 import flask
 
-from carp_api import exception
+from carp_api import exception, serializer
 
 
 def setup(settings, app, request_class):
@@ -31,6 +31,10 @@ def setup(settings, app, request_class):
 
     app.debug = settings.DEBUG
 
+    # forms are parsed by werkzeug, it rejects bodies over MAX_CONTENT_LENGTH
+    if app.config.get('MAX_CONTENT_LENGTH') is None:
+        app.config['MAX_CONTENT_LENGTH'] = settings.PAYLOAD_MAX_SIZE
+
     # custom request class in case you need more functionality than what Flask
     # offers
     app.request_class = request_class
@@ -99,9 +103,7 @@ def register_error_handlers(app, cors_headers):
         """
         app.logger.error(err, exc_info=True)
 
-        response = flask.jsonify(err.messages)
-        response.status_code = err.http_code
-        response.headers['Content-Type'] = 'application/json'
+        response = serializer.make_response(err.messages, err.http_code)
 
         return _add_cors(response, cors_headers)
 
@@ -122,9 +124,7 @@ def register_error_handlers(app, cors_headers):
         """
         app.logger.error(err, exc_info=True)
 
-        response = flask.jsonify(err.messages)
-        response.status_code = err.http_code
-        response.headers['Content-Type'] = 'application/json'
+        response = serializer.make_response(err.messages, err.http_code)
 
         return _add_cors(response, cors_headers)
 
@@ -172,7 +172,10 @@ def register_error_handlers(app, cors_headers):
     #       'Inactive API version', 404), ''
 
 
-def register_routes(settings, app):
+def enable_routes(settings):
+    """Enables common routes (if configured) and imports project routing
+    module, which enables the rest.
+    """
     from carp_api.routing import router
 
     if settings.ROUTING_ADD_COMMON:
@@ -191,35 +194,106 @@ def register_routes(settings, app):
             endpoint.ShutDown,
         ])
 
+    if settings.ROUTING_ADD_BATCH_ROUTE:
+        from carp_api.common import endpoint
+
+        router.enable(None, '', [
+            endpoint.Batch,
+        ])
+
     if settings.CARP_API_ROUTING:
         importlib.import_module(settings.CARP_API_ROUTING)
 
-    final_routing = router.Router.get_final_routing().as_flat_list()
 
-    # because each endpoint can force custom url lets check if given endpoint
-    # was not already registered by something else. Otherwise first one is
-    # getting through the post and it leads to ambiguity.
-    final_urls = {}
+def build_routing_table(settings, add=None):
+    """Enables all routes and compiles them into routing table, it includes
+    propagation, url building and url conflict detection.
+
+    Optionally routes can be passed to `add` (with the same signature as
+    RoutingTable.add) instead of being added to the table.
+    """
+    from carp_api.routing import router, table
+
+    enable_routes(settings)
+
+    routing_table = table.RoutingTable()
+
+    add = add if add else routing_table.add
+
+    # compact table shares endpoint instances between versions and flags
+    # urls registered by more than one endpoint
+    for version, namespace, endpoints in \
+            router.Router.get_final_routing().as_flat_list():
+        for name, endpoint in endpoints.items():
+            add(version, namespace, name, endpoint)
+
+    return routing_table
+
+
+def register_routes(settings, app, use_artifact=True):
+    from carp_api.routing import (
+        artifact, dispatcher, lazy, matcher, materializer, resolver, reverse,
+        table)
+
+    if settings.ROUTING_RADIX_MATCHER:
+        matcher.install(app)
+
+    routing_table = table.RoutingTable()
+
+    # only latest versions are built upfront, remaining ones are materialized
+    # by the first request that asks for them
+    version_materializer = materializer.VersionMaterializer(
+        routing_table, settings.ROUTING_EAGER_VERSIONS)
+
+    loaded = False
+
+    if use_artifact and settings.ROUTING_ARTIFACT:
+        loaded = artifact.load(
+            settings.ROUTING_ARTIFACT, settings, routing_table,
+            add=version_materializer.add)
+
+        if not loaded:
+            app.logger.warning(
+                "Routing artifact %s is missing or stale, building routing "
+                "from scratch", settings.ROUTING_ARTIFACT)
+
+    if not loaded:
+        build_routing_table(settings, add=version_materializer.add)
+
+    pending_versions = version_materializer.settle()
+
+    app.routing_table = routing_table
+
+    # url templates are compiled upfront, links are built by a single join
+    app.url_builder = reverse.UrlBuilder(routing_table, version_materializer)
+    app.url_builder.sync()
+
+    if settings.ROUTING_WARM_LAZY_ENDPOINTS:
+        lazy.warm(endpoint for _, _, _, _, endpoint in routing_table)
+
+    # versions are known upfront, so request can figure out its own version
+    # with a simple lookup instead of parsing whole url
+    app.version_resolver = resolver.VersionResolver(
+        routing_table.versions + pending_versions,
+        cache_size=settings.ROUTING_VERSION_CACHE_SIZE,
+        fallback=settings.ROUTING_VERSION_FALLBACK)
 
-    for version, namespace, endpoints in final_routing:
-        for name, instance in endpoints.items():
-            if isinstance(instance, type):
-                instance = instance()
+    if pending_versions:
+        version_materializer.init_app(app)
 
-            new_url = instance.get_final_url(version, namespace)
+    # has to go last, so path is rewritten before anything else looks at it
+    if settings.ROUTING_VERSION_FALLBACK:
+        resolver.VersionFallback(app.version_resolver).init_app(app)
 
-            if new_url in final_urls.keys():
-                raise exception.ConflictingUrlsError(
-                    "Url was already registered by {name}".format(
-                        name=final_urls[new_url]
-                    )
-                )
+    if settings.ROUTING_DISPATCHER:
+        dispatcher.register(app, routing_table)
 
-            final_urls[new_url] = instance.get_final_name()
+        return
 
-            app.add_url_rule(
-                new_url, name, instance
-            )
+    for _, _, name, new_url, instance in routing_table:
+        app.add_url_rule(
+            new_url, name, instance
+        )
 
 
 def register_loggers(settings, app):
@@ -23,6 +23,107 @@ ROUTING_ADD_COMMON = True
 # test
 ROUTING_ADD_SHUTDOWN_ROUTE = False
 
+# batch route (/batch/) runs list of requests sent in a single one, it saves
+# round trips of clients that need many small resources at once
+ROUTING_ADD_BATCH_ROUTE = False
+
+# maximal number of requests in a single batch
+BATCH_MAX_SIZE = 20
+
+# number of threads that run requests of batches in parallel (shared by all
+# batches), 0 or 1 runs them one by one
+BATCH_MAX_WORKERS = 4
+
+# limits of payloads (json and forms), payload over any of them is rejected
+# with InvalidPayloadError before it's parsed (or as soon as parsing reaches
+# the limit), None disables given limit (all of them are disabled on
+# default), ie. PAYLOAD_MAX_SIZE = 1024 * 1024, PAYLOAD_MAX_DEPTH = 32,
+# PAYLOAD_MAX_KEYS = 20000, PAYLOAD_MAX_INDEX = 10000 and
+# PAYLOAD_MAX_STRING_LENGTH = 65536 are sane for most of apis; size of body
+# in bytes, it's MAX_CONTENT_LENGTH of flask as well, unless that one is set
+PAYLOAD_MAX_SIZE = None
+
+# nesting of objects and lists (levels of json, segments of form key)
+PAYLOAD_MAX_DEPTH = None
+
+# keys of json objects (all of them, at any level) or keys of form
+PAYLOAD_MAX_KEYS = None
+
+# index of list in form key, ie. name[12]
+PAYLOAD_MAX_INDEX = None
+
+# strings of json, keys and values of form
+PAYLOAD_MAX_STRING_LENGTH = None
+
+# endpoints with stream_input skip up to that many records that are invalid
+# (see carp_api.request_stream), next one rejects the rest of the body
+REQUEST_STREAM_MAX_ERRORS = 0
+
+# keys of forms (ie. user[0].address.city) are parsed into paths once and kept
+# in LRU cache shared by all requests, this is maximal number of cached keys,
+# None disables the cache (call request_parser.clear() after limits of
+# payloads change)
+FORM_KEY_CACHE_SIZE = 4096
+
+# version of each request is resolved from the first segment of the path, set
+# to positive integer to additionally keep that many resolved paths in LRU
+# cache, None disables the cache
+ROUTING_VERSION_CACHE_SIZE = None
+
+# if True, request for version that is not registered (ie. /1.3/user/ while
+# there are only 1.0 and 1.2) is served by the nearest lower registered version
+# (1.2), request.requested_version keeps version asked by the client
+ROUTING_VERSION_FALLBACK = False
+
+# on default each endpoint is registered separately for every version it is
+# present in (propagation duplicates endpoints into every later version), set
+# to True to register every distinct url once and pick implementation for
+# requested version at dispatch time, it keeps url map small for apis with
+# many versions
+ROUTING_DISPATCHER = False
+
+# if True, url of each request is matched with help of radix tree over path
+# segments (only rules sharing path with request are tried) instead of trying
+# every rule, pays off for apps with thousands of rules
+ROUTING_RADIX_MATCHER = False
+
+# path to routing artifact created by `carp_api routes compile`, if set and
+# artifact is up to date, workers load final routing from it instead of
+# building it (propagation, url building and conflict detection are skipped),
+# stale or missing artifact falls back to building routing from scratch
+ROUTING_ARTIFACT = None
+
+# endpoints enabled by dotted path are imported on the first request that hits
+# them, set to True to import all of them on app creation instead (ie. before
+# prefork server forks workers, so they share imported modules)
+ROUTING_WARM_LAZY_ENDPOINTS = False
+
+# if set to a number, only that many latest versions are registered on app
+# creation, older ones are registered by the first request that asks for them
+# (None - all versions are registered upfront)
+ROUTING_EAGER_VERSIONS = None
+
+# serializer of json responses (results of actions and error messages),
+# 'auto' picks orjson when it's installed and json module of standard library
+# otherwise, 'orjson' and 'stdlib' pick given one, 'flask' uses flask.jsonify
+# (respects JSON_SORT_KEYS and JSON_AS_ASCII of flask config), dotted path
+# points to custom function that takes object and returns bytes
+JSON_SERIALIZER = 'auto'
+
+# responses are compressed with encoding negotiated from Accept-Encoding, list
+# keeps encodings in order of preference of the server (br and zstd are used
+# only if brotli and zstandard packages are installed), set to () to disable
+# compression, endpoint opts out with compress = False
+COMPRESSION_ENCODINGS = ('br', 'zstd', 'gzip', 'deflate')
+
+# compression level per encoding, missing ones use defaults of
+# carp_api.compression.DEFAULT_LEVELS
+COMPRESSION_LEVELS = {}
+
+# responses with smaller body (in bytes) are not compressed, streamed responses
+# are compressed regardless of their size
+COMPRESSION_MIN_SIZE = 1024
+
 # if you have two applications using same server/domain ie. example.com,
 # session will be distinguished using APP_NAME so that session_cookies on a
 # browser won't get messed up with different users working on same session
@@ -83,6 +184,11 @@ LOGGING_ADDITIONAL_LOGGERS = (
 FLASK_SERVER_HOST = '0.0.0.0'
 FLASK_SERVER_PORT = 5000
 
+# app served via carp_api.server_factory.asgi handles requests on pool of
+# threads, number of threads that handle requests at the same time, None
+# picks default of concurrent.futures.ThreadPoolExecutor
+ASGI_WORKER_THREADS = None
+
 # FLASK_DEFAULTS is used by server_factory:create_app, change if you
 # want to use different defaults than listed in flask_defaults
 FLASK_DEFAULTS = 'carp_api.settings.flask_defaults'
@@ -0,0 +1,43 @@
+import types
+
+import flask
+import pytest
+
+from carp_api import api_request
+from carp_api.routing import component, router
+from carp_api.settings import base
+
+
+def make_settings(**overrides):
+    """Settings object built from carp_api.settings.base with given values
+    overridden, handy when calling server_factory functions directly.
+    """
+    values = {
+        key: getattr(base, key) for key in dir(base) if key.isupper()
+    }
+
+    values['ROUTING_ADD_COMMON'] = False
+    values.update(overrides)
+
+    return types.SimpleNamespace(**values)
+
+
+def make_app(register_routes=None, **overrides):
+    """Builds bare flask app with api request and (optionally) routes
+    registered by given function.
+    """
+    app = flask.Flask(__name__)
+    app.request_class = api_request.ApiRequest
+
+    if register_routes:
+        register_routes(make_settings(**overrides), app)
+
+    return app
+
+
+@pytest.fixture
+def clean_router():
+    old_versions = router.Router.versions
+    router.Router.versions = component.VersionList()
+    yield router.Router
+    router.Router.versions = old_versions
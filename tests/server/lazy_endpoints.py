@@ -0,0 +1,23 @@
+"""Endpoints enabled by dotted path in tests, module must not be imported by
+anything else.
+"""
+from carp_api import endpoint
+
+
+class GetListOfBoats(endpoint.BaseEndpoint):
+    """Returns list of boats"""
+    url = ''
+
+    def action(self):
+        return [
+            'Yacht', 'Canoe',
+        ]
+
+
+class GetBoat(endpoint.BaseEndpoint):
+    url = 'boats/<string:name>'
+
+    methods = ['GET']
+
+    def action(self, name):
+        return name
@@ -0,0 +1,240 @@
+"""App served over ASGI, driven in-process by a minimal ASGI client.
+"""
+import asyncio
+import json
+
+import flask
+
+from simple_settings import settings
+
+from carp_api import signal
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import asgi
+
+
+class Echo(BaseEndpoint):
+    url = 'echo'
+
+    methods = ['POST']
+
+    def action(self):  # pylint: disable=arguments-differ
+        return {
+            'json': self.request.get_json(),
+            'query': self.request.args.get('q'),
+            'header': self.request.headers.get('X-Custom'),
+        }
+
+
+class Stream(BaseEndpoint):
+    url = 'stream'
+
+    def action(self):  # pylint: disable=arguments-differ
+        def generate():
+            for idx in range(3):
+                yield '{}\n'.format(idx)
+
+        return flask.Response(generate())
+
+
+class Import(BaseEndpoint):
+    url = 'import'
+
+    methods = ['POST']
+
+    stream_input = True
+
+    def action(self, records):  # pylint: disable=arguments-differ
+        # body that is still received from the connection
+        streamed = self.request.environ['wsgi.input'].receive is not None
+
+        return {'count': len(list(records)), 'streamed': streamed}
+
+
+class AsgiClient:
+    """Sends requests (and lifespan events) directly to ASGI application.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    def request(self, method, path, body=b'', headers=(), query=b''):
+        return asyncio.run(self._request(method, path, body, headers, query))
+
+    async def _request(self, method, path, body, headers, query):
+        # pylint: disable=too-many-arguments
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': method,
+            'scheme': 'http',
+            'path': path,
+            'root_path': '',
+            'query_string': query,
+            'headers': [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ],
+            'server': ('testserver', 80),
+            'client': ('127.0.0.1', 12345),
+        }
+
+        # body is sent in parts, as servers do with bigger bodies
+        end = max(3, len(body) - 3)
+
+        requests = [
+            {'type': 'http.request', 'body': body[:3], 'more_body': True},
+            {'type': 'http.request', 'body': body[3:end], 'more_body': True},
+            {'type': 'http.request', 'body': body[end:], 'more_body': False},
+        ]
+        messages = []
+
+        async def receive():
+            if requests:
+                return requests.pop(0)
+
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+
+        await self.app(scope, receive, send)
+
+        return messages
+
+    def lifespan(self, *events):
+        return asyncio.run(self._lifespan(events))
+
+    async def _lifespan(self, events):
+        queue = [{'type': 'lifespan.{}'.format(event)} for event in events]
+        messages = []
+
+        async def receive():
+            return queue.pop(0)
+
+        async def send(message):
+            messages.append(message['type'])
+
+        await self.app({'type': 'lifespan'}, receive, send)
+
+        return messages
+
+
+def make_client():
+    router.enable('1.0', 'test', endpoints=[Echo, Stream, Import])
+
+    return AsgiClient(asgi.create_asgi_app())
+
+
+def get_body(messages):
+    return b''.join(
+        message['body'] for message in messages
+        if message['type'] == 'http.response.body')
+
+
+def test_request_goes_through_flask_app(clean_router):
+    client = make_client()
+
+    messages = client.request(
+        'POST', '/1.0/test/echo/', body=b'{"name": "carp"}',
+        headers=[('Content-Type', 'application/json'), ('X-Custom', 'yes')],
+        query=b'q=1')
+
+    assert messages[0]['type'] == 'http.response.start'
+    assert messages[0]['status'] == 201
+    assert (b'content-type', b'application/json') in messages[0]['headers']
+    assert not messages[-1]['more_body']
+
+    assert json.loads(get_body(messages)) == {
+        'json': {'name': 'carp'},
+        'query': '1',
+        'header': 'yes',
+    }
+
+    # routing of flask app, ie. common routes and 404
+    messages = client.request('GET', '/ping/')
+
+    assert messages[0]['status'] == 200
+    assert json.loads(get_body(messages)) == 'pong'
+
+    assert client.request('GET', '/1.0/missing/')[0]['status'] == 404
+
+
+def test_repeated_headers_are_joined():
+    environ = asgi.build_environ({
+        'method': 'GET',
+        'path': '/',
+        'headers': [
+            (b'accept', b'text/html'),
+            (b'accept', b'application/json'),
+            (b'cookie', b'a=1'),
+            (b'cookie', b'b=2'),
+        ],
+    }, None)
+
+    assert environ['HTTP_ACCEPT'] == 'text/html,application/json'
+    assert environ['HTTP_COOKIE'] == 'a=1; b=2'
+
+
+def test_bodies_over_limit_are_not_buffered(clean_router, monkeypatch):
+    client = make_client()
+
+    monkeypatch.setattr(settings, 'PAYLOAD_MAX_SIZE', 20)
+
+    body = json.dumps(list(range(20))).encode('utf8')
+
+    for headers in ([], [('Content-Length', str(len(body)))]):
+        headers = headers + [('Content-Type', 'application/json')]
+
+        # limits of the app apply to the body read from the connection
+        messages = client.request(
+            'POST', '/1.0/test/echo/', body=body, headers=headers)
+
+        assert messages[0]['status'] != 201
+
+        # while records of streamed body are within them
+        messages = client.request(
+            'POST', '/1.0/test/import/', body=body, headers=headers)
+
+        assert messages[0]['status'] == 201
+        assert json.loads(get_body(messages)) == {
+            'count': 20, 'streamed': True}
+
+    monkeypatch.setattr(settings, 'PAYLOAD_MAX_SIZE', 1024)
+
+    messages = client.request('POST', '/1.0/test/import/', body=body)
+
+    assert json.loads(get_body(messages)) == {'count': 20, 'streamed': False}
+
+
+def test_response_is_streamed(clean_router):
+    messages = make_client().request('GET', '/1.0/test/stream/')
+
+    assert [message['type'] for message in messages] == [
+        'http.response.start',
+        'http.response.body',
+        'http.response.body',
+        'http.response.body',
+    ]
+    assert [message['more_body'] for message in messages[1:]] == [
+        True, True, False]
+    assert get_body(messages) == b'0\n1\n2\n'
+
+
+def test_lifespan_sends_app_shutdown(clean_router):
+    client = make_client()
+
+    received = []
+
+    def on_shutdown(sender):
+        received.append(sender)
+
+    signal.app_shutdown.connect(on_shutdown)
+
+    try:
+        assert client.lifespan('startup', 'shutdown') == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete']
+    finally:
+        signal.app_shutdown.disconnect(on_shutdown)
+
+    assert received == [client.app.app]
@@ -0,0 +1,143 @@
+"""Endpoints with async hooks run on event loop of the worker thread, request
+can await many downstream calls at once.
+"""
+import asyncio
+import threading
+import time
+
+import flask
+
+from carp_api import event_loop
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+NUMBER_OF_CALLS = 10
+
+DOWNSTREAM_LATENCY = 0.05
+
+
+def downstream_call(idx):
+    time.sleep(DOWNSTREAM_LATENCY)
+
+    return idx
+
+
+async def async_downstream_call(idx):
+    await asyncio.sleep(DOWNSTREAM_LATENCY)
+
+    return idx
+
+
+class FanOut(BaseEndpoint):
+    url = 'fan-out'
+
+    def action(self):
+        return [downstream_call(idx) for idx in range(NUMBER_OF_CALLS)]
+
+
+class AsyncFanOut(BaseEndpoint):
+    url = 'async-fan-out'
+
+    async def action(self):  # pylint: disable=invalid-overridden-method
+        return list(await asyncio.gather(*(
+            async_downstream_call(idx) for idx in range(NUMBER_OF_CALLS))))
+
+
+class AsyncHooks(BaseEndpoint):
+    url = 'hooks/<int:uid>'
+
+    async def pre_action(self):  # pylint: disable=invalid-overridden-method
+        await asyncio.sleep(0)
+
+        flask.g.calls = ['pre_action']
+
+    async def action(self, uid):  # pylint: disable=arguments-differ
+        await asyncio.sleep(0)
+
+        flask.g.calls.append('action')
+
+        return {
+            'uid': uid,
+            'version': self.request.version,
+            'loop': id(asyncio.get_event_loop()),
+        }
+
+    async def post_action(self, response):
+        # pylint: disable=invalid-overridden-method
+        await asyncio.sleep(0)
+
+        response['calls'] = flask.g.calls + ['post_action']
+
+        return super().post_action(response)
+
+
+def make_client():
+    router.enable('1.0', 'test', endpoints=[FanOut, AsyncFanOut, AsyncHooks])
+
+    return make_app(default.register_routes).test_client()
+
+
+def get_latency(client, path):
+    start = time.perf_counter()
+
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert response.get_json() == list(range(NUMBER_OF_CALLS))
+
+    return time.perf_counter() - start
+
+
+def test_parallel_awaits_drop_latency(clean_router):
+    client = make_client()
+
+    sync_latency = get_latency(client, '/1.0/test/fan-out/')
+    async_latency = get_latency(client, '/1.0/test/async-fan-out/')
+
+    assert sync_latency >= NUMBER_OF_CALLS * DOWNSTREAM_LATENCY
+    assert async_latency < NUMBER_OF_CALLS * DOWNSTREAM_LATENCY / 3
+
+
+def test_async_hooks_run_in_order_with_request_available(clean_router):
+    client = make_client()
+
+    response = client.get('/1.0/test/hooks/3/')
+
+    assert response.status_code == 200
+
+    data = response.get_json()
+
+    assert data['uid'] == 3
+    assert data['version'] == '1.0'
+    assert data['calls'] == ['pre_action', 'action', 'post_action']
+
+    # loop is kept for next requests of the thread
+    assert client.get('/1.0/test/hooks/4/').get_json()['loop'] == data['loop']
+
+    loops = []
+
+    def request_from_thread():
+        loops.append(client.get('/1.0/test/hooks/5/').get_json()['loop'])
+
+        event_loop.close()
+
+    thread = threading.Thread(target=request_from_thread)
+    thread.start()
+    thread.join()
+
+    assert loops and loops[0] != data['loop']
+
+
+def test_sync_endpoint_does_not_touch_event_loop(clean_router):
+    client = make_client()
+
+    event_loop.close()
+
+    client.get('/1.0/test/fan-out/')
+
+    # pylint: disable=protected-access
+    assert getattr(event_loop._local, 'loop', None) is None
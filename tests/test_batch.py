@@ -0,0 +1,150 @@
+"""Batch endpoint runs list of requests through the whole app and returns
+their statuses and bodies.
+"""
+import threading
+import time
+
+import flask
+import pytest
+
+from carp_api import exception
+from carp_api.common import logic
+from carp_api.common.endpoint import Batch
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app, make_settings
+
+
+THREADS = set()
+
+
+class GetCar(BaseEndpoint):
+    url = 'car/<int:uid>'
+
+    def action(self, uid):  # pylint: disable=arguments-differ
+        THREADS.add(threading.get_ident())
+
+        time.sleep(0.05)
+
+        return {
+            'uid': uid,
+            'color': self.request.args.get('color'),
+            'token': self.request.headers.get('X-Token'),
+        }
+
+
+class CreateCar(BaseEndpoint):
+    url = 'car'
+
+    methods = ['POST']
+
+    def action(self):  # pylint: disable=arguments-differ
+        return self.request.get_json()
+
+
+def make_client():
+    default.enable_routes(make_settings(ROUTING_ADD_BATCH_ROUTE=True))
+
+    router.enable('1.0', 'test', endpoints=[GetCar])
+    router.enable('1.1', 'test', endpoints=[CreateCar])
+
+    THREADS.clear()
+
+    return make_app(default.register_routes).test_client()
+
+
+def test_batch_runs_requests_through_app(clean_router):
+    client = make_client()
+
+    response = client.post('/batch/', headers={'X-Token': 'abc'}, json=[
+        {'method': 'GET', 'path': '/1.0/test/car/1/?color=red'},
+        {'method': 'POST', 'path': '/1.1/test/car/', 'body': {'name': 'a'}},
+        {'path': '/1.0/test/boat/'},
+        {'method': 'GET', 'path': '/batch/'},
+        {'method': 'POST', 'path': '/%62atch/', 'body': []},
+        'car',
+    ])
+
+    assert response.status_code == 200
+
+    results = response.get_json()
+
+    assert results[0] == {'status': 200, 'body': {
+        'uid': 1, 'color': 'red', 'token': 'abc'}}
+    assert results[1] == {'status': 201, 'body': {'name': 'a'}}
+    assert results[2]['status'] == 404
+    assert [result['status'] for result in results[3:]] == [400, 400, 400]
+
+
+def test_batch_refuses_to_run_within_batch(clean_router):
+    make_client()
+
+    app = make_app(default.register_routes)
+
+    with app.test_request_context(
+            '/batch/', method='POST', json=[{'path': '/1.0/test/car/1/'}],
+            environ_overrides={logic.BATCH_ENVIRON_KEY: True}):
+        with pytest.raises(exception.InvalidPayloadError):
+            Batch().action()
+
+
+def test_pool_threads_do_not_wait_on_pool(clean_router):
+    client = make_client()
+
+    items = [
+        {'method': 'GET', 'path': '/1.0/test/car/{}/'.format(uid)}
+        for uid in range(2)
+    ]
+
+    app = make_app(default.register_routes)
+
+    def run_in_pool(_):
+        with app.test_request_context('/batch/', method='POST'):
+            return logic.run_batch(app, items, flask.request, 4)
+
+    # every worker of the pool runs a batch, nested ones run in place
+    executor = logic.get_batch_executor(4)
+
+    results = list(executor.map(run_in_pool, range(4)))
+
+    assert [[result['status'] for result in batch] for batch in results] \
+        == [[200, 200]] * 4
+
+    assert client.post('/batch/', json=items).status_code == 200
+
+
+def test_batch_runs_requests_in_parallel(clean_router):
+    client = make_client()
+
+    items = [
+        {'method': 'GET', 'path': '/1.0/test/car/{}/'.format(uid)}
+        for uid in range(8)
+    ]
+
+    start = time.perf_counter()
+
+    results = client.post('/batch/', json=items).get_json()
+
+    elapsed = time.perf_counter() - start
+
+    # results keep order of requests
+    assert [result['body']['uid'] for result in results] == list(range(8))
+
+    # 8 requests, 0.05s each, on BATCH_MAX_WORKERS (4) threads
+    assert elapsed < 8 * 0.05
+    assert 1 < len(THREADS) <= 4
+
+
+def test_batch_payload_is_validated(clean_router):
+    app = make_app()
+
+    with app.test_request_context('/batch/', method='POST'):
+        with pytest.raises(exception.InvalidPayloadError):
+            logic.parse_batch({'path': '/'}, 20)
+
+        with pytest.raises(exception.InvalidPayloadError):
+            logic.parse_batch([{'path': '/'}] * 3, 2)
+
+        assert logic.run_batch(app, [], flask.request) == []
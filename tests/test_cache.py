@@ -0,0 +1,157 @@
+"""Responses of endpoints with cache are served from in-process LRU until
+they expire or are invalidated.
+"""
+import time
+
+import flask
+
+from carp_api import cache
+from carp_api.auth_model import AuthorizedUser
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+CALLS = []
+
+
+class GetCountries(BaseEndpoint):
+    url = 'countries'
+
+    cache = cache.ResponseCache(ttl=60, max_entries=3, vary=['X-Lang'])
+
+    def action(self):  # pylint: disable=arguments-differ
+        CALLS.append(self.request.full_path)
+
+        return {
+            'lang': self.request.headers.get('X-Lang'),
+            'page': self.request.args.get('page'),
+            'call': len(CALLS),
+        }
+
+
+class GetProfile(BaseEndpoint):
+    url = 'profile'
+
+    cache = cache.ResponseCache(ttl=0.05, per_user=True)
+
+    def action(self):  # pylint: disable=arguments-differ
+        CALLS.append(self.request.user.uid)
+
+        if self.request.args.get('fail'):
+            raise ValueError("Profile is not available")
+
+        return {'uid': self.request.user.uid, 'call': len(CALLS)}
+
+
+class CreateCountry(BaseEndpoint):
+    url = 'countries/create'
+
+    methods = ['POST']
+
+    def action(self):  # pylint: disable=arguments-differ
+        GetCountries.cache.invalidate(
+            GetCountries.url_for(self.request.version))
+
+
+def make_client():
+    router.enable('1.0', 'test', endpoints=[
+        GetCountries, GetProfile, CreateCountry])
+
+    app = make_app(default.register_routes)
+
+    @app.before_request
+    def set_user():  # pylint: disable=unused-variable
+        uid = flask.request.headers.get('X-User', '0')
+
+        flask.request.user = AuthorizedUser(uid, 'name', 'email')
+
+    GetCountries.cache.invalidate()
+    GetProfile.cache.invalidate()
+
+    del CALLS[:]
+
+    return app.test_client()
+
+
+def test_responses_are_cached_per_query_and_vary(clean_router):
+    client = make_client()
+
+    stats = GetCountries.cache.get_stats()
+
+    first = client.get('/1.0/test/countries/?page=1&size=5').get_json()
+
+    # order of query arguments does not matter
+    assert client.get(
+        '/1.0/test/countries/?size=5&page=1').get_json() == first
+    assert client.head('/1.0/test/countries/?page=1&size=5').status_code == \
+        200
+
+    assert client.get('/1.0/test/countries/?page=2').get_json()['call'] == 2
+
+    response = client.get('/1.0/test/countries/', headers={'X-Lang': 'pl'})
+
+    assert response.get_json() == {'lang': 'pl', 'page': None, 'call': 3}
+    assert response.mimetype == 'application/json'
+
+    assert len(CALLS) == 3
+
+    assert GetCountries.cache.get_stats() == {
+        'hits': stats['hits'] + 2,
+        'misses': stats['misses'] + 3,
+        'evictions': stats['evictions'],
+        'entries': 3,
+    }
+
+    # lru, least recently used (page=2) is evicted
+    client.get('/1.0/test/countries/?page=3')
+
+    assert GetCountries.cache.get_stats()['evictions'] == \
+        stats['evictions'] + 1
+
+    client.get('/1.0/test/countries/?page=1&size=5')
+    client.get('/1.0/test/countries/?page=2')
+
+    assert CALLS[-1] == '/1.0/test/countries/?page=2'
+
+    assert cache.get_stats()['GetCountries'] == \
+        GetCountries.cache.get_stats()
+
+
+def test_invalidation_from_write_endpoint(clean_router):
+    client = make_client()
+
+    client.get('/1.0/test/countries/')
+    client.get('/1.0/test/countries/?page=1')
+
+    assert len(GetCountries.cache) == 2
+
+    client.post('/1.0/test/countries/create/')
+
+    assert len(GetCountries.cache) == 0
+
+    client.get('/1.0/test/countries/')
+
+    assert len(CALLS) == 3
+
+
+def test_per_user_cache_expires(clean_router):
+    client = make_client()
+
+    assert client.get('/1.0/test/profile/').get_json()['uid'] == '0'
+    assert client.get(
+        '/1.0/test/profile/', headers={'X-User': '7'}).get_json()['uid'] == \
+        '7'
+    assert client.get('/1.0/test/profile/').get_json()['call'] == 1
+
+    # errors are not cached
+    assert client.get('/1.0/test/profile/?fail=1').status_code == 500
+    assert client.get('/1.0/test/profile/?fail=1').status_code == 500
+
+    assert CALLS == ['0', '7', '0', '0']
+
+    time.sleep(0.06)
+
+    assert client.get('/1.0/test/profile/').get_json()['call'] == 5
@@ -0,0 +1,170 @@
+"""Responses are compressed with encoding negotiated from Accept-Encoding.
+"""
+import gzip
+import sys
+import zlib
+
+import pytest
+
+from carp_api import cache, compression
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+ROWS = [
+    {'idx': idx, 'name': 'row number {}'.format(idx)} for idx in range(200)
+]
+
+
+class GetRows(BaseEndpoint):
+    url = 'rows'
+
+    etag = True
+
+    def action(self):  # pylint: disable=arguments-differ
+        return ROWS
+
+
+class GetSmall(BaseEndpoint):
+    url = 'small'
+
+    def action(self):  # pylint: disable=arguments-differ
+        return {'small': True}
+
+
+class GetUncompressed(GetRows):
+    url = 'uncompressed'
+
+    compress = False
+
+
+class StreamRows(BaseEndpoint):
+    url = 'stream'
+
+    def action(self):  # pylint: disable=arguments-differ
+        return iter(ROWS * 50)
+
+
+class GetCachedRows(GetRows):
+    url = 'cached'
+
+    cache = cache.ResponseCache()
+
+
+def make_client():
+    router.enable('1.0', 'test', endpoints=[
+        GetRows, GetSmall, GetUncompressed, StreamRows, GetCachedRows])
+
+    return make_app(default.register_routes).test_client()
+
+
+def test_negotiated_encoding(clean_router):
+    client = make_client()
+
+    plain = client.get('/1.0/test/rows/')
+
+    assert 'Content-Encoding' not in plain.headers
+    assert 'Accept-Encoding' in plain.headers['Vary']
+
+    response = client.get(
+        '/1.0/test/rows/', headers={'Accept-Encoding': 'gzip, deflate'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert int(response.headers['Content-Length']) < \
+        len(plain.get_data()) / 4
+    assert gzip.decompress(response.get_data()) == plain.get_data()
+
+    # etag of uncompressed body is kept, as weak one
+    assert response.headers['ETag'] == 'W/' + plain.headers['ETag']
+
+    response = client.get(
+        '/1.0/test/rows/', headers={'Accept-Encoding': 'gzip;q=0.5, deflate'})
+
+    assert response.headers['Content-Encoding'] == 'deflate'
+    assert zlib.decompress(response.get_data()) == plain.get_data()
+
+    response = client.get(
+        '/1.0/test/rows/', headers={'Accept-Encoding': 'identity'})
+
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_small_and_opted_out_responses_are_not_compressed(clean_router):
+    client = make_client()
+
+    headers = {'Accept-Encoding': 'gzip'}
+
+    for path in ('/1.0/test/small/', '/1.0/test/uncompressed/'):
+        response = client.get(path, headers=headers)
+
+        assert 'Content-Encoding' not in response.headers
+        assert response.get_json()
+
+
+def test_stream_is_compressed_chunk_by_chunk(clean_router):
+    client = make_client()
+
+    expected = client.get('/1.0/test/stream/').get_data()
+
+    response = client.get(
+        '/1.0/test/stream/', headers={'Accept-Encoding': 'gzip'},
+        buffered=False)
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    parts = [decompressor.decompress(chunk) for chunk in response.response]
+
+    response.close()
+
+    # every chunk (but the closing one) is decoded as soon as it arrives
+    assert len(parts) > 2
+    assert all(parts[:-1])
+    assert b''.join(parts) == expected
+
+
+def test_cached_response_is_compressed_once(clean_router, monkeypatch):
+    client = make_client()
+
+    codec = compression.get_compressor().codecs['gzip']
+    calls = []
+
+    def compress(data):
+        calls.append(len(data))
+
+        return gzip.compress(data)
+
+    monkeypatch.setattr(codec, 'compress', compress)
+
+    GetCachedRows.cache.invalidate()
+
+    headers = {'Accept-Encoding': 'gzip'}
+
+    first = client.get('/1.0/test/cached/', headers=headers)
+    second = client.get('/1.0/test/cached/', headers=headers)
+
+    assert len(calls) == 1
+    assert second.headers['Content-Encoding'] == 'gzip'
+    assert second.get_data() == first.get_data()
+
+    # clients that do not accept compression have own entry
+    assert client.get('/1.0/test/cached/').get_json() == ROWS
+    assert len(GetCachedRows.cache) == 2
+
+
+def test_unavailable_encodings_are_skipped(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'brotli', None)
+    monkeypatch.setitem(sys.modules, 'zstandard', None)
+
+    compressor = compression.Compressor(('br', 'zstd', 'gzip'))
+
+    assert compressor.encodings == ('gzip',)
+    assert compressor.negotiate('br, gzip;q=0.1') == 'gzip'
+    assert compressor.negotiate('br') is None
+
+    with pytest.raises(ValueError):
+        compression.make_codec('lzma')
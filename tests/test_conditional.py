@@ -0,0 +1,193 @@
+"""Conditional GET, validators are added to responses and requests that
+already have current version get 304 without running what is not needed.
+"""
+import datetime
+
+from werkzeug.http import http_date
+
+from carp_api import cache
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+CALLS = []
+
+MODIFIED = datetime.datetime(2020, 5, 17, 10, 30, 15, 123)
+
+
+class GetReport(BaseEndpoint):
+    url = 'report'
+
+    etag = True
+
+    def action(self):  # pylint: disable=arguments-differ
+        CALLS.append('action')
+
+        return {'rows': list(range(100))}
+
+
+class GetCachedReport(GetReport):
+    url = 'cached-report'
+
+    cache = cache.ResponseCache()
+
+
+class GetDocument(BaseEndpoint):
+    url = 'document/<int:uid>'
+
+    def get_etag(self, uid):  # pylint: disable=arguments-differ
+        CALLS.append('get_etag')
+
+        return 'doc-{}-v3'.format(uid)
+
+    def get_last_modified(self, uid):  # pylint: disable=arguments-differ
+        CALLS.append('get_last_modified')
+
+        return MODIFIED.replace(tzinfo=datetime.timezone.utc)
+
+    def action(self, uid):  # pylint: disable=arguments-differ
+        CALLS.append('action')
+
+        return {'uid': uid}
+
+
+class GetLongDocument(GetDocument):
+    url = 'long-document/<int:uid>'
+
+    def action(self, uid):  # pylint: disable=arguments-differ
+        return {'uid': uid, 'text': 'carp ' * 1000}
+
+
+class GetPlain(BaseEndpoint):
+    url = 'plain'
+
+    def action(self):  # pylint: disable=arguments-differ
+        return {}
+
+
+def make_client():
+    router.enable('1.0', 'test', endpoints=[
+        GetReport, GetCachedReport, GetDocument, GetLongDocument, GetPlain])
+
+    del CALLS[:]
+
+    return make_app(default.register_routes).test_client()
+
+
+def test_automatic_etag(clean_router):
+    client = make_client()
+
+    response = client.get('/1.0/test/report/')
+    etag = response.headers['ETag']
+
+    assert response.status_code == 200
+    assert not etag.startswith('W/')
+
+    response = client.get(
+        '/1.0/test/report/', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert response.headers['ETag'] == etag
+
+    # body was built to compute etag
+    assert CALLS == ['action', 'action']
+
+    response = client.get(
+        '/1.0/test/report/', headers={'If-None-Match': '"other"'})
+
+    assert response.status_code == 200
+    assert response.get_json() == {'rows': list(range(100))}
+
+    assert 'ETag' not in client.get('/1.0/test/plain/').headers
+
+
+def test_automatic_etag_of_cached_response(clean_router):
+    client = make_client()
+
+    etag = client.get('/1.0/test/cached-report/').headers['ETag']
+
+    response = client.get(
+        '/1.0/test/cached-report/', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert CALLS == ['action']
+
+
+def test_etag_hook_skips_action(clean_router):
+    client = make_client()
+
+    response = client.get('/1.0/test/document/3/')
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"doc-3-v3"'
+    assert response.get_json() == {'uid': 3}
+
+    del CALLS[:]
+
+    response = client.get(
+        '/1.0/test/document/3/', headers={'If-None-Match': '"doc-3-v3"'})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"doc-3-v3"'
+    assert CALLS == ['get_etag', 'get_last_modified']
+
+    # other document, other etag
+    response = client.get(
+        '/1.0/test/document/4/', headers={'If-None-Match': '"doc-3-v3"'})
+
+    assert response.status_code == 200
+    assert CALLS[-1] == 'action'
+
+
+def test_etag_hook_of_compressed_response_is_weak(clean_router):
+    client = make_client()
+
+    response = client.get(
+        '/1.0/test/long-document/3/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == 'W/"doc-3-v3"'
+
+    response = client.get('/1.0/test/long-document/3/', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': 'W/"doc-3-v3"'})
+
+    assert response.status_code == 304
+
+    response = client.get('/1.0/test/long-document/3/')
+
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == '"doc-3-v3"'
+
+
+def test_last_modified_hook_skips_action(clean_router):
+    client = make_client()
+
+    response = client.get('/1.0/test/document/3/')
+
+    assert response.headers['Last-Modified'] == http_date(MODIFIED)
+
+    del CALLS[:]
+
+    response = client.get('/1.0/test/document/3/', headers={
+        'If-Modified-Since': http_date(MODIFIED)})
+
+    assert response.status_code == 304
+    assert 'action' not in CALLS
+
+    response = client.get('/1.0/test/document/3/', headers={
+        'If-Modified-Since': http_date(MODIFIED - datetime.timedelta(
+            seconds=1))})
+
+    assert response.status_code == 200
+    assert CALLS[-1] == 'action'
+
+    # If-None-Match takes precedence
+    response = client.get('/1.0/test/document/3/', headers={
+        'If-Modified-Since': http_date(MODIFIED),
+        'If-None-Match': '"doc-3-v2"'})
+
+    assert response.status_code == 200
@@ -0,0 +1,210 @@
+"""Dispatcher mode has to serve exactly same endpoints as default one, while
+registering each distinct url only once.
+"""
+import flask
+import pytest
+
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+class GetListOfUsers(BaseEndpoint):
+    url = '/'
+
+    def action(self):
+        return 'list-1.0'
+
+
+class GetListOfUsersV11(BaseEndpoint):
+    url = '/'
+
+    name = 'GetListOfUsers'
+
+    def action(self):
+        return 'list-1.1'
+
+
+class CreateUser(BaseEndpoint):
+    url = '/create/'
+
+    methods = ['POST']
+
+    def action(self):
+        return 'create'
+
+
+class GetUser(BaseEndpoint):
+    url = '/uid/<int:uid>'
+
+    def action(self, uid):
+        return 'user-{}-{}'.format(self.request.version, uid)
+
+
+class DeleteUser(BaseEndpoint):
+    url = '/uid/<int:uid>/delete'
+
+    methods = ['DELETE']
+
+    propagate = False
+
+    def action(self, uid):
+        return 'deleted-{}'.format(uid)
+
+
+class GetTags(BaseEndpoint):
+    url = '/'
+
+    def action(self):
+        return 'tags'
+
+
+def enable_routing():
+    router.enable('1.0', 'user', endpoints=[
+        GetListOfUsers, CreateUser, GetUser,
+    ])
+    router.enable('1.1', 'user', endpoints=[
+        GetListOfUsersV11, DeleteUser,
+    ])
+    router.enable('1.2', 'tag', endpoints=[GetTags])
+    router.enable('1.10', 'tag', endpoints=[])
+
+
+REQUESTS = [
+    ('GET', path) for path in [
+        '/1.0/user/', '/1.1/user/', '/1.2/user/', '/1.10/user/',
+        '/1.0/user/uid/3', '/1.2/user/uid/3', '/1.10/user/uid/3',
+        '/1.0/user/uid/3/', '/1.0/user/uid/x',
+        '/1.0/tag/', '/1.1/tag/', '/1.2/tag/', '/1.10/tag/',
+        '/1.3/user/', '/user/', '/1.0/user',
+    ]
+] + [
+    ('POST', '/1.0/user/create/'), ('POST', '/1.2/user/create/'),
+    ('GET', '/1.2/user/create/'),
+    ('DELETE', '/1.0/user/uid/3/delete/'),
+    ('DELETE', '/1.1/user/uid/3/delete/'),
+    ('DELETE', '/1.2/user/uid/3/delete/'),
+    ('GET', '/1.1/user/uid/3/delete/'), ('PUT', '/1.1/user/'),
+]
+
+
+def collect_responses(app):
+    client = app.test_client()
+
+    result = []
+
+    for method, path in REQUESTS:
+        response = client.open(path, method=method)
+
+        result.append((
+            method, path, response.status_code, response.get_data()))
+
+    return result
+
+
+URLS = [
+    ('GetUser', {'uid': 3}), ('GetListOfUsers', {}), ('GetTags', {}),
+    ('DeleteUser', {'uid': 3}), ('CreateUser', {'page': 2}),
+]
+
+
+def collect_urls(app):
+    with app.test_request_context('/'):
+        return [flask.url_for(name, **values) for name, values in URLS]
+
+
+@pytest.mark.parametrize('dispatcher', [False, True])
+def test_both_modes_serve_same_responses(clean_router, dispatcher):
+    enable_routing()
+
+    expected_app = make_app(default.register_routes)
+
+    clean_router.versions = type(clean_router.versions)()
+
+    enable_routing()
+
+    app = make_app(default.register_routes, ROUTING_DISPATCHER=dispatcher)
+
+    assert collect_responses(app) == collect_responses(expected_app)
+    assert collect_urls(app) == collect_urls(expected_app)
+
+    with app.test_request_context('/1.2/user/uid/3/'):
+        app.preprocess_request()
+
+        assert flask.request.view_args == {'uid': 3}
+
+
+def test_dispatcher_picks_implementation_per_version(clean_router):
+    enable_routing()
+
+    client = make_app(
+        default.register_routes, ROUTING_DISPATCHER=True).test_client()
+
+    def get(path, method='GET'):
+        return client.open(path, method=method).get_json()
+
+    # both implementations are named GetListOfUsers, the latest one serves
+    # every version, as in default mode
+    assert get('/1.0/user/') == 'list-1.1'
+    assert get('/1.1/user/') == 'list-1.1'
+    assert get('/1.10/user/') == 'list-1.1'
+    assert get('/1.2/user/uid/3/') == 'user-1.2-3'
+    assert get('/1.1/user/uid/3/delete/', 'DELETE') == 'deleted-3'
+
+
+class GetReport(BaseEndpoint):
+    url = '/'
+
+    propagate = False
+
+    def action(self):
+        return 'report-1.0'
+
+
+class GetReportV11(BaseEndpoint):
+    url = '/'
+
+    def action(self):
+        return 'report-1.1'
+
+
+@pytest.mark.parametrize('dispatcher', [False, True])
+def test_url_taken_over_by_other_endpoint(clean_router, dispatcher):
+    router.enable('1.0', 'report', endpoints=[GetReport])
+    router.enable('1.1', 'report', endpoints=[GetReportV11])
+    router.enable('1.2', 'report', endpoints=[])
+
+    client = make_app(
+        default.register_routes, ROUTING_DISPATCHER=dispatcher).test_client()
+
+    assert client.get('/1.0/report/').get_json() == 'report-1.0'
+    assert client.get('/1.1/report/').get_json() == 'report-1.1'
+    assert client.get('/1.2/report/').get_json() == 'report-1.1'
+
+
+def test_dispatcher_registers_every_url_once(clean_router):
+    enable_routing()
+
+    app = make_app(default.register_routes, ROUTING_DISPATCHER=True)
+
+    rules = [
+        rule for rule in app.url_map.iter_rules()
+        if rule.endpoint != 'static'
+    ]
+
+    # list of users, create user, get user, delete user, tags
+    assert len(rules) == 5
+
+    with app.test_request_context('/'):
+        from carp_api.common import logic
+
+        url_map = logic.get_url_map('1.10')
+
+    assert sorted(url_map) == [
+        '(GET,OPTIONS) /1.10/tag/',
+        '(GET,OPTIONS) /1.10/user/',
+        '(GET,OPTIONS) /1.10/user/uid/<int:uid>/',
+        '(POST) /1.10/user/create/',
+    ]
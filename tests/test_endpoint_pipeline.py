@@ -0,0 +1,167 @@
+"""Endpoint compiles request handling per method, skipping stages that are
+not in use, while running hooks in the same order as always.
+"""
+import pytest
+
+from simple_settings import settings
+
+from carp_api import exception
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+CALLS = []
+
+
+class Plain(BaseEndpoint):
+    url = 'plain'
+
+    methods = ['GET', 'POST']
+
+    def action(self):
+        return {'plain': True}
+
+
+class WithStatus(Plain):
+    url = 'status'
+
+    http_code = 203
+
+
+class WithHooks(BaseEndpoint):
+    url = 'hooks/<int:uid>'
+
+    methods = ['PUT']
+
+    input_schema = object
+    output_schema = object
+
+    def pre_action(self):
+        CALLS.append('pre_action')
+
+    def get_payload(self):
+        CALLS.append('get_payload')
+
+        return {'name': 'payload'}
+
+    def parse_input(self, payload, args, kwargs):
+        CALLS.append('parse_input')
+
+        return [payload] + args, kwargs
+
+    def action(self, payload, uid):  # pylint: disable=arguments-differ
+        CALLS.append('action')
+
+        return [payload['name'], uid]
+
+    def parse_output(self, payload):
+        CALLS.append('parse_output')
+
+        return payload + ['output']
+
+    def post_action(self, response):
+        CALLS.append('post_action')
+
+        return super().post_action(response)
+
+
+def test_pipeline_skips_unused_stages(clean_router):
+    router.enable('1.0', 'test', endpoints=[Plain, WithStatus, WithHooks])
+
+    app = make_app(default.register_routes)
+
+    plain = app.routing_table.get_instance(Plain)
+
+    # compiled on registration
+    assert set(plain.__dict__['_pipelines']) == {
+        'GET', 'POST', 'HEAD', 'OPTIONS'}
+
+    assert not plain.is_overridden('pre_action')
+    assert WithHooks().is_overridden('pre_action')
+
+    client = app.test_client()
+
+    response = client.get('/1.0/test/plain/')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'plain': True}
+
+    # payload is parsed even if nothing consumes it
+    response = client.post(
+        '/1.0/test/plain/', data='{malformed',
+        content_type='application/json')
+
+    assert response.status_code == 400
+
+    response = client.post('/1.0/test/plain/', json={'name': 'a'})
+
+    assert response.status_code == 201
+
+    assert client.get('/1.0/test/status/').status_code == 203
+    assert client.post('/1.0/test/status/').status_code == 203
+
+    response = client.options('/1.0/test/plain/')
+
+    assert response.status_code == 200
+    assert 'POST' in response.headers['Allow']
+
+
+def test_pipeline_checks_unused_payload(clean_router, monkeypatch):
+    router.enable('1.0', 'test', endpoints=[Plain])
+
+    app = make_app(default.register_routes)
+
+    monkeypatch.setattr(settings, 'PAYLOAD_MAX_SIZE', 10)
+
+    pipeline = app.routing_table.get_instance(Plain).get_pipeline('POST')
+
+    with app.test_request_context(
+            '/1.0/test/plain/', method='POST', json=[1] * 10):
+        with pytest.raises(exception.InvalidPayloadError):
+            pipeline()
+
+
+def test_pipeline_runs_hooks_in_order(clean_router):
+    router.enable('1.0', 'test', endpoints=[WithHooks])
+
+    client = make_app(default.register_routes).test_client()
+
+    del CALLS[:]
+
+    response = client.put('/1.0/test/hooks/3/')
+
+    assert response.status_code == 202
+    assert response.get_json() == ['payload', 3, 'output']
+    assert CALLS == [
+        'pre_action', 'get_payload', 'parse_input', 'action', 'parse_output',
+        'post_action',
+    ]
+
+
+def test_cors_follows_allowed_hosts(clean_router, monkeypatch):
+    router.enable('1.0', 'test', endpoints=[Plain])
+
+    client = make_app(default.register_routes).test_client()
+
+    def get_allowed_origin():
+        response = client.get(
+            '/1.0/test/plain/', headers={'Origin': 'http://example.com'})
+
+        return response.headers.get('Access-Control-Allow-Origin')
+
+    monkeypatch.setattr(
+        settings, 'CORS_ALLOWED_HOSTS', ['example.com'], raising=False)
+
+    assert get_allowed_origin() == 'http://example.com'
+
+    monkeypatch.setattr(settings, 'CORS_ALLOWED_HOSTS', ['other.com'])
+
+    assert get_allowed_origin() is None
+
+    # changed in place
+    settings.CORS_ALLOWED_HOSTS.append('example.com')
+
+    assert get_allowed_origin() == 'http://example.com'
@@ -0,0 +1,85 @@
+import sys
+
+import pytest
+
+from carp_api import exception
+from carp_api.routing import lazy, router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+MODULE = 'tests.server.lazy_endpoints'
+
+
+@pytest.fixture
+def unimported_module():
+    sys.modules.pop(MODULE, None)
+    yield MODULE
+    sys.modules.pop(MODULE, None)
+
+
+def enable_boats():
+    router.enable('1.0', 'boat', endpoints=[
+        MODULE + ':GetListOfBoats',
+        lazy.LazyEndpoint(
+            MODULE + ':GetBoat', url='boats/<string:name>', methods=['GET']),
+    ])
+
+
+@pytest.mark.parametrize('dispatcher', [False, True])
+def test_lazy_endpoint_is_imported_on_first_request(
+        clean_router, unimported_module, dispatcher):
+    enable_boats()
+
+    app = make_app(default.register_routes, ROUTING_DISPATCHER=dispatcher)
+
+    assert unimported_module not in sys.modules
+
+    urls = sorted(url for _, _, _, url, _ in app.routing_table)
+
+    assert urls == ['/1.0/boat/', '/1.0/boat/boats/<string:name>/']
+
+    client = app.test_client()
+
+    response = client.get('/1.0/boat/')
+
+    assert response.status_code == 200
+    assert response.get_json() == ['Yacht', 'Canoe']
+    assert unimported_module in sys.modules
+
+    assert client.get('/1.0/boat/boats/Ark/').get_json() == 'Ark'
+
+
+def test_lazy_endpoints_are_warmed_up(clean_router, unimported_module):
+    enable_boats()
+
+    app = make_app(
+        default.register_routes, ROUTING_WARM_LAZY_ENDPOINTS=True)
+
+    assert unimported_module in sys.modules
+    assert all(
+        endpoint.is_loaded for _, _, _, _, endpoint in app.routing_table)
+
+
+def test_lazy_endpoint_conflicts_are_detected_before_import(
+        clean_router, unimported_module):
+    router.enable('1.0', 'boat', endpoints=[MODULE + ':GetListOfBoats'])
+    router.enable('1.0', 'boat', endpoints=[
+        lazy.LazyEndpoint(MODULE + ':GetBoat', url='')
+    ])
+
+    with pytest.raises(exception.ConflictingUrlsError):
+        make_app(default.register_routes)
+
+    assert unimported_module not in sys.modules
+
+
+def test_lazy_endpoint_declared_metadata_is_checked(unimported_module):
+    endpoint = lazy.LazyEndpoint(MODULE + ':GetBoat', url='boats')
+
+    with pytest.raises(exception.RoutingConfigurationError) as err:
+        endpoint.load()
+
+    assert "url='boats'" in str(err.value)
+    assert not endpoint.is_loaded
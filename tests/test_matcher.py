@@ -0,0 +1,110 @@
+"""Radix matcher has to pick the same rules and fail the same way as
+werkzeug does on its own.
+"""
+import pytest
+
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Map, RequestRedirect, Rule
+
+from carp_api.routing import matcher
+from carp_api.server_factory import default
+
+from .conftest import make_app
+from .test_dispatcher import REQUESTS, enable_routing
+
+
+RULES = [
+    Rule('/', endpoint='index'),
+    Rule('/1.0/user/', endpoint='list'),
+    Rule('/1.0/user/', endpoint='create', methods=['POST']),
+    Rule('/1.0/user/<int:uid>', endpoint='get_by_id'),
+    Rule('/1.0/user/<name>', endpoint='get_by_name'),
+    Rule('/1.0/user/<float:score>/', endpoint='get_by_score'),
+    Rule('/1.0/user/me', endpoint='me'),
+    Rule('/1.0/user/<uuid:uid>/x', endpoint='get_by_uuid'),
+    Rule('/1.0/user/<any(a, b):kind>/y', endpoint='get_kind'),
+    Rule('/1.0/file/<path:name>', endpoint='file'),
+    Rule('/1.0/file/<path:name>/edit', endpoint='file_edit'),
+    Rule('/1.0/report-<int:year>.csv', endpoint='report'),
+    Rule('/1.0/loose', endpoint='loose', strict_slashes=False),
+    Rule('/1.0/loose-dir/', endpoint='loose_dir', strict_slashes=False),
+    Rule('/1.0/old', redirect_to='/1.0/user/'),
+    Rule('/1.0/built', endpoint='built', build_only=True),
+]
+
+PATHS = [
+    '/', '/1.0/user/', '/1.0/user', '/1.0/user/12', '/1.0/user/12/',
+    '/1.0/user/bob', '/1.0/user/me', '/1.0/user/1.5', '/1.0/user/1.5/',
+    '/1.0/user/a/y', '/1.0/user/c/y', '/1.0/user/bob/x',
+    '/1.0/user/8ed3d5a3-4a4c-4a5b-9a43-3e0f4f4f6f31/x',
+    '/1.0/file/a/b/c', '/1.0/file/a/b/edit', '/1.0/report-2020.csv',
+    '/1.0/loose', '/1.0/loose/', '/1.0/loose-dir', '/1.0/loose-dir/',
+    '/1.0/old', '/1.0/built', '/1.0//user/', '/2.0/user/', '/1.0/usr/x/y/',
+]
+
+
+def match(url_map, path, method):
+    adapter = url_map.bind('localhost')
+
+    try:
+        return adapter.match(path, method)
+    except RequestRedirect as err:
+        return ('redirect', err.new_url)
+    except HTTPException as err:
+        return (err.code, sorted(getattr(err, 'valid_methods', None) or ()))
+
+
+@pytest.mark.parametrize('method', ['GET', 'POST', 'DELETE'])
+def test_radix_map_matches_as_werkzeug(method):
+    url_map = Map([rule.empty() for rule in RULES])
+    radix_map = matcher.RadixMap([rule.empty() for rule in RULES])
+
+    for path in PATHS:
+        assert match(radix_map, path, method) == \
+            match(url_map, path, method), path
+
+
+def test_radix_tree_limits_candidates():
+    radix_map = matcher.RadixMap([rule.empty() for rule in RULES])
+
+    tree = radix_map.get_tree()
+
+    candidates = tree.get_candidates('/1.0/user/12')
+
+    # rules with path converter or mixed segments are always tried
+    assert set(rule.endpoint for rule in candidates) == {
+        'get_by_id', 'get_by_name', 'report', 'file_edit', 'file',
+    }
+
+    # in order of the map
+    assert candidates == [rule for rule in tree.rules if rule in candidates]
+
+    assert tree.get_candidates('/1.0//user/') is None
+
+
+@pytest.mark.parametrize('dispatcher', [False, True])
+def test_radix_matcher_serves_same_responses(clean_router, dispatcher):
+    enable_routing()
+
+    expected_app = make_app(
+        default.register_routes, ROUTING_DISPATCHER=dispatcher)
+
+    app = make_app(
+        default.register_routes, ROUTING_DISPATCHER=dispatcher,
+        ROUTING_RADIX_MATCHER=True)
+
+    assert isinstance(app.url_map, matcher.RadixMap)
+
+    def collect(app):
+        client = app.test_client()
+
+        return [
+            (path, response.status_code, response.headers.get('Location'),
+             response.get_data())
+            for path, response in (
+                (path, client.open(path, method=method))
+                for method, path in REQUESTS
+            )
+        ]
+
+    assert collect(app) == collect(expected_app)
@@ -0,0 +1,135 @@
+"""Only latest versions are registered upfront, older ones have to be
+registered by the first request that asks for them.
+"""
+import threading
+
+import pytest
+
+from carp_api import exception
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+from .test_dispatcher import collect_responses, enable_routing
+
+
+def get_rules(app, version):
+    return [
+        rule.rule for rule in app.url_map.iter_rules()
+        if rule.rule.startswith('/{}/'.format(version))
+    ]
+
+
+@pytest.mark.parametrize('dispatcher', [False, True])
+def test_lazy_versions_serve_same_responses(clean_router, dispatcher):
+    enable_routing()
+
+    expected_app = make_app(
+        default.register_routes, ROUTING_DISPATCHER=dispatcher)
+
+    clean_router.versions = type(clean_router.versions)()
+
+    enable_routing()
+
+    app = make_app(
+        default.register_routes, ROUTING_DISPATCHER=dispatcher,
+        ROUTING_EAGER_VERSIONS=1)
+
+    assert app.version_materializer.pending_versions == ['1.0', '1.1', '1.2']
+    assert not get_rules(app, '1.0')
+    assert app.routing_table.versions == ['1.10']
+
+    assert collect_responses(app) == collect_responses(expected_app)
+
+    assert not app.version_materializer.pending_versions
+
+
+def test_lazy_versions_serve_same_implementation(clean_router):
+    enable_routing()
+
+    app = make_app(default.register_routes, ROUTING_EAGER_VERSIONS=0)
+
+    client = app.test_client()
+
+    # endpoints of both versions are named GetListOfUsers, flask keeps one
+    # view function per name, the latest one, as when registered upfront
+    assert client.get('/1.0/user/').get_json() == 'list-1.1'
+    assert client.get('/1.1/user/').get_json() == 'list-1.1'
+    assert client.post('/1.0/user/create/').get_json() == 'create'
+
+
+def test_version_is_registered_once_under_concurrency(clean_router):
+    enable_routing()
+
+    app = make_app(default.register_routes, ROUTING_EAGER_VERSIONS=1)
+
+    barrier = threading.Barrier(8)
+    results = []
+
+    def request():
+        client = app.test_client()
+
+        barrier.wait()
+
+        results.append(client.get('/1.0/user/').status_code)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert results == [200] * 8
+    assert sorted(get_rules(app, '1.0')) == [
+        '/1.0/user/', '/1.0/user/create/', '/1.0/user/uid/<int:uid>/',
+    ]
+    assert len([
+        version for version, _, _, _, _ in app.routing_table
+        if version == '1.0'
+    ]) == 3
+
+
+def test_url_map_lists_every_version(clean_router):
+    enable_routing()
+
+    app = make_app(
+        default.register_routes, ROUTING_EAGER_VERSIONS=1,
+        ROUTING_ADD_COMMON=True)
+
+    urls = app.test_client().get('/').get_json()
+
+    assert '(GET,OPTIONS) /1.0/user/' in urls
+    assert '(GET,OPTIONS) /1.10/user/' in urls
+    assert not app.version_materializer.pending_versions
+
+
+class GetBoat(BaseEndpoint):
+    url = 'boat'
+
+
+class GetOtherBoat(BaseEndpoint):
+    url = 'boat'
+
+    propagate = False
+
+
+def test_conflicting_version_is_not_added_partially(clean_router):
+    router.enable('1.0', 'test', endpoints=[GetBoat, GetOtherBoat])
+    router.enable('1.1', 'test', endpoints=[GetBoat])
+
+    app = make_app(default.register_routes, ROUTING_EAGER_VERSIONS=1)
+
+    routes = len(app.routing_table)
+
+    with pytest.raises(exception.ConflictingUrlsError):
+        app.version_materializer.materialize('1.0')
+
+    # none of the routes of the version went in, version is not retried
+    assert len(app.routing_table) == routes
+    assert not get_rules(app, '1.0')
+    assert not app.version_materializer.pending_versions
+
+    assert app.test_client().get('/1.0/test/boat/').status_code == 404
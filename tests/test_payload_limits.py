@@ -0,0 +1,203 @@
+"""Payloads over limits (size, nesting, number of keys, index of list, length
+of strings) are rejected fast, random payloads either parse or are rejected
+with InvalidPayloadError, never anything else.
+"""
+import io
+import json
+import random
+import time
+
+import flask
+import pytest
+
+from simple_settings import settings
+from werkzeug.datastructures import MultiDict
+
+from carp_api import exception, payload_guard, request_parser
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+# pathological payload has to be rejected within that many seconds
+TIME_LIMIT = 0.5
+
+FORM_ALPHABET = 'ab1[].'
+
+JSON_ALPHABET = '[]{}:,"\\ab1 '
+
+# limits are opt-in, values suggested by settings
+LIMITS = {
+    'PAYLOAD_MAX_SIZE': 1024 * 1024,
+    'PAYLOAD_MAX_DEPTH': 32,
+    'PAYLOAD_MAX_KEYS': 20000,
+    'PAYLOAD_MAX_INDEX': 10000,
+    'PAYLOAD_MAX_STRING_LENGTH': 65536,
+}
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch):
+    for name, value in LIMITS.items():
+        monkeypatch.setattr(settings, name, value)
+
+
+def assert_rejected_fast(func, payload):
+    start = time.perf_counter()
+
+    with pytest.raises(exception.InvalidPayloadError):
+        func(payload)
+
+    assert time.perf_counter() - start < TIME_LIMIT
+
+
+def test_pathological_forms_are_rejected_fast():
+    request_parser.clear()
+
+    for pairs in (
+            [('name[{}]'.format('9' * 100000), 'a')],
+            [('name[{}]'.format(settings.PAYLOAD_MAX_INDEX + 1), 'a')],
+            [('a' + '.a' * 100000, 'a')],
+            [('a' * 100000, 'a')],
+            [('name', 'a' * 100000)],
+            [('key{}'.format(idx), 'a') for idx in range(100000)]):
+        assert_rejected_fast(request_parser.form_to_python, MultiDict(pairs))
+
+    # the same limits apply to keys that come from the cache
+    for _ in range(2):
+        with pytest.raises(exception.InvalidPayloadError):
+            request_parser.form_to_python(MultiDict([('name[99999]', 'a')]))
+
+
+def test_pathological_json_is_rejected_fast():
+    for data in (
+            b'[' * 1000000,
+            b'{"a":' * 200000 + b'1' + b'}' * 200000,
+            json.dumps({'k{}'.format(idx): 1 for idx in range(50000)}),
+            json.dumps(['a' * 100000]),
+            b'"' + b'\\"' * 200000 + b'"',
+            b'"\\' * 500000,
+            b'["a", "' + b'\\"' * 200000,
+            b' ' * (settings.PAYLOAD_MAX_SIZE + 1)):
+        if isinstance(data, str):
+            data = data.encode('utf8')
+
+        assert_rejected_fast(payload_guard.check_json, data)
+
+    # brackets within strings do not count
+    payload_guard.check_json(json.dumps({'a': '[[[[' * 1000}).encode())
+
+
+def test_random_forms():
+    rnd = random.Random(1234)
+
+    for _ in range(2000):
+        payload = MultiDict([
+            (''.join(rnd.choice(FORM_ALPHABET)
+                     for _ in range(rnd.randint(1, 12))), 'value')
+            for _ in range(rnd.randint(1, 5))
+        ])
+
+        try:
+            result = request_parser.form_to_python(payload)
+        except exception.InvalidPayloadError:
+            continue
+
+        assert isinstance(result, dict)
+
+
+def test_random_json():
+    rnd = random.Random(4321)
+
+    for _ in range(2000):
+        data = ''.join(
+            rnd.choice(JSON_ALPHABET) for _ in range(rnd.randint(1, 40))
+        ).encode('utf8')
+
+        try:
+            payload_guard.check_json(data)
+        except exception.InvalidPayloadError:
+            continue
+
+        # anything that passed the check is safe to hand over to json parser
+        try:
+            json.loads(data)
+        except ValueError:
+            pass
+
+
+class Echo(BaseEndpoint):
+    url = 'echo'
+
+    methods = ['POST']
+
+    def action(self):  # pylint: disable=arguments-differ
+        return {}
+
+
+def test_endpoint_checks_payload_before_parsing(clean_router, monkeypatch):
+    router.enable('1.0', 'test', endpoints=[Echo])
+
+    app = make_app(default.register_routes)
+
+    monkeypatch.setattr(settings, 'PAYLOAD_MAX_SIZE', 10)
+
+    with app.test_request_context(
+            '/1.0/test/echo/', method='POST', json=[1] * 10):
+        with pytest.raises(exception.InvalidPayloadError):
+            Echo().get_payload()
+
+    with app.test_request_context(
+            '/1.0/test/echo/', method='POST', data={'name': 'a' * 10}):
+        with pytest.raises(exception.InvalidPayloadError):
+            Echo().get_payload()
+
+    with app.test_request_context(
+            '/1.0/test/echo/', method='POST', json=[1]):
+        assert Echo().get_payload() == [1]
+
+
+class Import(BaseEndpoint):
+    url = 'import'
+
+    methods = ['POST']
+
+    def action(self):  # pylint: disable=arguments-differ
+        # no input_schema, payload is read by the action itself
+        return {'size': len(self.request.get_json(silent=True))}
+
+
+def test_limits_apply_to_json_read_by_action(clean_router, monkeypatch):
+    router.enable('1.0', 'test', endpoints=[Import])
+
+    app = make_app(default.register_routes)
+
+    with app.test_request_context(
+            '/1.0/test/import/', method='POST',
+            data=b'[' * 100 + b']' * 100, content_type='application/json'):
+        with pytest.raises(exception.InvalidPayloadError):
+            Import().action()
+
+    monkeypatch.setattr(settings, 'PAYLOAD_MAX_SIZE', 10)
+
+    # chunked body, without Content-Length
+    with app.test_request_context(
+            '/1.0/test/import/', method='POST',
+            input_stream=io.BytesIO(json.dumps([1] * 10).encode()),
+            content_type='application/json',
+            environ_overrides={
+                'wsgi.input_terminated': True, 'CONTENT_LENGTH': ''}):
+        assert flask.request.content_length is None
+
+        with pytest.raises(exception.InvalidPayloadError):
+            Import().action()
+
+    with app.test_request_context(
+            '/1.0/test/import/', method='POST',
+            input_stream=io.BytesIO(b'[1, 2]'),
+            content_type='application/json',
+            environ_overrides={
+                'wsgi.input_terminated': True, 'CONTENT_LENGTH': ''}):
+        assert Import().action() == {'size': 2}
@@ -249,3 +249,91 @@ def test_various_edge_cases_unsuccessful():
 
     with pytest.raises(exception.InvalidPayloadError):
         request_parser.form_to_python(payload)
+
+
+def test_parsing_request_multi_digit_indices():
+    payload = MultiDict([
+        ('name[{}]'.format(idx), 'john{}'.format(idx))
+        for idx in reversed(range(25))
+    ] + [
+        ('user[10].name', 'emma'),
+        ('user[2].name', 'josh'),
+    ])
+
+    result = request_parser.form_to_python(payload)
+
+    assert result['name'] == ['john{}'.format(idx) for idx in range(25)]
+    assert result['user'] == [{'name': 'josh'}, {'name': 'emma'}]
+
+
+def test_parsing_request_appended_values_follow_indexed_ones():
+    payload = MultiDict([
+        ('name[]', 'emma'),
+        ('name[1]', 'john1'),
+        ('name[0]', 'john0'),
+        ('name[]', 'gwen'),
+    ])
+
+    result = request_parser.form_to_python(payload)
+
+    assert result['name'] == ['john0', 'john1', 'emma', 'gwen']
+
+
+def test_parsing_request_conflicting_keys():
+    for pairs in (
+            [('user', 'john'), ('user.name', 'john')],
+            [('user.name', 'john'), ('user', 'john')],
+            [('user[0]', 'john'), ('user.name', 'john')],
+            [('user.name[0]', 'john'), ('user.name.first', 'john')],
+            [('user..name', 'john')]):
+        with pytest.raises(exception.InvalidPayloadError):
+            request_parser.form_to_python(MultiDict(pairs))
+
+
+def test_parsing_large_request():
+    payload = MultiDict(
+        [('tag[]', str(idx)) for idx in range(10000)] +
+        [('user[{}].name'.format(idx), str(idx)) for idx in range(10000)]
+    )
+
+    result = request_parser.form_to_python(payload)
+
+    assert result['tag'] == [str(idx) for idx in range(10000)]
+    assert result['user'][9999] == {'name': '9999'}
+
+
+def test_parsed_keys_are_cached():
+    key_parser = request_parser.KeyParser(max_entries=3)
+
+    assert key_parser('user[0].address.city') == (
+        'user', 0, 'address', 'city')
+    assert key_parser('user[0].address.city') == (
+        'user', 0, 'address', 'city')
+
+    # invalid keys are cached as well, and still raise
+    for _ in range(2):
+        with pytest.raises(exception.InvalidPayloadError):
+            key_parser('user[].name')
+
+    assert key_parser.get_stats() == {
+        'hits': 2, 'misses': 2, 'entries': 2, 'max_entries': 3}
+
+    # cache is bounded, no matter how many distinct keys come
+    for idx in range(100):
+        key_parser('random{}'.format(idx))
+
+    key_parser('x' * (request_parser.KEY_CACHE_MAX_KEY_LENGTH + 1))
+
+    assert key_parser.get_stats()['entries'] == 3
+    assert key_parser.get_stats()['misses'] == 102
+
+
+def test_form_parsing_uses_shared_key_cache():
+    request_parser.clear()
+
+    payload = MultiDict([('user[0].name', 'john'), ('user[1].name', 'emma')])
+
+    request_parser.form_to_python(payload)
+    request_parser.form_to_python(payload)
+
+    assert request_parser.get_stats()['hits'] == 2
@@ -0,0 +1,178 @@
+"""Endpoints with stream_input get records of the body one by one, as they
+are read, NDJSON or JSON array.
+"""
+import io
+import json
+import tracemalloc
+
+import pytest
+import python_schema
+
+from simple_settings import settings
+
+from carp_api import exception, request_stream
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+class RecordSchema:
+    def __init__(self):
+        self.value = None
+
+    def loads(self, payload):
+        if not isinstance(payload, dict) or payload.get('idx', -1) < 0:
+            raise python_schema.exception.PayloadError("idx is required")
+
+        self.value = payload
+
+
+class ImportRecords(BaseEndpoint):
+    url = 'import'
+
+    methods = ['POST']
+
+    stream_input = True
+
+    input_schema = RecordSchema
+
+    def action(self, records):  # pylint: disable=arguments-differ
+        total = 0
+        count = 0
+
+        for record in records:
+            total += record.value['idx']
+            count += 1
+
+        return {'count': count, 'total': total, 'errors': records.errors}
+
+
+class ImportRaw(BaseEndpoint):
+    url = 'import-raw'
+
+    methods = ['POST']
+
+    stream_input = True
+
+    def action(self, records):  # pylint: disable=arguments-differ
+        return list(records)
+
+
+def make_client():
+    router.enable('1.0', 'test', endpoints=[ImportRecords, ImportRaw])
+
+    return make_app(default.register_routes).test_client()
+
+
+def make_record(idx):
+    return {'idx': idx, 'name': 'record number {}'.format(idx)}
+
+
+def decode(body, mimetype='application/json', max_errors=0, chunk_size=7):
+    chunks = request_stream.iter_chunks(io.BytesIO(body), chunk_size)
+
+    if mimetype == request_stream.NDJSON_MIMETYPE:
+        records = request_stream.decode_ndjson(chunks)
+    else:
+        records = iter(request_stream.JsonArrayDecoder(chunks))
+
+    return request_stream.RecordStream(records, max_errors=max_errors)
+
+
+def test_json_array_is_decoded_record_by_record():
+    records = [make_record(idx) for idx in range(50)] + [
+        12345, -1.5e3, 'zażółć', [1, [2]], None, True, {}]
+
+    # chunks split records (and multi-byte characters) at any position
+    for chunk_size in (1, 3, 7, 64):
+        body = json.dumps(records, indent=1).encode('utf8')
+
+        assert list(decode(body, chunk_size=chunk_size)) == records
+
+    assert list(decode(b' [ ] ')) == []
+
+    for body in (b'{"idx": 1}', b'[1, 2', b'[1 2]', b'[1] 2', b'[{"a": ]'):
+        with pytest.raises(exception.InvalidPayloadError):
+            list(decode(body))
+
+
+def test_ndjson_error_budget():
+    body = b'{"idx": 1}\n\nbroken\n[1]\n{"idx": 2}'
+
+    stream = decode(body, request_stream.NDJSON_MIMETYPE)
+
+    with pytest.raises(exception.InvalidPayloadError):
+        list(stream)
+
+    stream = decode(body, request_stream.NDJSON_MIMETYPE, max_errors=1)
+
+    assert list(stream) == [{'idx': 1}, [1], {'idx': 2}]
+    assert [index for index, _ in stream.errors] == [1]
+
+
+def test_endpoint_gets_records(clean_router, monkeypatch):
+    client = make_client()
+
+    body = '\n'.join(
+        json.dumps(make_record(idx)) for idx in (1, 2, -3, 4))
+
+    response = client.post('/1.0/test/import/', data=body, headers={
+        'Content-Type': request_stream.NDJSON_MIMETYPE})
+
+    # third record is rejected by schema, budget is 0
+    assert response.status_code == 500
+
+    monkeypatch.setattr(
+        request_stream.settings, 'REQUEST_STREAM_MAX_ERRORS', 1)
+
+    response = client.post('/1.0/test/import/', data=body, headers={
+        'Content-Type': request_stream.NDJSON_MIMETYPE})
+
+    assert response.status_code == 201
+    assert response.get_json() == {
+        'count': 3, 'total': 7, 'errors': [[2, 'idx is required']]}
+
+    response = client.post('/1.0/test/import-raw/', json=[1, {'a': 2}])
+
+    assert response.get_json() == [1, {'a': 2}]
+
+
+def get_peak_memory(client, body):
+    tracemalloc.start()
+
+    try:
+        response = client.post('/1.0/test/import/', data=body, headers={
+            'Content-Type': 'application/json'})
+
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert response.status_code == 201
+
+    return response.get_json()['count'], peak
+
+
+def test_memory_is_bounded_by_record(clean_router, monkeypatch):
+    monkeypatch.setattr(settings, 'PAYLOAD_MAX_SIZE', 1024 * 1024)
+
+    client = make_client()
+
+    small_body = json.dumps(
+        [make_record(idx) for idx in range(1000)]).encode('utf8')
+    big_body = json.dumps(
+        [make_record(idx) for idx in range(25000)]).encode('utf8')
+
+    # PAYLOAD_MAX_SIZE applies to records, not the whole body
+    assert len(big_body) > 1024 * 1024
+
+    assert get_peak_memory(client, small_body)[0] == 1000
+
+    count, peak = get_peak_memory(client, big_body)
+
+    assert count == 25000
+
+    # body is never held as a whole (nor decoded into a list)
+    assert peak < len(big_body) / 4
@@ -0,0 +1,134 @@
+"""Generator results are streamed item by item, as JSON array or NDJSON.
+"""
+import json
+import tracemalloc
+
+import python_schema
+
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+class ItemSchema:
+    def __init__(self):
+        self.value = None
+
+    def loads(self, payload):
+        if payload['idx'] < 0:
+            raise python_schema.exception.PayloadError("negative idx")
+
+        self.value = {'idx': payload['idx'], 'name': str(payload['idx'])}
+
+    def dumps(self):
+        return self.value
+
+
+def make_row(idx):
+    return {'idx': idx, 'payload': 'x' * 100}
+
+
+class Export(BaseEndpoint):
+    url = 'export/<int:count>'
+
+    def action(self, count):  # pylint: disable=arguments-differ
+        return (make_row(idx) for idx in range(count))
+
+
+class ExportList(Export):
+    """The same as export, but materialized as a whole."""
+    url = 'export-list/<int:count>'
+
+    def action(self, count):
+        return list(super().action(count))
+
+
+class ExportWithSchema(BaseEndpoint):
+    url = 'export-schema'
+
+    output_schema = ItemSchema
+
+    def action(self):  # pylint: disable=arguments-differ
+        for idx in range(3):
+            yield {'idx': idx}
+
+
+def make_client():
+    router.enable('1.0', 'test', endpoints=[
+        Export, ExportList, ExportWithSchema])
+
+    return make_app(default.register_routes).test_client()
+
+
+def test_stream_as_json_array(clean_router):
+    client = make_client()
+
+    response = client.get('/1.0/test/export/2000/')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.headers.get('Content-Length') is None
+
+    assert response.get_json() == [make_row(idx) for idx in range(2000)]
+
+    assert client.get('/1.0/test/export/0/').get_json() == []
+
+
+def test_stream_as_ndjson(clean_router):
+    client = make_client()
+
+    response = client.get(
+        '/1.0/test/export/3/', headers={'Accept': 'application/x-ndjson'})
+
+    assert response.mimetype == 'application/x-ndjson'
+    assert [
+        json.loads(line) for line in response.get_data(as_text=True).split(
+            '\n') if line
+    ] == [make_row(idx) for idx in range(3)]
+
+
+def test_output_schema_applied_to_every_item(clean_router):
+    client = make_client()
+
+    assert client.get('/1.0/test/export-schema/').get_json() == [
+        {'idx': 0, 'name': '0'},
+        {'idx': 1, 'name': '1'},
+        {'idx': 2, 'name': '2'},
+    ]
+
+
+def get_peak_memory(client, path):
+    tracemalloc.start()
+
+    try:
+        response = client.get(path, buffered=False)
+
+        size = sum(len(chunk) for chunk in response.response)
+
+        response.close()
+
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return size, peak
+
+
+def test_memory_stays_flat(clean_router):
+    client = make_client()
+
+    small_size, small_peak = get_peak_memory(client, '/1.0/test/export/1000/')
+    big_size, big_peak = get_peak_memory(client, '/1.0/test/export/20000/')
+
+    assert big_size > 15 * small_size
+
+    # streamed response does not grow with number of items
+    assert big_peak < small_peak * 2
+    assert big_peak < big_size / 10
+
+    # while materialized one does
+    _, list_peak = get_peak_memory(client, '/1.0/test/export-list/20000/')
+
+    assert list_peak > big_size
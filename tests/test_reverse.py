@@ -0,0 +1,92 @@
+import flask
+import pytest
+
+from carp_api import exception
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import reverse, router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+class GetUser(BaseEndpoint):
+    url = 'uid/<int:uid>'
+
+    def action(self, uid):
+        return [
+            GetUser.url_for(self.request.version, uid=uid),
+            GetAddress.url_for(
+                self.request.version, uid=uid, address='home/1'),
+        ]
+
+
+class GetAddress(BaseEndpoint):
+    url = 'uid/<int:uid>/address/<path:address>'
+
+
+class GetList(BaseEndpoint):
+    url = ''
+
+
+def test_template_splits_literals_and_parameters():
+    template = reverse.UrlTemplate('/1.0/user/uid/<int:uid>/<name>/')
+
+    assert template.parts == ['/1.0/user/uid/', None, '/', None, '/']
+    assert template.parameters == [(1, 'uid'), (3, 'name')]
+
+    assert template.build({'uid': 1, 'name': 'a b'}) == \
+        '/1.0/user/uid/1/a%20b/'
+    assert template.build({'uid': 1, 'name': 'x', 'page': 2}) == \
+        '/1.0/user/uid/1/x/?page=2'
+
+    with pytest.raises(exception.UrlBuildError):
+        template.build({'uid': 1})
+
+    template = reverse.UrlTemplate('/1.0/user/')
+
+    assert template.build({}) == '/1.0/user/'
+    assert template.build({'page': 2}) == '/1.0/user/?page=2'
+
+
+def test_url_for_matches_flask_url_for(clean_router):
+    router.enable('1.0', 'user', endpoints=[GetUser, GetList])
+    router.enable('1.1', 'user', endpoints=[GetAddress])
+
+    app = make_app(default.register_routes)
+
+    with app.test_request_context('/1.1/user/'):
+        for version in ('1.0', '1.1'):
+            assert GetUser.url_for(version, uid=7) == \
+                '/{}/user/uid/7/'.format(version)
+            assert GetList.url_for(version) == '/{}/user/'.format(version)
+
+        assert GetAddress.url_for('1.1', uid=7, address='home/1 a') == \
+            flask.url_for('GetAddress', uid=7, address='home/1 a')
+
+        with pytest.raises(exception.UrlBuildError):
+            GetAddress.url_for('1.0', uid=7, address='home')
+
+    response = app.test_client().get('/1.1/user/uid/3/')
+
+    assert response.get_json() == [
+        '/1.1/user/uid/3/', '/1.1/user/uid/3/address/home/1/',
+    ]
+
+
+def test_url_for_lazily_registered_versions(clean_router):
+    router.enable('1.0', 'user', endpoints=[GetUser])
+    router.enable('1.1', 'user', endpoints=[GetAddress])
+
+    app = make_app(default.register_routes, ROUTING_EAGER_VERSIONS=1)
+
+    assert app.version_materializer.pending_versions == ['1.0']
+
+    # pending version is materialized to build its url
+    with app.test_request_context('/1.1/user/'):
+        assert GetUser.url_for('1.0', uid=1) == '/1.0/user/uid/1/'
+
+    assert app.version_materializer.pending_versions == []
+
+    with app.test_request_context('/1.1/user/'):
+        with pytest.raises(exception.UrlBuildError):
+            GetUser.url_for('0.9', uid=1)
@@ -0,0 +1,82 @@
+import json
+
+import flask
+
+from carp_api.routing import artifact, router, table
+from carp_api.server_factory import default
+
+from .conftest import make_settings
+from .server import endpoints
+
+
+def enable_routes(settings):
+    router.enable('1.0', 'car', endpoints=[endpoints.GetListOfCars])
+    router.enable('1.1', 'tree', endpoints=[endpoints.GetListOfTrees])
+
+
+def as_list(routing_table):
+    return [
+        (version, namespace, name, url, type(endpoint))
+        for version, namespace, name, url, endpoint in routing_table
+    ]
+
+
+def test_artifact_round_trip(clean_router, tmp_path):
+    settings = make_settings(ROUTING_ARTIFACT=str(tmp_path / 'routing.json'))
+
+    enable_routes(settings)
+
+    routing_table = table.RoutingTable.build(
+        router.Router.get_final_routing())
+
+    artifact.dump(settings.ROUTING_ARTIFACT, settings, routing_table)
+
+    loaded_table = table.RoutingTable()
+
+    assert artifact.load(settings.ROUTING_ARTIFACT, settings, loaded_table)
+
+    assert as_list(loaded_table) == as_list(routing_table)
+    assert loaded_table.versions == ['1.0', '1.1']
+
+    # artifact is used as is, nothing gets enabled on the router
+    app = flask.Flask(__name__)
+
+    default.register_routes(settings, app)
+
+    assert len(router.Router.versions) == 2
+    assert as_list(app.routing_table) == as_list(routing_table)
+    assert app.version_resolver.versions == ['1.0', '1.1']
+
+
+def test_stale_artifact_is_ignored(clean_router, tmp_path):
+    file_path = str(tmp_path / 'routing.json')
+
+    settings = make_settings(ROUTING_ARTIFACT=file_path)
+
+    enable_routes(settings)
+
+    routing_table = table.RoutingTable.build(
+        router.Router.get_final_routing())
+
+    data = artifact.dump(file_path, settings, routing_table)
+
+    assert data['sources']
+    assert artifact.read(file_path, settings) is not None
+
+    # different routing settings
+    assert artifact.read(
+        file_path, make_settings(ROUTING_ADD_COMMON=True)) is None
+    assert artifact.read(
+        file_path, make_settings(ROUTING_ADD_BATCH_ROUTE=True)) is None
+
+    # source file was modified since
+    data['sources'][next(iter(data['sources']))][0] -= 1
+
+    with open(file_path, 'w') as fpl:
+        json.dump(data, fpl)
+
+    assert artifact.read(file_path, settings) is None
+    assert not artifact.load(file_path, settings, table.RoutingTable())
+
+    # missing artifact
+    assert artifact.read(str(tmp_path / 'missing.json'), settings) is None
@@ -53,7 +53,8 @@ It should resolve into this:
 import pytest
 
 from carp_api.endpoint import BaseEndpoint
-from carp_api.routing import router, component
+from carp_api import exception
+from carp_api.routing import router, component, table
 
 
 class CreateUser(BaseEndpoint):
@@ -219,3 +220,82 @@ def test_router_will_materialise_url_structure_properly(reset_state_of_router):
 
     assert 'ChangeUserAddress' in list_of_urls[5][2].keys()
     assert 'CreateUserAddress' in list_of_urls[5][2].keys()
+
+
+def test_late_enable_recompiles_affected_versions(reset_state_of_router):
+    router.enable('1.0', 'user', endpoints=[CreateUser, GetUserByPk])
+    router.enable('1.1', 'user/address', endpoints=[DeleteUserAddress])
+    router.enable('1.2', 'tag', endpoints=[CreateTag])
+
+    final_routing = router.Router.get_final_routing()
+
+    # nothing changed, compiled routing is reused
+    assert router.Router.get_final_routing() is final_routing
+
+    # namespaces that did not change are shared between versions
+    assert final_routing[0].get('user') is final_routing[1].get('user')
+
+    router.enable('1.1', 'user', endpoints=[GetUserWithAddressByPk])
+    router.enable('1.0', 'tag', endpoints=[GetListOfTags])
+
+    final_routing = router.Router.get_final_routing()
+
+    versions = router.Router.versions
+
+    router.Router.versions = component.VersionList()
+
+    for version in versions:
+        for namespace in version:
+            router.enable(version.value, namespace.name, namespace.as_list())
+
+    expected_routing = router.Router.get_final_routing()
+
+    def as_list(routing):
+        return [
+            (version, namespace, sorted(endpoints.items()))
+            for version, namespace, endpoints in routing.as_flat_list()
+        ]
+
+    assert as_list(final_routing) == as_list(expected_routing)
+
+    assert final_routing[1].get('user').endpoints['GetUserByPk'] is \
+        GetUserWithAddressByPk
+    assert len(final_routing[1].get('user/address')) == 1
+    assert len(final_routing[2].get('user/address')) == 0
+    assert len(final_routing[2].get('tag')) == 2
+
+
+def test_routing_table_shares_endpoint_instances(reset_state_of_router):
+    router.enable('1.0', 'user', endpoints=[CreateUser, GetUserByPk])
+    router.enable('1.1', 'user', endpoints=[GetUserWithAddressByPk])
+    router.enable('1.2', 'tag', endpoints=[CreateTag])
+
+    routing_table = table.RoutingTable.build(
+        router.Router.get_final_routing())
+
+    assert len(routing_table) == 7
+    assert routing_table.versions == ['1.0', '1.1', '1.2']
+
+    instances = {}
+
+    for version, _, name, url, instance in routing_table:
+        assert url.startswith('/' + version + '/')
+
+        instances.setdefault(type(instance), set()).add(id(instance))
+
+    assert all(len(ids) == 1 for ids in instances.values())
+    assert len(instances) == 4
+
+    usage = routing_table.memory_usage()
+
+    assert usage['routes'] == 7
+    assert usage['endpoint_instances'] == 4
+
+
+def test_routing_table_flags_conflicting_urls(reset_state_of_router):
+    router.enable('1.0', 'user', endpoints=[CreateUserAddress])
+    router.enable('1.1', 'user', endpoints=[ChangeUserAddress])
+    router.enable('1.2', 'other', endpoints=[CreateUserAddress])
+
+    with pytest.raises(exception.ConflictingUrlsError):
+        table.RoutingTable.build(router.Router.get_final_routing())
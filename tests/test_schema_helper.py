@@ -0,0 +1,115 @@
+"""Loaders and dumpers of schemas are built once, errors of schemas are
+translated into carp_api ones.
+"""
+import pytest
+import python_schema
+
+from carp_api import exception, schema_helper
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+class Schema:
+    """Minimal stand-in of python_schema schema, remembers instances it
+    created.
+    """
+    instances = []
+
+    def __init__(self):
+        self.value = None
+
+        self.instances.append(self)
+
+    def loads(self, payload):
+        if not isinstance(payload, dict) or 'name' not in payload:
+            raise python_schema.exception.PayloadError(
+                "name is required")
+
+        self.value = {'name': str(payload['name'])}
+
+    def dumps(self):
+        return self.value
+
+
+class Item(Schema):
+    instances = []
+
+
+class Output(Schema):
+    instances = []
+
+
+class Echo(BaseEndpoint):
+    url = 'echo'
+
+    methods = ['POST']
+
+    input_schema = Item
+    output_schema = Output
+
+    def action(self, item):  # pylint: disable=arguments-differ
+        return {'name': item.value['name'].upper()}
+
+
+def test_dumper_constructs_new_instances():
+    dump = schema_helper.make_dumper(Output)
+
+    del Output.instances[:]
+
+    assert dump({'name': 'a'}) == {'name': 'a'}
+    assert dump({'name': 1}) == {'name': '1'}
+    assert len(Output.instances) == 2
+
+    with pytest.raises(exception.ResponseContentError) as err:
+        dump({})
+
+    assert str(err.value) == 'name is required'
+    assert isinstance(err.value, exception.ResponseError)
+
+
+def test_loader_constructs_new_instances():
+    load = schema_helper.make_loader(Item)
+
+    first = load({'name': 'a'})
+    second = load({'name': 'b'})
+
+    assert first is not second
+    assert first.value == {'name': 'a'}
+
+    with pytest.raises(exception.PayloadError) as err:
+        load([])
+
+    assert str(err.value) == 'name is required'
+
+
+def test_endpoint_uses_schema_helper(clean_router):
+    schema_helper.clear()
+
+    router.enable('1.0', 'test', endpoints=[Echo])
+
+    client = make_app(default.register_routes).test_client()
+
+    # built on registration
+    assert Item in schema_helper._loaders  # pylint: disable=protected-access
+    assert Output in schema_helper._dumpers  # pylint: disable=protected-access
+
+    del Item.instances[:]
+    del Output.instances[:]
+
+    for name in ('boat', 'carp'):
+        response = client.post('/1.0/test/echo/', json={'name': name})
+
+        assert response.status_code == 201
+        assert response.get_json() == {'name': name.upper()}
+
+    assert len(Item.instances) == 2
+    assert len(Output.instances) == 2
+
+    with pytest.raises(exception.PayloadError):
+        Echo().parse_input({}, [], {})
+
+    with pytest.raises(exception.ResponseContentError):
+        Echo().parse_output({})
@@ -0,0 +1,119 @@
+"""Responses are serialized by serializer picked in settings, bytes returned by
+action are sent as they are.
+"""
+import datetime
+import json
+import sys
+import uuid
+
+import flask
+import pytest
+
+from carp_api import serializer
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+PAYLOAD = {
+    'name': 'Karpik ąę',
+    'created': datetime.datetime(2020, 1, 2, 3, 4, 5),
+    'day': datetime.date(2020, 1, 2),
+    'uid': uuid.UUID('12345678123456781234567812345678'),
+    'items': [1, 2.5, None, True, {'nested': 'yes'}],
+    'big': 2 ** 70,
+}
+
+
+class Raw(BaseEndpoint):
+    url = 'raw'
+
+    methods = ['POST']
+
+    def action(self):  # pylint: disable=arguments-differ
+        return b'{"already":"serialized"}'
+
+
+class RawView(Raw):
+    url = 'raw-view'
+
+    def action(self):
+        return memoryview(b'[1,2,3]')
+
+
+class Data(BaseEndpoint):
+    url = 'data'
+
+    def action(self):  # pylint: disable=arguments-differ
+        return {'name': 'carp'}
+
+
+def dumps_upper(obj):
+    return json.dumps(obj).upper().encode('utf8')
+
+
+@pytest.mark.parametrize('name', ['auto', 'orjson', 'stdlib', 'flask'])
+def test_serializers_produce_the_same_json(name):
+    app = flask.Flask(__name__)
+
+    dumps = serializer.load(name)
+
+    with app.app_context():
+        expected = json.loads(flask.json.dumps(PAYLOAD))
+
+        body = dumps(PAYLOAD)
+
+    assert isinstance(body, bytes)
+    assert json.loads(body) == expected
+    assert expected['created'] == 'Thu, 02 Jan 2020 03:04:05 GMT'
+
+
+def test_compact_output_without_sorting():
+    with flask.Flask(__name__).app_context():
+        for name in ('orjson', 'stdlib'):
+            assert serializer.load(name)({'b': 1, 'a': 'ł', 3: None}) == \
+                '{"b":1,"a":"ł","3":null}'.encode('utf8')
+
+
+def test_auto_falls_back_to_stdlib(monkeypatch):
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+
+    assert serializer.load('auto') is serializer.stdlib_dumps
+
+    with pytest.raises(ImportError):
+        serializer.load('orjson')
+
+    assert serializer.load('tests.test_serializer:dumps_upper') is \
+        dumps_upper
+
+
+def test_serializer_from_settings(clean_router, monkeypatch):
+    router.enable('1.0', 'test', endpoints=[Data])
+
+    client = make_app(default.register_routes).test_client()
+
+    monkeypatch.setattr(
+        serializer, '_dumps', serializer.load(
+            'tests.test_serializer:dumps_upper'))
+
+    response = client.get('/1.0/test/data/')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == b'{"NAME": "CARP"}'
+
+
+def test_bytes_are_sent_as_they_are(clean_router):
+    router.enable('1.0', 'test', endpoints=[Raw, RawView])
+
+    client = make_app(default.register_routes).test_client()
+
+    response = client.post('/1.0/test/raw/')
+
+    assert response.status_code == 201
+    assert response.mimetype == 'application/json'
+    assert response.get_data() == b'{"already":"serialized"}'
+
+    assert client.post('/1.0/test/raw-view/').get_json() == [1, 2, 3]
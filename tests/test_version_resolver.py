@@ -0,0 +1,160 @@
+import flask
+
+from werkzeug.test import EnvironBuilder
+
+from carp_api.api_request import ApiRequest
+from carp_api.endpoint import BaseEndpoint
+from carp_api.routing import component, resolver, router
+from carp_api.server_factory import default
+
+from .conftest import make_app
+
+
+def make_version_list(*versions):
+    version_list = component.VersionList()
+
+    for version in versions:
+        version_list.get_or_create_version(version)
+
+    return version_list
+
+
+def test_resolver_finds_version_by_first_segment():
+    instance = resolver.VersionResolver.from_version_list(
+        make_version_list(None, '1.0', '1.1', '2'))
+
+    assert instance.resolve('/1.0/user/') == ('1.0', '/user/')
+    assert instance.resolve('/1.1/user/uid/2/') == ('1.1', '/user/uid/2/')
+    assert instance.resolve('/2/') == ('2', '/')
+    assert instance.resolve('/2') == ('2', '/')
+
+    # not registered versions and unversioned urls are not resolved
+    assert instance.resolve('/1.2/user/') == (None, '/1.2/user/')
+    assert instance.resolve('/ping/') == (None, '/ping/')
+    assert instance.resolve('/') == (None, '/')
+
+
+def test_resolver_with_cache_gives_same_results():
+    instance = resolver.VersionResolver(['1.0'], cache_size=2)
+
+    for _ in range(3):
+        assert instance.resolve('/1.0/user/') == ('1.0', '/user/')
+        assert instance.resolve('/ping/') == (None, '/ping/')
+        assert instance.resolve('/a/') == (None, '/a/')
+
+    # adding version invalidates cache
+    instance.add('1.1')
+
+    assert instance.resolve('/1.1/user/') == ('1.1', '/user/')
+
+
+def test_request_resolves_version_lazily():
+    app = flask.Flask(__name__)
+    app.version_resolver = resolver.VersionResolver(['1.0'])
+
+    with app.app_context():
+        request = ApiRequest(EnvironBuilder(path='/1.0/car/').get_environ())
+
+        assert 'resolved_path' not in request.__dict__
+
+        assert request.version == '1.0'
+        assert request.remainder == '/car/'
+
+        request = ApiRequest(EnvironBuilder(path='/ping/').get_environ())
+
+        assert request.version is None
+        assert request.remainder == '/ping/'
+
+
+def test_version_list_floor():
+    version_list = make_version_list('1.0', '1.2', '1.10', '2')
+
+    assert version_list.floor('1.3').as_str() == '1.2'
+    assert version_list.floor('1.2').as_str() == '1.2'
+    assert version_list.floor('1.9.5').as_str() == '1.2'
+    assert version_list.floor('1.11').as_str() == '1.10'
+    assert version_list.floor('3').as_str() == '2'
+    assert version_list.floor('0.9') is None
+
+
+def test_resolver_falls_back_to_nearest_lower_version():
+    instance = resolver.VersionResolver(['1.0', '1.2'], fallback=True)
+
+    assert instance.rewrite('/1.3/user/') == ('1.3', '/1.2/user/')
+    assert instance.rewrite('/1.3') == ('1.3', '/1.2')
+    assert instance.rewrite('/1.1/user/') == ('1.1', '/1.0/user/')
+
+    # registered, too low or not a version at all
+    assert instance.rewrite('/1.2/user/') is None
+    assert instance.rewrite('/0.1/user/') is None
+    assert instance.rewrite('/ping/') is None
+    assert instance.rewrite('/favicon.ico') is None
+    assert instance.rewrite('/') is None
+
+    # versions of other shape than registered ones
+    assert instance.rewrite('/2024/report/') is None
+    assert instance.rewrite('/1.2.3.4/user/') is None
+    assert instance.rewrite('/1.3.1/user/') is None
+
+    # new version takes over
+    instance.add('1.3')
+
+    assert instance.rewrite('/1.4/') == ('1.4', '/1.3/')
+
+    # fallback is opt-in
+    assert resolver.VersionResolver(['1.0']).rewrite('/1.1/') is None
+
+
+class GetVersions(BaseEndpoint):
+    url = 'versions'
+
+    def action(self):
+        return [self.request.requested_version, self.request.version]
+
+
+def test_unregistered_version_is_served_by_nearest_lower_one(clean_router):
+    router.enable('1.0', 'test', endpoints=[GetVersions])
+    router.enable('1.2', 'other', endpoints=[])
+
+    client = make_app(
+        default.register_routes, ROUTING_VERSION_FALLBACK=True,
+    ).test_client()
+
+    assert client.get('/1.0/test/versions/').get_json() == ['1.0', '1.0']
+    assert client.get('/1.1/test/versions/').get_json() == ['1.1', '1.0']
+    assert client.get('/1.7/test/versions/').get_json() == ['1.7', '1.2']
+    assert client.get('/0.9/test/versions/').status_code == 404
+
+    client = make_app(default.register_routes).test_client()
+
+    assert client.get('/1.1/test/versions/').status_code == 404
+
+
+class GetReport(BaseEndpoint):
+    url = 'report'
+
+    def action(self):
+        return 'report'
+
+
+class GetArchive(BaseEndpoint):
+    url = 'archive'
+
+    def action(self):
+        return 'archive'
+
+
+def test_fallback_keeps_unversioned_routes(clean_router):
+    router.enable('1.0', 'test', endpoints=[GetVersions])
+    router.enable(None, '2024', endpoints=[GetReport])
+    router.enable(None, '1.5', endpoints=[GetArchive])
+
+    client = make_app(
+        default.register_routes, ROUTING_VERSION_FALLBACK=True,
+    ).test_client()
+
+    assert client.get('/2024/report/').get_json() == 'report'
+
+    # version shaped path that matches a rule as it is
+    assert client.get('/1.5/archive/').get_json() == 'archive'
+    assert client.get('/1.5/test/versions/').get_json() == ['1.5', '1.0']